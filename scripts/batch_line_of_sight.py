@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Sichtbarkeit aller Windräder von vielen Beobachtern aus (Batch-Line-of-Sight)
+
+Für Planungsstudien: jede Kombination Beobachter (z.B. Wohnadressen) ×
+Windrad aus windraeder.csv, mit derselben Logik wie /v1/line-of-sight
+(elevation.line_of_sight). Statt eines Requests pro Paar werden die
+Strahlen nach den Kacheln sortiert, die sie überqueren, und in Batches als
+ein NumPy-Array (Strahlen × Stützpunkte) gerechnet – jede Kachel wird pro
+Batch nur einmal gelesen, benachbarte Batches teilen sich ihre Kacheln.
+Ergebnisse werden batchweise als CSV oder Parquet geschrieben.
+
+Beobachter-CSV: Spalten lat, lon; optional id und height (Augenhöhe in m).
+Ziel ist die Blattspitze (Nabenhöhe + Rotordurchmesser / 2).
+
+Usage:
+    python3 batch_line_of_sight.py adressen.csv -o sichtbarkeit.csv
+    python3 batch_line_of_sight.py adressen.csv -o sichtbarkeit.parquet --max-distance 10000
+"""
+
+import sys
+import csv
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install numpy")
+    sys.exit(1)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from pipeline_config import load_config, config_path
+from elevation import TileStore, TILE_SIZE, DEFAULT_SAMPLES, EYE_HEIGHT, line_of_sight, wgs84_to_utm33, haversine
+from turbines import load_turbines
+
+DEFAULT_BATCH_SIZE = 2048    # Strahlen pro Batch (× Stützpunkte × 4 Ecken Lookups)
+
+COLUMNS = ('observer_id', 'turbine_id', 'turbine_name', 'distance_m', 'status', 'visible_percent',
+           'visible_height_m', 'observer_ground_m', 'target_ground_m', 'blocked_distance_m')
+
+
+def load_observers(csv_file, default_height=EYE_HEIGHT):
+    """
+    Liest Beobachter (lat, lon, optional id/height)
+
+    Returns:
+        (ids, lat, lon, height) – ids als Liste, Rest als Float-Arrays
+
+    Raises:
+        ValueError: bei fehlenden Spalten oder ungültigen Zahlen
+    """
+    ids, lat, lon, height = [], [], [], []
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fields = set(reader.fieldnames or [])
+        if not {'lat', 'lon'} <= fields:
+            raise ValueError(f"{Path(csv_file).name}: Spalten lat und lon erforderlich")
+
+        for line, row in enumerate(reader, start=2):
+            try:
+                lat.append(float(row['lat']))
+                lon.append(float(row['lon']))
+                height.append(float(row['height']) if row.get('height') else default_height)
+            except ValueError:
+                raise ValueError(f"{Path(csv_file).name}, Zeile {line}: ungültige Zahl") from None
+            ids.append(row.get('id') or str(line - 1))
+
+    return ids, np.array(lat), np.array(lon), np.array(height)
+
+
+def plan_rays(obs_lat, obs_lon, turbines, max_distance=None):
+    """
+    Alle Beobachter × Windrad-Paare, sortiert nach überquerten Kacheln
+
+    Sortierschlüssel ist die Kachel von Start- und Mittelpunkt (Zeile, Spalte):
+    Strahlen im selben Batch liegen dicht beieinander und lesen dieselben
+    Kacheln, benachbarte Batches setzen dort fort.
+
+    Returns:
+        (observer_index, turbine_index, distance) als Arrays in Rechenreihenfolge
+    """
+    tur_lat = np.array([t['lat'] for t in turbines])
+    tur_lon = np.array([t['lon'] for t in turbines])
+
+    observer_index, turbine_index = np.meshgrid(np.arange(len(obs_lat)), np.arange(len(turbines)), indexing='ij')
+    observer_index = observer_index.ravel()
+    turbine_index = turbine_index.ravel()
+    distance = haversine(obs_lat[observer_index], obs_lon[observer_index],
+                         tur_lat[turbine_index], tur_lon[turbine_index])
+
+    if max_distance:
+        keep = distance <= max_distance
+        observer_index, turbine_index, distance = observer_index[keep], turbine_index[keep], distance[keep]
+
+    obs_x, obs_y = wgs84_to_utm33(obs_lat[observer_index], obs_lon[observer_index])
+    tur_x, tur_y = wgs84_to_utm33(tur_lat[turbine_index], tur_lon[turbine_index])
+    mid_x, mid_y = (obs_x + tur_x) / 2, (obs_y + tur_y) / 2
+    order = np.lexsort((
+        turbine_index,
+        np.floor_divide(mid_x, TILE_SIZE), np.floor_divide(mid_y, TILE_SIZE),
+        np.floor_divide(obs_x, TILE_SIZE), np.floor_divide(obs_y, TILE_SIZE),
+    ))
+    return observer_index[order], turbine_index[order], distance[order]
+
+
+class ResultWriter:
+    """Schreibt Ergebnis-Batches als CSV oder (mit pyarrow) Parquet"""
+
+    def __init__(self, output_file):
+        self.output_file = Path(output_file)
+        self.parquet = self.output_file.suffix == '.parquet'
+        self.rows = 0
+        if self.parquet:
+            if pyarrow is None:
+                raise ValueError("Parquet-Ausgabe benötigt pyarrow (pip install pyarrow)")
+            self.writer = None
+        else:
+            self.file = open(self.output_file, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(COLUMNS)
+
+    def write(self, batch):
+        """batch: Dict Spalte → Array/Liste gleicher Länge"""
+        self.rows += len(batch['status'])
+        if self.parquet:
+            table = pyarrow.table({column: batch[column] for column in COLUMNS})
+            if self.writer is None:
+                self.writer = pyarrow.parquet.ParquetWriter(self.output_file, table.schema)
+            self.writer.write_table(table)
+            return
+
+        rounded = {column: np.round(batch[column], 2) if column.endswith('_m') or column == 'visible_percent'
+                   else batch[column] for column in COLUMNS}
+        for values in zip(*(rounded[column] for column in COLUMNS)):
+            self.writer.writerow('' if isinstance(v, float) and np.isnan(v) else v for v in values)
+
+    def close(self):
+        if self.parquet:
+            if self.writer is not None:
+                self.writer.close()
+        else:
+            self.file.close()
+
+
+def run_batches(store, observers, turbines, rays, writer, samples=DEFAULT_SAMPLES,
+                batch_size=DEFAULT_BATCH_SIZE, verbose=True):
+    """
+    Rechnet alle Strahlen batchweise und schreibt die Ergebnisse
+
+    Returns:
+        Dict status → Anzahl
+    """
+    ids, obs_lat, obs_lon, obs_height = observers
+    observer_index, turbine_index, distance = rays
+    tur_lat = np.array([t['lat'] for t in turbines])
+    tur_lon = np.array([t['lon'] for t in turbines])
+    tur_height = np.array([t['total_height'] for t in turbines])
+    tur_id = np.array([t['id'] for t in turbines], dtype=object)
+    tur_name = np.array([t['name'] for t in turbines], dtype=object)
+    ids = np.array(ids, dtype=object)
+
+    counts = {}
+    total = len(observer_index)
+    start = time.perf_counter()
+
+    for begin in range(0, total, batch_size):
+        o = observer_index[begin:begin + batch_size]
+        t = turbine_index[begin:begin + batch_size]
+        result = line_of_sight(store, obs_lat[o], obs_lon[o], tur_lat[t], tur_lon[t],
+                               obs_height[o], tur_height[t], samples)
+
+        blocked = result['blocked_index']
+        blocked_distance = np.take_along_axis(result['profile']['distance_m'],
+                                              np.maximum(blocked, 0)[:, None], axis=1)[:, 0]
+        writer.write({
+            'observer_id': ids[o],
+            'turbine_id': tur_id[t],
+            'turbine_name': tur_name[t],
+            'distance_m': result['distance'],
+            'status': result['status'],
+            'visible_percent': result['visible_percent'],
+            'visible_height_m': result['visible_height'],
+            'observer_ground_m': result['ground_observer'],
+            'target_ground_m': result['ground_target'],
+            'blocked_distance_m': np.where(blocked >= 0, blocked_distance, np.nan),
+        })
+
+        for status, count in zip(*np.unique(result['status'], return_counts=True)):
+            counts[str(status)] = counts.get(str(status), 0) + int(count)
+
+        if verbose:
+            done = min(begin + batch_size, total)
+            elapsed = time.perf_counter() - start
+            print(f"\r   {done:,}/{total:,} Strahlen ({done / elapsed:,.0f}/s)", end="", flush=True)
+
+    if verbose and total:
+        print()
+    return counts
+
+
+def main():
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(
+        description="Batch line-of-sight: every observer × every turbine from windraeder.csv",
+        epilog="Beispiel: python3 batch_line_of_sight.py adressen.csv -o sichtbarkeit.csv --max-distance 10000"
+    )
+    parser.add_argument("observers", help="CSV with columns lat, lon (optional: id, height)")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv or .parquet)")
+    parser.add_argument("-t", "--turbines", help="Turbine CSV (default: paths.turbines)")
+    parser.add_argument("-d", "--tiles-dir", help="Tile directory (default: paths.tiles_output)")
+    parser.add_argument("-n", "--samples", type=int, default=DEFAULT_SAMPLES,
+                        help=f"Samples per ray, as in the API (default: {DEFAULT_SAMPLES})")
+    parser.add_argument("--max-distance", type=float,
+                        help="Skip pairs farther apart than this many meters (default: all pairs)")
+    parser.add_argument("--eye-height", type=float, default=EYE_HEIGHT,
+                        help=f"Observer height if the CSV has no height column (default: {EYE_HEIGHT})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rays per NumPy batch (default: {DEFAULT_BATCH_SIZE})")
+
+    args = parser.parse_args()
+
+    tiles_dir = Path(args.tiles_dir) if args.tiles_dir else config_path(config, 'tiles_output', '../tiles_output')
+
+    try:
+        observers = load_observers(args.observers, args.eye_height)
+        turbines = load_turbines(args.turbines)
+        writer = ResultWriter(args.output)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print("🔭 Batch-Sichtbarkeit (Line-of-Sight)")
+    print("=" * 60)
+    print(f"   Beobachter: {len(observers[0]):,}")
+    print(f"   Windräder:  {len(turbines)}")
+    print(f"   Tiles:      {tiles_dir}")
+
+    rays = plan_rays(observers[1], observers[2], turbines, args.max_distance)
+    print(f"   Strahlen:   {len(rays[0]):,} à {args.samples} Stützpunkte"
+          + (f" (≤ {args.max_distance:g} m)" if args.max_distance else ""))
+    print()
+
+    store = TileStore(tiles_dir)
+    start = time.perf_counter()
+    try:
+        counts = run_batches(store, observers, turbines, rays, writer, args.samples, args.batch_size)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("=" * 60)
+    print(f"📊 {writer.rows:,} Strahlen in {elapsed:.1f}s → {writer.rows / elapsed if elapsed else 0:,.0f} Strahlen/s")
+    print(f"   Kacheln geladen: {store.loads}")
+    print("   " + ", ".join(f"{status}: {count:,}" for status, count in sorted(counts.items())))
+    print(f"💾 {args.output}")
+    print("\n✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark + Regressions-Check für laz_to_binary.py
+Arbeitet auf synthetischen Punktwolken (keine LAZ-Datei nötig)
+
+Vergleicht die vektorisierte Rasterung mit der ursprünglichen
+Punkt-für-Punkt-Schleife (bitgenau), die Partitionierung mit den
+früheren Masken pro Kachel und misst die Laufzeiten der Rasterung
+und aller Strategien zur Lückenfüllung.
+
+Usage:
+    python3 benchmark_converter.py                 # Standard (200k Punkte)
+    python3 benchmark_converter.py -n 2000000      # Größere Punktwolke
+"""
+
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install laspy numpy")
+    sys.exit(1)
+
+from laz_to_binary import partition_points, rasterize_dsm, fill_gaps, FILL_STRATEGIES
+
+
+def rasterize_dsm_reference(x, y, z, tile_x, tile_y, tile_size=1000, resolution=1.0):
+    """Ursprüngliche Schleifen-Implementierung (Referenz für den Regressions-Check)"""
+    grid_size = int(tile_size / resolution)
+    dsm = np.zeros((grid_size, grid_size), dtype=np.float32)
+
+    for px, py, pz in np.column_stack([x, y, z]):
+        grid_x = int((px - tile_x) / resolution)
+        grid_y = int((py - tile_y) / resolution)
+        grid_x = max(0, min(grid_size - 1, grid_x))
+        grid_y = max(0, min(grid_size - 1, grid_y))
+        dsm[grid_y, grid_x] = max(dsm[grid_y, grid_x], pz)
+
+    return dsm
+
+
+def partition_reference(x, y, origin_x, origin_y, tiles_x, tiles_y, tile_size):
+    """Ursprüngliche Boolean-Maske pro Kachel (Referenz für den Regressions-Check)"""
+    groups = []
+    for ix in range(tiles_x):
+        for iy in range(tiles_y):
+            tile_x = origin_x + ix * tile_size
+            tile_y = origin_y + iy * tile_size
+            mask = (
+                (x >= tile_x) & (x < tile_x + tile_size) &
+                (y >= tile_y) & (y < tile_y + tile_size)
+            )
+            groups.append(np.flatnonzero(mask))
+    return groups
+
+
+def synthetic_point_cloud(n_points, tile_x, tile_y, tile_size, seed=42):
+    """
+    Erzeugt eine synthetische Punktwolke über einer Kachel
+
+    Enthält bewusst Sonderfälle: Punkte exakt auf den Kachelgrenzen,
+    negative Höhen, Duplikate pro Zelle und leere Bereiche (Löcher).
+    """
+    rng = np.random.default_rng(seed)
+
+    x = rng.uniform(tile_x, tile_x + tile_size, n_points)
+    y = rng.uniform(tile_y, tile_y + tile_size, n_points)
+    # Gelände + Vegetation/Gebäude-Ausreißer, teils negativ
+    z = 60.0 + 5.0 * np.sin(x / 50.0) + rng.gamma(1.5, 3.0, n_points) - 2.0
+    z[rng.random(n_points) < 0.001] *= -1
+
+    # Randpunkte (werden in die letzte Zeile/Spalte geclampt)
+    x[:10] = tile_x + tile_size - 1e-9
+    y[10:20] = tile_y
+
+    # Loch (z.B. Gewässer) ausschneiden
+    hole = ((x - tile_x - tile_size * 0.3) ** 2 + (y - tile_y - tile_size * 0.6) ** 2) < (tile_size * 0.05) ** 2
+    return x[~hole], y[~hole], z[~hole]
+
+
+def timed(func, *args, **kwargs):
+    """Führt func aus und liefert (Ergebnis, Sekunden)"""
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark + regression check for laz_to_binary.py",
+        epilog="Beispiel: python3 benchmark_converter.py -n 500000"
+    )
+    parser.add_argument("-n", "--points", type=int, default=200_000, help="Number of synthetic points (default: 200000)")
+    parser.add_argument("-s", "--size", type=int, default=1000, help="Tile size in meters (default: 1000)")
+    parser.add_argument("-r", "--resolution", type=float, default=1.0, help="Grid resolution in meters (default: 1.0)")
+    parser.add_argument("--split", type=int, default=8, help="Sub-tiles per axis for the partition check (default: 8)")
+    parser.add_argument("--skip-reference", action="store_true", help="Skip the slow reference loop (timing only)")
+
+    args = parser.parse_args()
+
+    tile_x, tile_y = 459000, 5722000
+    x, y, z = synthetic_point_cloud(args.points, tile_x, tile_y, args.size)
+
+    print("⏱️  Converter Benchmark")
+    print("=" * 60)
+    print(f"   Punkte: {len(z):,}")
+    print(f"   Grid: {int(args.size / args.resolution)} × {int(args.size / args.resolution)}")
+    print()
+
+    failed = False
+
+    dsm, t_vec = timed(rasterize_dsm, x, y, z, tile_x, tile_y, args.size, args.resolution)
+    print(f"   Raster (vektorisiert): {t_vec:8.3f}s")
+
+    if not args.skip_reference:
+        dsm_ref, t_ref = timed(rasterize_dsm_reference, x, y, z, tile_x, tile_y, args.size, args.resolution)
+        identical = dsm.tobytes() == dsm_ref.tobytes()
+        print(f"   Raster (Referenz):     {t_ref:8.3f}s  → Speedup {t_ref / max(t_vec, 1e-9):.0f}×")
+        print(f"   Bitgenau identisch:    {'✅ ja' if identical else '❌ NEIN'}")
+        failed |= not identical
+
+    # Partitionierung: Kachel in split × split Teilkacheln zerlegen
+    sub_size = args.size // args.split
+    (order, offsets), t_part = timed(partition_points, x, y, tile_x, tile_y, args.split, args.split, sub_size)
+    print()
+    label = f"Partition ({args.split}×{args.split}):"
+    print(f"   {label:<23}{t_part:8.3f}s")
+
+    if not args.skip_reference:
+        groups, t_mask = timed(partition_reference, x, y, tile_x, tile_y, args.split, args.split, sub_size)
+        identical = all(
+            np.array_equal(np.sort(order[offsets[k]:offsets[k + 1]]), group)
+            for k, group in enumerate(groups)
+        )
+        print(f"   Partition (Masken):    {t_mask:8.3f}s  → Speedup {t_mask / max(t_part, 1e-9):.0f}×")
+        print(f"   Gleiche Zuordnung:     {'✅ ja' if identical else '❌ NEIN'}")
+        failed |= not identical
+
+    print()
+    for strategy in FILL_STRATEGIES:
+        filled, t_fill = timed(fill_gaps, dsm.copy(), strategy)
+        remaining = int(np.count_nonzero(filled <= 0))
+        print(f"   Lücken ({strategy:<9}):    {t_fill:8.3f}s  → {remaining:,} Zellen leer")
+
+    print()
+    if failed:
+        print("❌ Regressions-Check fehlgeschlagen!")
+        sys.exit(1)
+    print("✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Benchmark + Round-Trip-Check für das Tile-Format v2 (tile_format.py)
+
+Vergleicht Dateigröße und Dekodier-Zeit von tile_X_Y.bin.gz (v1) mit allen
+v2-Varianten (Prädiktor × Codec) auf echten Tiles und prüft, dass jede
+Variante bitgenau zurück dekodiert.
+
+Usage:
+    python3 benchmark_tile_format.py                      # tiles_output/ aus config.json
+    python3 benchmark_tile_format.py ../tiles_output -n 20
+    python3 benchmark_tile_format.py --synthetic 5        # ohne echte Tiles
+"""
+
+import sys
+import gzip
+import math
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install numpy")
+    sys.exit(1)
+
+from pipeline_config import load_config, config_path
+from tile_format import encode_tile, decode_tile, read_header, PREDICTORS, zstandard, brotli
+
+
+def available_codecs():
+    """Codecs, deren Bibliothek installiert ist"""
+    codecs = ['deflate']
+    if zstandard is not None:
+        codecs.append('zstd')
+    if brotli is not None:
+        codecs.append('brotli')
+    return codecs
+
+
+def load_v1_tile(path):
+    """
+    Liest ein v1-Tile (.bin oder .bin.gz)
+
+    Returns:
+        (grid, gz_bytes): Uint16-Grid und der GZIP-Inhalt (vorhandene Datei
+        oder neu komprimiert, falls nur .bin existiert)
+    """
+    path = Path(path)
+    if path.suffix == '.gz':
+        gz_bytes = path.read_bytes()
+        raw = gzip.decompress(gz_bytes)
+    else:
+        raw = path.read_bytes()
+        gz_file = path.with_name(path.name + ".gz")
+        gz_bytes = gz_file.read_bytes() if gz_file.exists() else gzip.compress(raw, compresslevel=9, mtime=0)
+
+    side = math.isqrt(len(raw) // 2)
+    grid = np.frombuffer(raw, dtype='<u2').reshape(side, side)
+    return grid, gz_bytes
+
+
+def find_tiles(inputs):
+    """Sammelt v1-Tiles (bevorzugt .bin.gz, sonst .bin) aus Verzeichnissen/Dateien"""
+    tiles = {}
+    for item in inputs:
+        path = Path(item)
+        candidates = sorted(path.glob("tile_*.bin*")) if path.is_dir() else [path]
+        for candidate in candidates:
+            if candidate.name.endswith(".bin.gz") or candidate.name.endswith(".bin"):
+                key = candidate.name.split(".")[0]
+                if key not in tiles or candidate.suffix == '.gz':
+                    tiles[key] = candidate
+    return [tiles[key] for key in sorted(tiles)]
+
+
+def synthetic_tiles(count, size=1000, seed=42):
+    """
+    Erzeugt DSM-ähnliche Tiles: glattes Gelände mit cm-Rauschen plus
+    Gebäude/Wald-Blöcke (Sprünge von mehreren Metern)
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size]
+
+    for i in range(count):
+        phase = rng.uniform(0, 2 * np.pi, 2)
+        heights = (6000 + 300 * np.sin(xx / 120 + phase[0]) + 200 * np.cos(yy / 90 + phase[1])
+                   + rng.normal(0, 3, (size, size)))
+        for _ in range(size // 3):
+            bx, by = rng.integers(0, size - 12, 2)
+            heights[by:by + rng.integers(3, 12), bx:bx + rng.integers(3, 12)] += rng.integers(300, 2000)
+
+        grid = heights.astype(np.uint16)
+        yield f"synthetic_{i}", grid, gzip.compress(grid.tobytes(), compresslevel=9, mtime=0)
+
+
+def check_edge_cases():
+    """
+    Round-Trip für Grenzfälle: volle Uint16-Spanne (Überlauf im Prädiktor),
+    nodata-Sprünge, nicht-quadratische Grids und Header-Felder
+
+    Returns:
+        Liste der fehlgeschlagenen Fälle
+    """
+    rng = np.random.default_rng(0)
+    extreme = rng.integers(0, 65536, (37, 53), dtype=np.uint16)
+    holes = np.full((64, 64), 6000, dtype=np.uint16)
+    holes[10:20, 5:50] = 0
+    holes[0, :] = 65535
+
+    failures = []
+    for case, grid in (('Uint16-Spanne', extreme), ('nodata-Löcher', holes)):
+        for predictor in PREDICTORS:
+            encoded = encode_tile(grid, 459000, 5722000, 0.5, predictor)
+            decoded, header = decode_tile(encoded)
+            if not np.array_equal(decoded, grid):
+                failures.append(f"{case} ({predictor})")
+            if (header['origin_x'], header['origin_y'], header['resolution'],
+                    header['width'], header['height']) != (459000, 5722000, 0.5, grid.shape[1], grid.shape[0]):
+                failures.append(f"{case} Header ({predictor})")
+
+    corrupted = bytearray(encode_tile(holes, 0, 0, codec='raw'))
+    corrupted[-1] ^= 0xFF
+    try:
+        decode_tile(bytes(corrupted))
+        failures.append("CRC erkennt Beschädigung nicht")
+    except ValueError:
+        pass
+
+    if read_header(encode_tile(holes, 0, 0))['version'] != 2:
+        failures.append("Version im Header")
+    return failures
+
+
+def timed(func, *args, repeat=3):
+    """Führt func mehrfach aus und liefert (Ergebnis, beste Zeit in Sekunden)"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+
+def decode_v1(gz_bytes):
+    """Dekodiert ein v1-Tile wie der Client (GZIP → Uint16)"""
+    return np.frombuffer(gzip.decompress(gz_bytes), dtype='<u2')
+
+
+def main():
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark + round-trip check: .bin.gz (v1) vs. delta-encoded v2 tiles",
+        epilog="Beispiel: python3 benchmark_tile_format.py ../tiles_output -n 20"
+    )
+    parser.add_argument("inputs", nargs="*", help="Tile directories or files (default: paths.tiles_output)")
+    parser.add_argument("-n", "--max-tiles", type=int, default=10, help="Maximum number of tiles (default: 10)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="Benchmark N synthetic tiles instead of real ones")
+
+    args = parser.parse_args()
+
+    if args.synthetic:
+        samples = list(synthetic_tiles(args.synthetic))
+    else:
+        inputs = args.inputs or [str(config_path(config, 'tiles_output', '../tiles_output'))]
+        paths = find_tiles(inputs)[:args.max_tiles]
+        if not paths:
+            print("❌ Keine Tiles gefunden! (oder --synthetic N verwenden)")
+            sys.exit(1)
+        samples = [(path.name.split(".")[0], *load_v1_tile(path)) for path in paths]
+
+    variants = [(predictor, codec) for predictor in PREDICTORS for codec in available_codecs()]
+
+    print("⏱️  Tile-Format Benchmark (v1 .bin.gz vs. v2)")
+    print("=" * 60)
+    print(f"   Tiles: {len(samples)}")
+    print(f"   Codecs: {', '.join(available_codecs())}")
+    print()
+
+    totals = {'v1 gz': [0, 0.0]}
+    totals.update({f"v2 {p}/{c}": [0, 0.0] for p, c in variants})
+    raw_total = 0
+    failed = False
+
+    for name, grid, gz_bytes in samples:
+        raw_total += grid.nbytes
+        decoded, t_decode = timed(decode_v1, gz_bytes)
+        totals['v1 gz'][0] += len(gz_bytes)
+        totals['v1 gz'][1] += t_decode
+
+        for predictor, codec in variants:
+            encoded = encode_tile(grid, 0, 0, 1.0, predictor, codec)
+            (decoded, _), t_decode = timed(decode_tile, encoded)
+            if not np.array_equal(decoded, grid):
+                print(f"   ❌ {name}: Round-Trip {predictor}/{codec} fehlerhaft!")
+                failed = True
+            totals[f"v2 {predictor}/{codec}"][0] += len(encoded)
+            totals[f"v2 {predictor}/{codec}"][1] += t_decode
+
+    gz_size = totals['v1 gz'][0]
+    print(f"   {'Format':<20}{'Größe':>10}{'vs. gz':>9}{'Dekodieren':>13}")
+    for label, (size, seconds) in totals.items():
+        print(f"   {label:<20}{size / 1024 / len(samples):>7.0f} KB{size / gz_size:>8.0%}"
+              f"{seconds * 1000 / len(samples):>10.1f} ms")
+    print(f"   (Roh: {raw_total / 1024 / len(samples):.0f} KB pro Tile, Werte = Mittel pro Tile)")
+
+    best = min((label for label in totals if label.startswith("v2 ") and label.endswith("/deflate")),
+               key=lambda label: totals[label][0])
+    print()
+    print(f"   Bester v2 mit deflate: {best} ({totals[best][0] / gz_size - 1:+.0%} gegenüber .bin.gz)")
+
+    failures = check_edge_cases()
+    for failure in failures:
+        print(f"   ❌ Grenzfall fehlerhaft: {failure}")
+    failed |= bool(failures)
+
+    print()
+    if failed:
+        print("❌ Round-Trip-Check fehlgeschlagen!")
+        sys.exit(1)
+    print("✅ Alle Varianten und Grenzfälle bitgenau dekodiert")
+    print("✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+LAZ → Binary Height Grid Batch Converter (parallel)
+
+Konvertiert viele LAZ-Dateien gleichzeitig über einen Prozess-Pool.
+Python-Nachfolger von convert_all_laz.sh: ein Interpreter pro Worker statt
+pro Datei, Anzahl Worker aus config.json (convert.parallel_workers).
+
+Usage:
+    python3 convert_all_laz.py                          # laz_downloads/ aus config.json
+    python3 convert_all_laz.py ../laz_downloads -j 8    # Verzeichnis, 8 Worker
+    python3 convert_all_laz.py "../laz_downloads/als_33459-*.laz"
+"""
+
+import io
+import os
+import sys
+import glob
+import time
+import queue
+import threading
+import traceback
+import contextlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pipeline_config import load_config, config_path
+from progress_events import ProgressLog, default_progress_log
+from tile_archive import sync_archive, DEFAULT_ARCHIVE_NAME
+from laz_to_binary import (laz_to_height_grid, load_tile_list, peak_rss_mb, conversion_params,
+                           plan_incremental, check_tile_formats, DEFAULT_FILL_ITERATIONS, FILL_STRATEGIES,
+                           DEFAULT_TILE_FORMATS, DEFAULT_GZIP_LEVEL, DEFAULT_OVERVIEW_LEVELS, DEFAULT_HALO)
+
+LAZ_PATTERNS = ("*.laz", "*.las", "*.zip")
+
+
+def find_laz_files(inputs):
+    """
+    Sammelt LAZ-Dateien aus Verzeichnissen, Glob-Mustern oder Einzeldateien
+
+    Args:
+        inputs: Liste von Pfaden/Mustern
+
+    Returns:
+        Sortierte Liste eindeutiger Paths
+    """
+    files = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            for pattern in LAZ_PATTERNS:
+                files.update(path.glob(pattern))
+        elif path.is_file():
+            files.add(path)
+        else:
+            files.update(Path(p) for p in glob.glob(item))
+    return sorted(files)
+
+
+def convert_one(laz_file, output_dir, options):
+    """
+    Konvertiert eine LAZ-Datei (läuft im Worker-Prozess)
+
+    Die Ausgabe von laz_to_height_grid wird abgefangen, damit sich die Logs
+    paralleler Worker nicht vermischen. Fehler werden nicht geworfen, sondern
+    im Ergebnis zurückgegeben, damit der Batch weiterläuft.
+
+    Returns:
+        Dict mit file, bytes (Eingabegröße), tiles, seconds, peak_mb, error, log
+    """
+    log = io.StringIO()
+    start = time.perf_counter()
+    result = {'file': laz_file.name, 'bytes': laz_file.stat().st_size, 'tiles': 0, 'error': None}
+
+    try:
+        with contextlib.redirect_stdout(log):
+            result['tiles'] = laz_to_height_grid(laz_file, output_dir, **options)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        log.write(traceback.format_exc())
+
+    result['seconds'] = time.perf_counter() - start
+    result['peak_mb'] = peak_rss_mb()
+    result['log'] = log.getvalue()
+    return result
+
+
+def failed_result(laz_file, error, size=0):
+    """Ergebnis einer Datei, die ohne Konvertierung gescheitert ist (siehe convert_one)"""
+    return {'file': laz_file.name, 'bytes': size, 'tiles': 0, 'seconds': 0.0, 'peak_mb': None,
+            'error': error, 'log': ''}
+
+
+def collect_result(future, laz_file):
+    """Ergebnis eines Worker-Futures (auch wenn der Prozess abgestürzt ist)"""
+    try:
+        return future.result()
+    except Exception as e:
+        # Worker-Prozess abgestürzt (z.B. OOM-Kill)
+        return failed_result(laz_file, f"{type(e).__name__}: {e}")
+
+
+def unreadable_results(errors):
+    """Ergebnisse für Dateien, die schon beim Planen nicht lesbar waren (plan_incremental)"""
+    results = []
+    for laz_file, error in sorted(errors.items()):
+        try:
+            size = laz_file.stat().st_size
+        except OSError:
+            size = 0
+        results.append(failed_result(laz_file, f"Nicht lesbar – {error}", size))
+    return results
+
+
+def record_result(events, result):
+    """Fortschritts-Event für eine konvertierte Datei"""
+    events.item(result['file'], 'failed' if result['error'] else 'ok', result['seconds'], result['bytes'],
+                tiles=result['tiles'])
+
+
+def print_result(result, done, total, verbose=False, label=""):
+    """Eine Zeile pro konvertierter Datei (Log bei Fehler oder --verbose)"""
+    prefix = f"{label}[{done:>{len(str(total))}}/{total}]"
+    if result['error']:
+        print(f"{prefix} ❌ {result['file']}: {result['error']}", flush=True)
+    else:
+        print(f"{prefix} ✅ {result['file']}: {result['tiles']} Tiles in {result['seconds']:.1f}s", flush=True)
+    if verbose or result['error']:
+        for line in result['log'].rstrip().splitlines():
+            print(f"           {line}")
+
+
+def convert_batch(pool, laz_files, output_dir, options, plan, fingerprints, verbose=False, label="", events=None):
+    """
+    Konvertiert einen vorab geplanten Batch im Prozess-Pool
+
+    events: progress_events.ProgressLog (Stufe "convert"), ein Event pro Datei
+
+    Returns:
+        Liste der Ergebnisse (siehe convert_one)
+    """
+    futures = {
+        pool.submit(convert_one, laz_file, output_dir,
+                    dict(options, planned=(plan[laz_file], fingerprints[laz_file]))): laz_file
+        for laz_file in laz_files
+    }
+    events = events or ProgressLog(None, 'convert')
+    results = []
+    for done, future in enumerate(as_completed(futures), 1):
+        result = collect_result(future, futures[future])
+        results.append(result)
+        record_result(events, result)
+        print_result(result, done, len(laz_files), verbose, label)
+    return results
+
+
+def print_archive_sync(archive, output_dir, tile_size, resolution):
+    """Gleicht das Tile-Archiv mit allen .bin.gz-Tiles im Output ab (auch übersprungenen)"""
+    appended, total = sync_archive(archive, output_dir, 'gz', int(tile_size / resolution), resolution)
+    print(f"📦 Archiv: {appended} Tiles aktualisiert ({total} gesamt) → {archive}")
+
+
+def download_and_convert(pool, archives, laz_dir, output_dir, options, params, tile_filter,
+                         download_config, force=False, verbose=False, events=None, download_events=None):
+    """
+    Producer/Consumer: Download und Konvertierung überlappen
+
+    Ein Thread lädt die ZIP-Archive (download_laz.download_all); jedes fertige
+    Archiv landet in einer Queue und geht sofort in den Prozess-Pool, während
+    die restlichen Downloads weiterlaufen. Bereits vorhandene Archive werden
+    vorab gemeinsam geplant (geänderte Quellen setzen Tiles zurück, bevor ein
+    Worker startet), neue Archive einzeln bei Ankunft. Zum Schluss prüft ein
+    Nachlauf alle Archive erneut, damit Tiles mit mehreren Quellen vollständig
+    zusammengeführt sind.
+
+    events/download_events: progress_events.ProgressLog für Konvertierung
+    und Download (ein Event pro Archiv, aktuelle Archive als "skipped").
+
+    Returns:
+        (results, download_results, download_stats)
+    """
+    from download_laz import download_all, BASE_URL, DEFAULT_CONCURRENCY, DEFAULT_RATE_LIMIT_DELAY, \
+        DEFAULT_RETRY_ATTEMPTS, DEFAULT_RETRY_DELAY
+
+    events = events or ProgressLog(None, 'convert')
+    events.start(len(archives))
+
+    present = [laz_dir / name for name in archives if (laz_dir / name).exists()]
+    plan, fingerprints, errors = plan_incremental(present, output_dir, params, tile_filter, force)
+    handled = set(present)
+    unreadable = set(errors)
+
+    arrived = queue.Queue()
+    download = {}
+
+    def run_download():
+        try:
+            download['results'], download['stats'] = download_all(
+                archives, laz_dir, download_config.get('base_url', BASE_URL).rstrip('/'),
+                download_config.get('concurrency', DEFAULT_CONCURRENCY),
+                download_config.get('rate_limit_delay', DEFAULT_RATE_LIMIT_DELAY),
+                download_config.get('retry_attempts', DEFAULT_RETRY_ATTEMPTS),
+                download_config.get('retry_delay', DEFAULT_RETRY_DELAY),
+                on_complete=lambda result, path: arrived.put(path), live=False, label="⬇️  ",
+                events=download_events)
+        finally:
+            arrived.put(None)
+
+    downloader = threading.Thread(target=run_download, daemon=True)
+    downloader.start()
+
+    futures = {}
+    results = []
+
+    def submit(laz_file, laz_plan, laz_fingerprints):
+        if laz_plan[laz_file]:
+            futures[pool.submit(convert_one, laz_file, output_dir,
+                                dict(options, planned=(laz_plan[laz_file], laz_fingerprints[laz_file])))] = laz_file
+        else:
+            events.item(laz_file.name, 'skipped')
+
+    def record(result):
+        results.append(result)
+        record_result(events, result)
+        print_result(result, len(results), len(archives), verbose, label="🔲 ")
+
+    def report(finished):
+        for future in finished:
+            record(collect_result(future, futures.pop(future)))
+
+    # Nicht lesbare Archive als fehlgeschlagen melden, den Rest weiter planen
+    for result in unreadable_results(errors):
+        record(result)
+    for laz_file in present:
+        if laz_file not in unreadable:
+            submit(laz_file, plan, fingerprints)
+
+    # Consumer: neue Archive einplanen, sobald sie vollständig sind
+    while True:
+        try:
+            laz_file = arrived.get(timeout=0.2)
+        except queue.Empty:
+            report([future for future in list(futures) if future.done()])
+            continue
+        if laz_file is None:
+            break
+        if laz_file not in handled:
+            handled.add(laz_file)
+            file_plan, file_fingerprints, file_errors = plan_incremental([laz_file], output_dir, params,
+                                                                         tile_filter)
+            if file_errors:
+                unreadable.add(laz_file)
+                record(unreadable_results(file_errors)[0])
+            else:
+                submit(laz_file, file_plan, file_fingerprints)
+        report([future for future in list(futures) if future.done()])
+
+    report(as_completed(list(futures)))
+    downloader.join()
+
+    # Nachlauf: Tiles, deren Quellen erst nachträglich vollständig wurden
+    complete = sorted(path for path in handled - unreadable if path.exists())
+    plan, fingerprints, errors = plan_incremental(complete, output_dir, params, tile_filter)
+    for result in unreadable_results(errors):
+        record(result)
+    stale = [laz_file for laz_file in complete if plan.get(laz_file)]
+    if stale:
+        print(f"\n🔄 Nachlauf: {len(stale)} Dateien")
+        events.start(len(stale), rerun=True)
+        results += convert_batch(pool, stale, output_dir, options, plan, fingerprints, verbose, label="🔲 ",
+                                 events=events)
+
+    return results, download.get('results', []), download.get('stats')
+
+
+def main():
+    import argparse
+
+    config = load_config()
+    convert_config = config.get('convert', {})
+
+    parser = argparse.ArgumentParser(
+        description="Parallel LAZ → Binary Height Grid batch converter",
+        epilog="Beispiel: python3 convert_all_laz.py ../laz_downloads -j 8"
+    )
+    parser.add_argument("inputs", nargs="*",
+                        help="LAZ/ZIP directories, glob patterns or files (default: paths.laz_downloads)")
+    parser.add_argument("-o", "--output", help="Output directory (default: paths.tiles_output)")
+    parser.add_argument("-t", "--tile-list", help="Tile list file (default: paths.tile_list)")
+    parser.add_argument("--all-tiles", action="store_true", help="Ignore the tile list and convert every tile")
+    parser.add_argument("--download", action="store_true",
+                        help="Download the archives of the tile list and convert each one as soon as it arrives")
+    parser.add_argument("--base-url", help="Download server for --download (default: download.base_url)")
+    parser.add_argument("--progress-log", default=str(default_progress_log()),
+                        help="JSONL progress events for monitor.py (default: paths.progress_log, '' to disable)")
+    parser.add_argument("-j", "--workers", type=int, default=convert_config.get('parallel_workers', os.cpu_count()),
+                        help="Parallel worker processes (default: convert.parallel_workers)")
+    parser.add_argument("-s", "--size", type=int, default=convert_config.get('tile_size', 1000),
+                        help="Tile size in meters (default: convert.tile_size)")
+    parser.add_argument("-r", "--resolution", type=float, default=convert_config.get('resolution', 1.0),
+                        help="Grid resolution in meters (default: convert.resolution)")
+    parser.add_argument("--fill", choices=FILL_STRATEGIES, default="ring", help="Gap fill strategy (default: ring)")
+    parser.add_argument("--chunk-size", type=int, help="Stream each LAZ file in chunks of N points")
+    parser.add_argument("--no-merge", action="store_true",
+                        help="Overwrite tiles instead of merging data from neighbouring LAZ files")
+    parser.add_argument("--force", action="store_true", help="Reconvert everything, ignoring the manifest")
+    parser.add_argument("-f", "--formats", default=",".join(DEFAULT_TILE_FORMATS),
+                        help="Comma-separated output formats: bin, gz, zst, br, v2 (default: bin,gz)")
+    parser.add_argument("--gzip-level", type=int, choices=range(1, 10), default=DEFAULT_GZIP_LEVEL, metavar="1-9",
+                        help=f"GZIP compression level (default: {DEFAULT_GZIP_LEVEL})")
+    parser.add_argument("--overviews", type=int, default=convert_config.get('overview_levels', DEFAULT_OVERVIEW_LEVELS),
+                        metavar="N", help="Max-pooled overview levels, 0 = none (default: convert.overview_levels)")
+    parser.add_argument("--halo", type=int, nargs="?", const=DEFAULT_HALO, default=convert_config.get('halo', 0),
+                        metavar="N", help=f"Also write halo tiles with an N-cell border from the neighbours "
+                                          f"(N default: {DEFAULT_HALO}, default: convert.halo, 0 = off)")
+    parser.add_argument("--archive", nargs="?", const="", metavar="FILE",
+                        help=f"After converting, sync all .bin.gz tiles of the output directory (including "
+                             f"up-to-date ones) into a single-file tile archive "
+                             f"(default FILE: <output>/{DEFAULT_ARCHIVE_NAME}, needs format gz)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print the full converter log of every file")
+
+    args = parser.parse_args()
+
+    inputs = args.inputs or [str(config_path(config, 'laz_downloads', '../laz_downloads'))]
+    output_dir = Path(args.output) if args.output else config_path(config, 'tiles_output', '../tiles_output')
+    tile_list = None if args.all_tiles else (args.tile_list or config_path(config, 'tile_list'))
+
+    formats = tuple(fmt.strip() for fmt in args.formats.split(",") if fmt.strip())
+    try:
+        check_tile_formats(formats)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if args.archive is not None and 'gz' not in formats:
+        print("ERROR: --archive braucht das Format gz")
+        sys.exit(1)
+    archive = None if args.archive is None else (Path(args.archive) if args.archive
+                                                 else output_dir / DEFAULT_ARCHIVE_NAME)
+
+    print("🌍 LAZ → Binary Height Grid Batch Converter")
+    print("=" * 60)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tile_filter = None
+    if tile_list and Path(tile_list).exists():
+        tile_filter = load_tile_list(tile_list)
+        print(f"📋 Tile-Liste: {tile_list} ({len(tile_filter)} Tiles)")
+
+    params = conversion_params(args.size, args.resolution, args.fill, DEFAULT_FILL_ITERATIONS, formats,
+                               args.overviews, args.halo)
+    options = {
+        'tile_size': args.size,
+        'resolution': args.resolution,
+        'tile_filter': tile_filter,
+        'fill_strategy': args.fill,
+        'chunk_size': args.chunk_size,
+        'merge': not args.no_merge,
+        'incremental': True,
+        'formats': formats,
+        'gzip_level': args.gzip_level,
+        'overview_levels': args.overviews,
+        'halo': args.halo,
+    }
+
+    start = time.perf_counter()
+    download_results, download_stats = [], None
+    events = ProgressLog(args.progress_log or None, 'convert')
+
+    if args.download:
+        from download_laz import tile_to_laz_filename
+
+        if tile_filter is None:
+            print("❌ --download braucht eine Tile-Liste (--tile-list)")
+            sys.exit(1)
+        laz_dir = Path(inputs[0])
+        laz_dir.mkdir(parents=True, exist_ok=True)
+        archives = sorted({tile_to_laz_filename(tile) for tile in tile_filter} - {None})
+
+        workers = max(1, args.workers)
+        print(f"📦 Download + Konvertierung: {len(archives)} Archive → {laz_dir}")
+        print(f"📁 Output: {output_dir}")
+        print(f"⚙️  Worker: {workers}")
+        print()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results, download_results, download_stats = download_and_convert(
+                pool, archives, laz_dir, output_dir, options, params, tile_filter,
+                dict(config.get('download', {}), **({'base_url': args.base_url} if args.base_url else {})),
+                args.force, args.verbose, events, ProgressLog(args.progress_log or None, 'download'))
+    else:
+        laz_files = find_laz_files(inputs)
+        print(f"📦 Gefunden: {len(laz_files)} LAZ-Dateien")
+        if not laz_files:
+            print("❌ Keine LAZ-Dateien gefunden!")
+            sys.exit(1)
+
+        # Inkrementell: Plan für den ganzen Batch vorab (setzt geänderte Tiles
+        # zurück, bevor Worker parallel in dieselben Tiles mergen)
+        plan, fingerprints, errors = plan_incremental(laz_files, output_dir, params, tile_filter, args.force)
+        up_to_date = [laz_file for laz_file in laz_files if laz_file in plan and not plan[laz_file]]
+        laz_files = [laz_file for laz_file in laz_files if plan.get(laz_file)]
+        print(f"🔄 Inkrementell: {len(laz_files)} Dateien mit veralteten/neuen Tiles, "
+              f"{len(up_to_date)} aktuell (übersprungen)"
+              + (f", {len(errors)} nicht lesbar" if errors else ""))
+
+        events.start(len(laz_files) + len(up_to_date) + len(errors))
+        for laz_file in up_to_date:
+            events.item(laz_file.name, 'skipped')
+
+        # Nicht lesbare Dateien als fehlgeschlagen melden, der Rest läuft weiter
+        results = unreadable_results(errors)
+        for done, result in enumerate(results, 1):
+            record_result(events, result)
+            print_result(result, done, len(results), label="📋 ")
+
+        if not laz_files and not results:
+            events.end()
+            print("\n✨ Alle Tiles aktuell – nichts zu tun")
+            if archive:
+                print_archive_sync(archive, output_dir, args.size, args.resolution)
+            return
+
+        if laz_files:
+            workers = max(1, min(args.workers, len(laz_files)))
+            print(f"📁 Output: {output_dir}")
+            print(f"⚙️  Worker: {workers}")
+            print()
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results += convert_batch(pool, laz_files, output_dir, options, plan, fingerprints, args.verbose,
+                                         events=events)
+
+    elapsed = time.perf_counter() - start
+    events.end(tiles=sum(r['tiles'] for r in results))
+    failed = [r for r in results if r['error']]
+    succeeded = len(results) - len(failed)
+    tiles = sum(r['tiles'] for r in results)
+    cpu_seconds = sum(r['seconds'] for r in results)
+    peaks = [r['peak_mb'] for r in results if r['peak_mb'] is not None]
+
+    print()
+    print("=" * 60)
+    print("✨ Batch-Konvertierung abgeschlossen!")
+    print()
+    print(f"   Gesamt:         {len(results)} Dateien")
+    print(f"   Erfolgreich:    {succeeded}")
+    print(f"   Fehlgeschlagen: {len(failed)}")
+    print(f"   Tiles:          {tiles}")
+    print(f"   Dauer:          {elapsed:.1f}s (Summe Einzelzeiten: {cpu_seconds:.1f}s, "
+          f"Speedup {cpu_seconds / max(elapsed, 1e-9):.1f}×)")
+    if peaks:
+        print(f"   Peak RSS:       {max(peaks):.0f} MB pro Worker")
+    if download_stats:
+        missing = [r['file'] for r in download_results if r['status'] in ('missing', 'failed')]
+        print(f"   Download:       {download_stats['bytes'] / (1024 * 1024):.1f} MB, "
+              f"{download_stats['mb_per_s']:.1f} MB/s, {len(missing)} fehlgeschlagen")
+        for name in missing[:10]:
+            print(f"   - {name}")
+
+    if failed:
+        print(f"\n⚠️  {len(failed)} Dateien fehlgeschlagen:")
+        for r in failed[:10]:
+            print(f"   - {r['file']}: {r['error']}")
+        if len(failed) > 10:
+            print(f"   ... und {len(failed) - 10} weitere")
+
+    print(f"\n📁 Tiles gespeichert in: {output_dir}")
+    if archive:
+        print_archive_sync(archive, output_dir, args.size, args.resolution)
+
+    # Nur ein kompletter Fehlschlag bricht die Pipeline ab (wie convert_all_laz.sh)
+    if results and succeeded == 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 #!/bin/bash
 # Konvertiert alle LAZ-Dateien zu Binary Height Grid Tiles
+# Sequentielle Variante (ein Python-Prozess pro Datei).
+# Parallel und schneller: python3 convert_all_laz.py (Worker aus config.json)
 
 SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 PROJECT_DIR="$(dirname "$SCRIPT_DIR")"
@@ -3,20 +3,42 @@
 Brandenburg LAZ Downloader
 Lädt LAZ-Dateien basierend auf Tile-Liste vom Geoportal
 
+Mehrere Downloads laufen parallel (Thread-Pool). Jeder Worker hält eine
+Keep-Alive-Verbindung zum Server offen und verwendet sie für alle seine
+Dateien weiter. Parallelität und Mindestabstand zwischen Requests kommen
+aus config.json (download.concurrency, download.rate_limit_delay).
+
 Usage:
     python3 download_laz.py windrad-tiles.txt
+    python3 download_laz.py windrad-tiles.txt --base-url http://localhost:8001 -j 8
 """
 
+import os
 import sys
-import urllib.request
-import urllib.error
-from pathlib import Path
 import time
+import zipfile
+import threading
+import http.client
+import urllib.parse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pipeline_config import load_config
+from progress_events import ProgressLog, default_progress_log
 
 # Brandenburg Geoportal Base URL
 # ALS = Airborne Laser Scanning (Punktwolken-Daten)
 BASE_URL = "https://data.geobasis-bb.de/geobasis/daten/als/laz"
 
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_LIMIT_DELAY = 0.5
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 5
+CHUNK_SIZE = 1024 * 1024
+TIMEOUT = 60
+MAX_REDIRECTS = 5
+USER_AGENT = "windrad-laz-downloader/2.0"
+
 def load_tile_list(tile_list_file):
     """
     Lädt Tile-Liste aus Textdatei
@@ -54,60 +76,396 @@ def tile_to_laz_filename(tile_name):
 
     return laz_filename
 
-def download_laz_file(laz_filename, output_dir, base_url):
+class DownloadError(Exception):
+    """Download fehlgeschlagen (HTTP-Status oder Netzwerkfehler)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class RateLimiter:
     """
-    Lädt eine LAZ-Datei herunter
+    Mindestabstand zwischen zwei Request-Starts (über alle Threads)
 
-    Returns:
-        True bei Erfolg, False bei Fehler
+    Ersetzt das feste time.sleep(0.5) nach jeder Datei: Der Server sieht
+    höchstens einen neuen Request pro Intervall, laufende Downloads werden
+    dadurch aber nicht gebremst.
     """
-    url = f"{base_url}/{laz_filename}"
-    output_path = output_dir / laz_filename
 
-    # Skip if already exists
-    if output_path.exists():
-        print(f"⏭️  {laz_filename} (bereits vorhanden)")
-        return True
+    def __init__(self, delay):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.delay
+        if start > now:
+            time.sleep(start - now)
 
+
+class ConnectionPool:
+    """
+    Keep-Alive-Verbindungen pro Thread und Host
+
+    Jeder Worker-Thread hat seine eigene Verbindung je Host (http.client ist
+    nicht thread-safe) und nutzt sie für alle folgenden Dateien weiter, statt
+    für jede Datei neu zu verbinden (TCP + TLS-Handshake).
+    """
+
+    def __init__(self, timeout=TIMEOUT):
+        self.timeout = timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.opened = 0
+
+    def _connections(self):
+        if not hasattr(self.local, 'connections'):
+            self.local.connections = {}
+        return self.local.connections
+
+    def get(self, scheme, netloc):
+        """Liefert die (ggf. neue) Verbindung dieses Threads zu scheme://netloc"""
+        connections = self._connections()
+        key = (scheme, netloc)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connections[key] = cls(netloc, timeout=self.timeout)
+            with self.lock:
+                self.opened += 1
+        return connections[key]
+
+    def discard(self, scheme, netloc):
+        """Schließt eine Verbindung nach einem Fehler (nächster Request verbindet neu)"""
+        connection = self._connections().pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+
+class DownloadProgress:
+    """
+    Gemeinsame Fortschrittsanzeige für alle parallelen Downloads
+
+    Im Terminal eine einzige, laufend aktualisierte Zeile; in Logdateien
+    (kein TTY) nur die Meldungen pro abgeschlossener Datei.
+    """
+
+    def __init__(self, total_files, interval=0.2, live=True, label=""):
+        self.total_files = total_files
+        self.interval = interval
+        self.label = label
+        self.lock = threading.Lock()
+        self.done = 0
+        self.active = 0
+        self.bytes_done = 0
+        self.start = time.monotonic()
+        self.last_render = 0.0
+        self.tty = live and sys.stdout.isatty()
+
+    def started(self):
+        with self.lock:
+            self.active += 1
+
+    def add_bytes(self, count):
+        with self.lock:
+            self.bytes_done += count
+            if self.tty and time.monotonic() - self.last_render >= self.interval:
+                self._render()
+
+    def finished(self, message):
+        """Datei fertig (oder fehlgeschlagen): Meldung ausgeben, Zeile neu zeichnen"""
+        with self.lock:
+            self.active = max(0, self.active - 1)
+            self.done += 1
+            prefix = f"[{self.done:>{len(str(self.total_files))}}/{self.total_files}]"
+            if self.tty:
+                print("\r\033[K", end='')
+            print(f"{self.label}{prefix} {message}", flush=True)
+            if self.tty:
+                self._render()
+
+    def message(self, text):
+        """Zwischenmeldung (z.B. Retry) ausgeben, ohne eine Datei abzuschließen"""
+        with self.lock:
+            if self.tty:
+                print("\r\033[K", end='')
+            print(f"{self.label}   {text}", flush=True)
+            if self.tty:
+                self._render()
+
+    def rate_mb(self):
+        return self.bytes_done / (1024 * 1024) / max(time.monotonic() - self.start, 1e-9)
+
+    def _render(self):
+        self.last_render = time.monotonic()
+        mb = self.bytes_done / (1024 * 1024)
+        print(f"\r\033[K⬇️  {self.done}/{self.total_files} Dateien | {mb:.1f} MB | "
+              f"{self.rate_mb():.1f} MB/s | {self.active} aktiv", end='', flush=True)
+
+    def close(self):
+        if self.tty:
+            print("\r\033[K", end='', flush=True)
+
+
+def parse_content_range(value):
+    """
+    Zerlegt einen Content-Range-Header
+
+    "bytes 100-199/1000" → (100, 1000), "bytes */1000" → (None, 1000)
+    """
     try:
-        print(f"⬇️  Lade {laz_filename}...", end=' ', flush=True)
+        unit, _, spec = value.partition(' ')
+        span, _, total = spec.partition('/')
+        start = None if span == '*' else int(span.split('-')[0])
+        return start, (None if total == '*' else int(total))
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def verify_zip(path):
+    """
+    Prüft ein ZIP-Archiv: Zentralverzeichnis lesbar und CRC32 aller Einträge korrekt
+
+    Returns:
+        None wenn in Ordnung, sonst Fehlerbeschreibung
+    """
+    if not zipfile.is_zipfile(path):
+        return "kein gültiges ZIP (abgeschnitten?)"
+    try:
+        with zipfile.ZipFile(path) as archive:
+            bad = archive.testzip()
+    except (zipfile.BadZipFile, OSError, EOFError) as e:
+        return f"ZIP beschädigt: {e}"
+    return f"CRC-Fehler in {bad}" if bad else None
+
 
-        # Download mit Progress
-        with urllib.request.urlopen(url, timeout=60) as response:
-            total_size = int(response.headers.get('content-length', 0))
+def fetch(url, part_path, pool, limiter, progress):
+    """
+    Lädt eine URL in eine .part-Datei, setzt einen vorhandenen Teil per Range fort
+
+    Nutzt die Keep-Alive-Verbindung des Threads, folgt Redirects und liest
+    jede Antwort vollständig, damit die Verbindung wiederverwendbar bleibt.
+    Ignoriert der Server den Range-Header (200 statt 206), wird von vorn
+    begonnen.
 
-            with open(output_path, 'wb') as f:
-                downloaded = 0
-                chunk_size = 8192
+    Returns:
+        Dict mit bytes (übertragen), resumed_from (Offset), total (erwartete Größe)
+
+    Raises:
+        DownloadError: HTTP-Fehler, Netzwerkproblem oder unvollständige Übertragung
+    """
+    offset = part_path.stat().st_size if part_path.exists() else 0
 
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        connection = pool.get(parts.scheme, parts.netloc)
+
+        headers = {'User-Agent': USER_AGENT, 'Connection': 'keep-alive'}
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+
+        limiter.wait()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                response.read()
+                url = urllib.parse.urljoin(url, response.getheader('Location'))
+                continue
+
+            if response.status == 416 and offset:
+                # Teil ist schon vollständig (oder größer als die Datei)
+                response.read()
+                _, total = parse_content_range(response.getheader('Content-Range'))
+                if total == offset:
+                    return {'bytes': 0, 'resumed_from': offset, 'total': total}
+                part_path.unlink()
+                raise DownloadError(f"Teildatei passt nicht zum Server ({offset} Bytes, Server {total})")
+
+            if response.status == 206:
+                start, total = parse_content_range(response.getheader('Content-Range'))
+                if start != offset:
+                    response.read()
+                    part_path.unlink()
+                    raise DownloadError(f"Server setzt bei Byte {start} statt {offset} fort")
+                mode = 'ab'
+            elif response.status == 200:
+                offset = 0
+                length = response.getheader('Content-Length')
+                total = int(length) if length is not None else None
+                mode = 'wb'
+            else:
+                response.read()
+                raise DownloadError(f"HTTP {response.status}", response.status)
+
+            written = 0
+            with open(part_path, mode) as f:
                 while True:
-                    chunk = response.read(chunk_size)
+                    chunk = response.read(CHUNK_SIZE)
                     if not chunk:
                         break
                     f.write(chunk)
-                    downloaded += len(chunk)
+                    written += len(chunk)
+                    progress.add_bytes(len(chunk))
 
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\r⬇️  Lade {laz_filename}... {percent:.1f}%", end='', flush=True)
+            if response.will_close:
+                pool.discard(parts.scheme, parts.netloc)
 
-        file_size_mb = output_path.stat().st_size / (1024 * 1024)
-        print(f"\r✅ {laz_filename} ({file_size_mb:.1f} MB)")
-        return True
+            size = offset + written
+            if total is not None and size != total:
+                pool.discard(parts.scheme, parts.netloc)   # Verbindung ist nach Abbruch unbrauchbar
+                raise DownloadError(f"unvollständig: {size} von {total} Bytes")
+            return {'bytes': written, 'resumed_from': offset, 'total': size}
+
+        except DownloadError:
+            raise
+        except (OSError, http.client.HTTPException) as e:
+            pool.discard(parts.scheme, parts.netloc)
+            raise DownloadError(f"{type(e).__name__}: {e}") from e
+
+    raise DownloadError("Zu viele Redirects")
+
+
+def download_laz_file(laz_filename, output_dir, base_url, pool, limiter, progress,
+                      retry_attempts=DEFAULT_RETRY_ATTEMPTS, retry_delay=DEFAULT_RETRY_DELAY):
+    """
+    Lädt eine LAZ-Datei herunter (läuft im Worker-Thread)
+
+    Der Download landet zuerst in <name>.part. Nach einem Abbruch wird per
+    Range-Request beim letzten Byte fortgesetzt, mit exponentiellem Backoff
+    (retry_delay, 2×, 4×, ...). Erst nach geprüfter Länge und ZIP-CRC wird
+    die Datei atomar umbenannt – eine vorhandene .zip ist damit vollständig.
+
+    Returns:
+        Dict mit file, status ('ok', 'skipped', 'missing', 'failed'), bytes,
+        resumed_from, attempts, error, seconds
+    """
+    url = f"{base_url}/{laz_filename}"
+    output_path = output_dir / laz_filename
+    part_path = output_dir / (laz_filename + ".part")
+    result = {'file': laz_filename, 'status': 'ok', 'bytes': 0, 'resumed_from': 0, 'attempts': 0, 'error': None,
+              'seconds': 0.0}
+    start = time.monotonic()
+
+    # Skip if already exists (und nicht abgeschnitten, z.B. vom alten Downloader)
+    if output_path.exists():
+        if zipfile.is_zipfile(output_path):
+            result['status'] = 'skipped'
+            progress.finished(f"⏭️  {laz_filename} (bereits vorhanden)")
+            return result
+        os.replace(output_path, part_path)
+
+    if part_path.exists():
+        result['resumed_from'] = part_path.stat().st_size
+
+    progress.started()
+    for attempt in range(retry_attempts + 1):
+        result['attempts'] = attempt + 1
+        try:
+            transfer = fetch(url, part_path, pool, limiter, progress)
+            result['bytes'] += transfer['bytes']
+
+            problem = verify_zip(part_path)
+            if problem:
+                part_path.unlink(missing_ok=True)   # kaputte Daten: nicht fortsetzen
+                result['resumed_from'] = 0
+                raise DownloadError(problem)
+
+            os.replace(part_path, output_path)
+            note = f", fortgesetzt ab {result['resumed_from'] / (1024 * 1024):.1f} MB" if result['resumed_from'] else ""
+            retries = f", {attempt}× wiederholt" if attempt else ""
+            progress.finished(f"✅ {laz_filename} ({output_path.stat().st_size / (1024 * 1024):.1f} MB{note}{retries})")
+            result['seconds'] = time.monotonic() - start
+            return result
+
+        except DownloadError as e:
+            result['error'] = str(e)
+            if e.status == 404:
+                part_path.unlink(missing_ok=True)
+                result['status'] = 'missing'
+                progress.finished(f"❌ {laz_filename} (nicht gefunden auf Server)")
+                result['seconds'] = time.monotonic() - start
+                return result
+            if e.status is not None and e.status < 500 and e.status != 429:
+                break                               # Client-Fehler: Wiederholen hilft nicht
+            if attempt < retry_attempts:
+                delay = retry_delay * 2 ** attempt
+                progress.message(f"🔁 {laz_filename}: {e} – neuer Versuch in {delay:g}s")
+                time.sleep(delay)
+
+    # .part bleibt liegen: der nächste Lauf setzt dort fort
+    result['status'] = 'failed'
+    progress.finished(f"❌ {laz_filename} (Fehler: {result['error']})")
+    result['seconds'] = time.monotonic() - start
+    return result
+
+
+def download_all(laz_files, output_dir, base_url, concurrency=DEFAULT_CONCURRENCY,
+                 rate_limit_delay=DEFAULT_RATE_LIMIT_DELAY, retry_attempts=DEFAULT_RETRY_ATTEMPTS,
+                 retry_delay=DEFAULT_RETRY_DELAY, on_complete=None, live=True, label="", events=None):
+    """
+    Lädt alle Dateien parallel (begrenzte Anzahl Threads)
+
+    Args:
+        laz_files: Liste von ZIP-Dateinamen
+        output_dir: Ziel-Verzeichnis
+        base_url: Server-URL (ohne abschließenden /)
+        concurrency: Anzahl gleichzeitiger Downloads
+        rate_limit_delay: Mindestabstand zwischen Request-Starts in Sekunden
+        retry_attempts: Wiederholungen pro Datei nach einem Fehler
+        retry_delay: Wartezeit vor der ersten Wiederholung (verdoppelt sich)
+        on_complete: Callback(result, path) für jede fertige oder bereits
+            vorhandene Datei, sobald sie vollständig ist (z.B. Konvertierung starten)
+        live: Fortschrittszeile im Terminal laufend aktualisieren
+        label: Präfix für alle Meldungen (wenn andere Ausgaben mitlaufen)
+        events: progress_events.ProgressLog für die Stufe "download" (optional)
+
+    Returns:
+        (results, stats): Ergebnisse in Reihenfolge von laz_files und
+        Dict mit seconds, bytes, mb_per_s, connections
+    """
+    pool = ConnectionPool()
+    limiter = RateLimiter(rate_limit_delay)
+    progress = DownloadProgress(len(laz_files), live=live, label=label)
+    events = events or ProgressLog(None, 'download')
+    events.start(len(laz_files))
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {
+            executor.submit(download_laz_file, laz_filename, output_dir, base_url, pool, limiter, progress,
+                            retry_attempts, retry_delay): laz_filename
+            for laz_filename in laz_files
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            events.item(result['file'], 'failed' if result['status'] == 'missing' else result['status'],
+                        result['seconds'], result['bytes'])
+            if on_complete and result['status'] in ('ok', 'skipped'):
+                on_complete(result, output_dir / result['file'])
+
+    progress.close()
+    stats = {
+        'seconds': time.monotonic() - progress.start,
+        'bytes': progress.bytes_done,
+        'mb_per_s': progress.rate_mb(),
+        'connections': pool.opened,
+    }
+    events.end(bytes=stats['bytes'])
+    return [results[laz_filename] for laz_filename in laz_files], stats
 
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            print(f"\r❌ {laz_filename} (nicht gefunden auf Server)")
-        else:
-            print(f"\r❌ {laz_filename} (HTTP {e.code})")
-        return False
-    except Exception as e:
-        print(f"\r❌ {laz_filename} (Fehler: {e})")
-        return False
 
 def main():
     import argparse
 
+    download_config = load_config().get('download', {})
+
     parser = argparse.ArgumentParser(
         description="Brandenburg LAZ Downloader",
         epilog="Beispiel: python3 download_laz.py windrad-tiles.txt --yes"
@@ -115,6 +473,22 @@ def main():
     parser.add_argument("tile_list", help="Path to tile list file (e.g., windrad-tiles.txt)")
     parser.add_argument("-y", "--yes", action="store_true", help="Skip confirmation prompt")
     parser.add_argument("-o", "--output", default="laz_downloads", help="Output directory (default: laz_downloads)")
+    parser.add_argument("--base-url", default=download_config.get('base_url', BASE_URL),
+                        help="Server base URL (default: download.base_url)")
+    parser.add_argument("-j", "--concurrency", type=int,
+                        default=download_config.get('concurrency', DEFAULT_CONCURRENCY),
+                        help="Parallel downloads (default: download.concurrency)")
+    parser.add_argument("--retries", type=int,
+                        default=download_config.get('retry_attempts', DEFAULT_RETRY_ATTEMPTS),
+                        help="Retries per file with exponential backoff (default: download.retry_attempts)")
+    parser.add_argument("--retry-delay", type=float,
+                        default=download_config.get('retry_delay', DEFAULT_RETRY_DELAY),
+                        help="Seconds before the first retry, doubled each time (default: download.retry_delay)")
+    parser.add_argument("--rate-limit", type=float,
+                        default=download_config.get('rate_limit_delay', DEFAULT_RATE_LIMIT_DELAY),
+                        help="Minimum seconds between request starts (default: download.rate_limit_delay)")
+    parser.add_argument("--progress-log", default=str(default_progress_log()),
+                        help="JSONL progress events for monitor.py (default: paths.progress_log, '' to disable)")
 
     args = parser.parse_args()
 
@@ -143,7 +517,8 @@ def main():
 
     print(f"\n📦 Download-Liste: {len(laz_files)} LAZ-Dateien")
     print(f"   Output: {output_dir.absolute()}")
-    print(f"   Server: {BASE_URL}")
+    print(f"   Server: {args.base_url}")
+    print(f"   Parallel: {args.concurrency} Downloads, ≥{args.rate_limit:g}s zwischen Requests")
 
     # Bestätigung
     print(f"\n⚠️  Geschätzte Größe: ~{len(laz_files) * 50} MB")
@@ -165,25 +540,23 @@ def main():
     print(f"\n⬇️  Starte Download von {len(laz_files)} Dateien...")
     print("-" * 60)
 
-    success_count = 0
-    failed_files = []
-
-    for i, laz_filename in enumerate(laz_files, 1):
-        print(f"[{i}/{len(laz_files)}] ", end='')
-
-        if download_laz_file(laz_filename, output_dir, BASE_URL):
-            success_count += 1
-        else:
-            failed_files.append(laz_filename)
+    results, stats = download_all(laz_files, output_dir, args.base_url.rstrip('/'),
+                                  args.concurrency, args.rate_limit, args.retries, args.retry_delay,
+                                  events=ProgressLog(args.progress_log or None, 'download'))
 
-        # Kleine Pause zwischen Downloads (Server-freundlich)
-        if i < len(laz_files):
-            time.sleep(0.5)
+    success_count = sum(1 for r in results if r['status'] in ('ok', 'skipped'))
+    failed_files = [r['file'] for r in results if r['status'] in ('missing', 'failed')]
 
     # Zusammenfassung
     print("\n" + "=" * 60)
     print("✨ Download abgeschlossen!")
     print(f"   Erfolgreich: {success_count}/{len(laz_files)}")
+    print(f"   Übertragen:  {stats['bytes'] / (1024 * 1024):.1f} MB in {stats['seconds']:.1f}s "
+          f"({stats['mb_per_s']:.1f} MB/s, {stats['connections']} Verbindungen)")
+    resumed = [r for r in results if r['resumed_from']]
+    if resumed:
+        saved = sum(r['resumed_from'] for r in resumed) / (1024 * 1024)
+        print(f"   Fortgesetzt: {len(resumed)} Dateien ({saved:.1f} MB nicht erneut geladen)")
 
     if failed_files:
         print(f"\n⚠️  {len(failed_files)} Dateien konnten nicht geladen werden:")
@@ -195,7 +568,7 @@ def main():
         print("\nMögliche Gründe:")
         print("  • Datei existiert nicht auf dem Server")
         print("  • Download-URL ist falsch (siehe README)")
-        print("  • Netzwerkproblem")
+        print("  • Netzwerkproblem (Teildownloads .part werden beim nächsten Lauf fortgesetzt)")
 
     print(f"\n📁 Dateien gespeichert in: {output_dir.absolute()}")
     print(f"\n🔄 Nächster Schritt:")
@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+"""
+Höhenabfragen (Punkt, Profil, Sichtlinie) direkt auf den lokalen Tiles
+
+Python-Gegenstück zu elevation-api/index.js: gleiche UTM-Formel
+(wgs84_to_utm33), gleiche bilineare Interpolation (0 = nodata, fehlende
+Ecken durch das Mittel der vorhandenen ersetzt) und gleiche
+Sichtlinien-Logik (steilster "grazing angle" zwischen Auge und Ziel,
+Schwellen blocked < 10 % / partial < 70 %). Damit lassen sich Antworten der
+API offline prüfen und Massenauswertungen ohne HTTP rechnen.
+
+Alle Funktionen sind vektorisiert: Koordinaten dürfen Arrays sein,
+fehlende Höhen sind NaN (statt null in der API).
+
+Tiles aus tiles_output/ (tile_X_Y, X/Y in km, EPSG:25833):
+- tile_X_Y.bin     → per np.memmap eingeblendet (kein Lesen vorab)
+- tile_X_Y.bin.gz  → erst beim ersten Zugriff entpackt (LRU-begrenzt)
+- tile_X_Y.v2      → tile_format.load_tile
+
+Usage:
+    python3 elevation.py point 51.6546 14.4178
+    python3 elevation.py profile 51.6546,14.4178 51.6711,14.4319 -n 200
+    python3 elevation.py los 51.6546,14.4178 51.6711,14.4319,166
+"""
+
+import sys
+import gzip
+import json
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install numpy")
+    sys.exit(1)
+
+from pipeline_config import load_config, config_path
+
+TILE_SIZE = 1000             # Meter pro Kachelkante = Gridzellen pro Kante
+DEFAULT_SAMPLES = 200        # Stützpunkte für Profil/LoS (wie die API)
+EYE_HEIGHT = 1.7             # Standard-Augenhöhe Beobachter (m)
+BLOCKED_THRESHOLD = 10       # < 10% sichtbar  → blocked
+PARTIAL_THRESHOLD = 70       # < 70% sichtbar  → partial
+EARTH_RADIUS = 6371000       # m (Haversine, wie die API)
+DEFAULT_MAX_DECODED = 64     # entpackte .bin.gz/.v2-Tiles im Speicher (à 2 MB)
+
+
+def wgs84_to_utm33(lat, lon):
+    """
+    WGS84 (lat/lon) → ETRS89/UTM Zone 33N (EPSG:25833), vektorisiert
+
+    Transverse-Mercator-Vorwärtsformel (Snyder) inkl. Meridianbogen M,
+    identisch zu wgs84ToUtm33 in elevation-api/index.js.
+
+    Returns:
+        (x, y) in Metern (Skalare oder Arrays wie die Eingabe)
+    """
+    a = 6378137.0
+    f = 1 / 298.257223563
+    e2 = f * (2 - f)
+    k0 = 0.9996
+    lon0 = np.radians(15.0)
+
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    ep2 = e2 / (1 - e2)
+
+    # Mehrfachwinkel aus sin/cos statt neuer Winkelfunktionen (Profile mit
+    # Millionen Stützpunkten verbringen sonst die meiste Zeit hier)
+    sin_phi = np.sin(phi)
+    cos_phi = np.cos(phi)
+    tan_phi = sin_phi / cos_phi
+    sin_2phi = 2 * sin_phi * cos_phi
+    cos_2phi = 1 - 2 * sin_phi * sin_phi
+    sin_4phi = 2 * sin_2phi * cos_2phi
+    sin_6phi = sin_4phi * cos_2phi + (1 - 2 * sin_2phi * sin_2phi) * sin_2phi
+
+    N = a / np.sqrt(1 - e2 * sin_phi * sin_phi)
+    T = tan_phi * tan_phi
+    C = ep2 * cos_phi * cos_phi
+    A = (lam - lon0) * cos_phi
+    A2 = A * A
+
+    M = a * (
+        (1 - e2 / 4 - 3 * e2 * e2 / 64 - 5 * e2 ** 3 / 256) * phi
+        - (3 * e2 / 8 + 3 * e2 * e2 / 32 + 45 * e2 ** 3 / 1024) * sin_2phi
+        + (15 * e2 * e2 / 256 + 45 * e2 ** 3 / 1024) * sin_4phi
+        - (35 * e2 ** 3 / 3072) * sin_6phi
+    )
+
+    x = k0 * N * A * (
+        1 + (1 - T + C) * A2 / 6 + (5 - 18 * T + T * T + 72 * C - 58 * ep2) * A2 * A2 / 120
+    ) + 500000
+
+    y = k0 * (
+        M + N * tan_phi * A2 * (
+            0.5 + (5 - T + 9 * C + 4 * C * C) * A2 / 24
+            + (61 - 58 * T + T * T + 600 * C - 330 * ep2) * A2 * A2 / 720
+        )
+    )
+    return x, y
+
+
+def utm33_to_wgs84(x, y):
+    """
+    ETRS89/UTM Zone 33N → WGS84 (lat/lon), vektorisiert
+
+    Inverse Transverse-Mercator-Formel (Snyder) über die Fußpunktbreite,
+    Umkehrung von wgs84_to_utm33 (Rundreise-Fehler wenige mm in Brandenburg).
+
+    Returns:
+        (lat, lon) in Grad (Skalare oder Arrays wie die Eingabe)
+    """
+    a = 6378137.0
+    f = 1 / 298.257223563
+    e2 = f * (2 - f)
+    k0 = 0.9996
+    lon0 = np.radians(15.0)
+    ep2 = e2 / (1 - e2)
+    e1 = (1 - np.sqrt(1 - e2)) / (1 + np.sqrt(1 - e2))
+
+    x = np.asarray(x, dtype=np.float64) - 500000
+    y = np.asarray(y, dtype=np.float64)
+
+    mu = y / k0 / (a * (1 - e2 / 4 - 3 * e2 * e2 / 64 - 5 * e2 ** 3 / 256))
+    phi1 = (mu
+            + (3 * e1 / 2 - 27 * e1 ** 3 / 32) * np.sin(2 * mu)
+            + (21 * e1 * e1 / 16 - 55 * e1 ** 4 / 32) * np.sin(4 * mu)
+            + (151 * e1 ** 3 / 96) * np.sin(6 * mu)
+            + (1097 * e1 ** 4 / 512) * np.sin(8 * mu))
+
+    sin_phi1 = np.sin(phi1)
+    cos_phi1 = np.cos(phi1)
+    tan_phi1 = sin_phi1 / cos_phi1
+    w = 1 - e2 * sin_phi1 * sin_phi1
+    N1 = a / np.sqrt(w)
+    R1 = a * (1 - e2) / (w * np.sqrt(w))
+    T1 = tan_phi1 * tan_phi1
+    C1 = ep2 * cos_phi1 * cos_phi1
+    D = x / (N1 * k0)
+    D2 = D * D
+
+    phi = phi1 - (N1 * tan_phi1 / R1) * D2 * (
+        0.5 - (5 + 3 * T1 + 10 * C1 - 4 * C1 * C1 - 9 * ep2) * D2 / 24
+        + (61 + 90 * T1 + 298 * C1 + 45 * T1 * T1 - 252 * ep2 - 3 * C1 * C1) * D2 * D2 / 720
+    )
+    lam = lon0 + D * (
+        1 - (1 + 2 * T1 + C1) * D2 / 6
+        + (5 - 2 * C1 + 28 * T1 - 3 * C1 * C1 + 8 * ep2 + 24 * T1 * T1) * D2 * D2 / 120
+    ) / cos_phi1
+    return np.degrees(phi), np.degrees(lam)
+
+
+def tiles_in_radius(center_x, center_y, radius):
+    """
+    Kacheln (tile_x, tile_y), die den Kreis um (center_x, center_y) schneiden
+
+    Statt des umschließenden Quadrats nur Kacheln, deren nächster Punkt zum
+    Mittelpunkt höchstens radius entfernt ist – die Eckkacheln außerhalb
+    des Kreises fallen weg.
+
+    Returns:
+        Liste von (tile_x, tile_y), zeilenweise von Süden nach Norden
+    """
+    tile_x = np.arange((center_x - radius) // TILE_SIZE, (center_x + radius) // TILE_SIZE + 1, dtype=np.int64)
+    tile_y = np.arange((center_y - radius) // TILE_SIZE, (center_y + radius) // TILE_SIZE + 1, dtype=np.int64)
+    dx = np.clip(center_x, tile_x * TILE_SIZE, (tile_x + 1) * TILE_SIZE) - center_x
+    dy = np.clip(center_y, tile_y * TILE_SIZE, (tile_y + 1) * TILE_SIZE) - center_y
+    rows, cols = np.nonzero(dy[:, None] ** 2 + dx[None, :] ** 2 <= radius * radius)
+    return list(zip(tile_x[cols].tolist(), tile_y[rows].tolist()))
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Geodätische Distanz (Haversine, Kugel) in Metern, vektorisiert"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS * 2 * np.arctan2(np.sqrt(h), np.sqrt(1 - h))
+
+
+class TileStore:
+    """
+    Lesezugriff auf die Höhen-Tiles eines Verzeichnisses (thread-safe)
+
+    .bin-Tiles werden per memmap eingeblendet (der Kernel lädt nur die
+    berührten Seiten), komprimierte Tiles beim ersten Zugriff entpackt und
+    in einem LRU mit max_decoded Einträgen gehalten. Fehlende Tiles werden
+    ebenfalls gemerkt (außerhalb der Abdeckung).
+    """
+
+    def __init__(self, tiles_dir, max_decoded=DEFAULT_MAX_DECODED):
+        self.tiles_dir = Path(tiles_dir)
+        self.max_decoded = max_decoded
+        self.mapped = {}
+        self.decoded = OrderedDict()
+        self.lock = threading.Lock()
+        self.loads = 0
+
+    def _load(self, tile_x, tile_y):
+        """Tile von der Platte (memmap, .bin.gz oder .v2), None wenn nicht vorhanden"""
+        base = self.tiles_dir / f"tile_{tile_x}_{tile_y}.bin"
+        self.loads += 1
+
+        if base.exists():
+            size = base.stat().st_size
+            if size != TILE_SIZE * TILE_SIZE * 2:
+                raise ValueError(f"Invalid tile size for {base.name}: {size} bytes")
+            return np.memmap(base, dtype='<u2', mode='r', shape=(TILE_SIZE, TILE_SIZE)), True
+
+        gz_file = base.with_name(base.name + ".gz")
+        if gz_file.exists():
+            raw = gzip.decompress(gz_file.read_bytes())
+            if len(raw) != TILE_SIZE * TILE_SIZE * 2:
+                raise ValueError(f"Invalid tile size for {gz_file.name}: {len(raw)} bytes")
+            return np.frombuffer(raw, dtype='<u2').reshape(TILE_SIZE, TILE_SIZE), False
+
+        v2_file = self.tiles_dir / f"tile_{tile_x}_{tile_y}.v2"
+        if v2_file.exists():
+            from tile_format import load_tile
+            grid, _ = load_tile(v2_file)
+            if grid.shape != (TILE_SIZE, TILE_SIZE):
+                raise ValueError(f"Invalid tile shape for {v2_file.name}: {grid.shape}")
+            return grid, False
+
+        return None, True
+
+    def tile(self, tile_x, tile_y):
+        """
+        Uint16-Grid (cm, Zeile 0 = Süden) der Kachel oder None
+
+        Args:
+            tile_x, tile_y: Kachelindex in km (wie im Dateinamen)
+        """
+        key = (int(tile_x), int(tile_y))
+        with self.lock:
+            if key in self.mapped:
+                return self.mapped[key]
+            if key in self.decoded:
+                self.decoded.move_to_end(key)
+                return self.decoded[key]
+
+            grid, mapped = self._load(*key)
+            if mapped:
+                self.mapped[key] = grid
+            else:
+                self.decoded[key] = grid
+                while len(self.decoded) > self.max_decoded:
+                    self.decoded.popitem(last=False)
+            return grid
+
+    def cells(self, x, y):
+        """
+        Höhe der Gridzellen (Integer-Meter, EPSG:25833) in Metern
+
+        Die Zellen werden nach Kachel gruppiert, jede Kachel wird also
+        einmal geholt und mit einem Fancy-Index ausgelesen.
+
+        Returns:
+            Float64-Array wie x, NaN bei nodata oder fehlender Kachel
+        """
+        x = np.asarray(x, dtype=np.int64)
+        y = np.asarray(y, dtype=np.int64)
+        out = np.full(x.shape, np.nan)
+        flat_x, flat_y, flat_out = x.ravel(), y.ravel(), out.reshape(-1)
+        if flat_x.size == 0:
+            return out
+
+        # Kachel als ein Integer-Schlüssel (np.unique über axis=1 wäre ~20× langsamer)
+        tile_x = np.floor_divide(flat_x, TILE_SIZE)
+        tile_y = np.floor_divide(flat_y, TILE_SIZE)
+        min_x, min_y = tile_x.min(), tile_y.min()
+        span_y = int(tile_y.max() - min_y) + 1
+        keys, inverse = np.unique((tile_x - min_x) * span_y + (tile_y - min_y), return_inverse=True)
+        # Wenige Kacheln → uint16 → Radix-Sort (linear) statt Mergesort
+        inverse = inverse.ravel().astype(np.uint16 if len(keys) <= 65536 else np.int64)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+
+        for j, key in enumerate(keys):
+            tx, ty = min_x + key // span_y, min_y + key % span_y
+            grid = self.tile(tx, ty)
+            if grid is None:
+                continue
+            idx = order[bounds[j]:bounds[j + 1]]
+            local_x = flat_x[idx] - tx * TILE_SIZE
+            local_y = flat_y[idx] - ty * TILE_SIZE
+            heights = np.asarray(grid[local_y, local_x], dtype=np.float64)
+            heights[heights == 0] = np.nan  # nodata
+            flat_out[idx] = heights / 100.0
+
+        return out
+
+    def window(self, x0, y0, width, height):
+        """
+        Rechteckiger Ausschnitt des Höhenmodells (kachelübergreifend)
+
+        Args:
+            x0, y0: UTM-Koordinate (Integer-Meter) der Zelle links unten
+            width, height: Größe in Zellen
+
+        Returns:
+            Float32-Array [height, width] in Metern (Zeile 0 = Süden),
+            NaN bei nodata oder fehlender Kachel
+        """
+        out = np.full((height, width), np.nan, dtype=np.float32)
+        for tile_y in range(y0 // TILE_SIZE, (y0 + height - 1) // TILE_SIZE + 1):
+            for tile_x in range(x0 // TILE_SIZE, (x0 + width - 1) // TILE_SIZE + 1):
+                grid = self.tile(tile_x, tile_y)
+                if grid is None:
+                    continue
+                left = max(x0, tile_x * TILE_SIZE)
+                right = min(x0 + width, (tile_x + 1) * TILE_SIZE)
+                bottom = max(y0, tile_y * TILE_SIZE)
+                top = min(y0 + height, (tile_y + 1) * TILE_SIZE)
+                block = grid[bottom - tile_y * TILE_SIZE:top - tile_y * TILE_SIZE,
+                             left - tile_x * TILE_SIZE:right - tile_x * TILE_SIZE].astype(np.float32)
+                block[block == 0] = np.nan  # nodata
+                out[bottom - y0:top - y0, left - x0:right - x0] = block / 100.0
+        return out
+
+    def elevation(self, x, y):
+        """
+        Bilinear interpolierte Höhe an UTM-Positionen (x, y in Metern)
+
+        Fehlende Ecken (nodata) werden durch das Mittel der vorhandenen
+        ersetzt, damit die Interpolation an Datenrändern nicht kippt.
+
+        Returns:
+            Float64-Array wie x, NaN wenn keine der 4 Ecken Daten hat
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        x0 = np.floor(x)
+        y0 = np.floor(y)
+        fx = x - x0
+        fy = y - y0
+        x0 = x0.astype(np.int64)
+        y0 = y0.astype(np.int64)
+
+        corners = self.cells(np.stack([x0, x0 + 1, x0, x0 + 1]), np.stack([y0, y0, y0 + 1, y0 + 1]))
+        valid = ~np.isnan(corners)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            fallback = np.where(valid, corners, 0.0).sum(axis=0) / count
+        h00, h10, h01, h11 = np.where(valid, corners, fallback)
+
+        top = h00 * (1 - fx) + h10 * fx
+        bottom = h01 * (1 - fx) + h11 * fx
+        return np.where(count > 0, top * (1 - fy) + bottom * fy, np.nan)
+
+
+def point(store, lat, lon):
+    """
+    Höhe an WGS84-Koordinaten (wie /v1/point)
+
+    Returns:
+        Höhe in Metern (NaN außerhalb der Abdeckung), Form wie lat
+    """
+    x, y = wgs84_to_utm33(lat, lon)
+    return store.elevation(x, y)
+
+
+def profile(store, from_lat, from_lon, to_lat, to_lon, samples=DEFAULT_SAMPLES):
+    """
+    Höhenprofile zwischen Punktpaaren (wie /v1/profile)
+
+    Stützpunkte linear in lat/lon, Distanz geodätisch (Haversine).
+    Mehrere Paare (Arrays) werden in einem Durchgang berechnet.
+
+    Returns:
+        Dict mit lat, lon, distance_m, elevation (Arrays [..., samples])
+        und distance (Gesamtlänge pro Paar)
+    """
+    from_lat, from_lon, to_lat, to_lon = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (from_lat, from_lon, to_lat, to_lon)))
+    distance = haversine(from_lat, from_lon, to_lat, to_lon)
+
+    t = np.linspace(0.0, 1.0, samples) if samples > 1 else np.zeros(1)
+    lat = from_lat[..., None] + (to_lat - from_lat)[..., None] * t
+    lon = from_lon[..., None] + (to_lon - from_lon)[..., None] * t
+
+    return {
+        'lat': lat,
+        'lon': lon,
+        'distance_m': distance[..., None] * t,
+        'elevation': point(store, lat, lon),
+        'distance': distance,
+    }
+
+
+def line_of_sight(store, obs_lat, obs_lon, tgt_lat, tgt_lon, observer_height=EYE_HEIGHT, target_height=0.0,
+                  samples=DEFAULT_SAMPLES):
+    """
+    Sichtbarkeit von Zielen (z.B. Windrad-Spitze) vom Beobachter aus (wie /v1/line-of-sight)
+
+    Sichtlinie von der Augenhöhe zur Zieloberkante: Der steilste Sichtwinkel
+    (Tangens = Höhe/Distanz) zu einem Geländepunkt zwischen Beobachter und
+    Ziel bestimmt, bis zu welcher Höhe die Ziel-Säule verdeckt ist.
+
+    Returns:
+        Dict mit Arrays: status ('visible'/'partial'/'blocked', 'no_data'
+        wenn Beobachter- oder Zielboden keine Höhe hat), visible,
+        visible_percent, visible_height, blocked_index (Stützpunkt des
+        stärksten Verdeckers, -1 wenn keiner), ground_observer, ground_target,
+        eye_elevation, target_top, distance sowie das Profil (profile)
+    """
+    prof = profile(store, obs_lat, obs_lon, tgt_lat, tgt_lon, samples)
+    elevation = prof['elevation']
+    distance = prof['distance']
+    observer_height, target_height = np.broadcast_arrays(
+        np.asarray(observer_height, dtype=np.float64), np.asarray(target_height, dtype=np.float64))
+    observer_height = np.broadcast_to(observer_height, distance.shape)
+    target_height = np.broadcast_to(target_height, distance.shape)
+
+    ground_obs = elevation[..., 0]
+    ground_tgt = elevation[..., -1]
+    eye = ground_obs + observer_height
+    target_top = ground_tgt + target_height
+
+    # Steilster Sichtwinkel über die inneren Stützpunkte (nodata ignoriert)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (elevation[..., 1:-1] - eye[..., None]) / prof['distance_m'][..., 1:-1]
+    slopes = np.where(np.isnan(slopes), -np.inf, slopes)
+    if slopes.shape[-1]:
+        block = np.argmax(slopes, axis=-1)
+        max_slope = np.take_along_axis(slopes, block[..., None], axis=-1)[..., 0]
+    else:
+        block = np.zeros(distance.shape, dtype=np.int64)
+        max_slope = np.full(distance.shape, -np.inf)
+
+    # Höhe (ü.NN) auf der Ziel-Säule, bis zu der verdeckt ist
+    with np.errstate(invalid='ignore'):
+        blocked_upto = np.where(np.isinf(max_slope), -np.inf, eye + max_slope * distance)
+        clear = blocked_upto <= ground_tgt
+
+        visible_from = np.minimum(blocked_upto, target_top)
+        visible_height = np.where(clear, target_height, np.maximum(0.0, target_top - visible_from))
+        partial_percent = np.divide(visible_height * 100, target_height,
+                                    out=np.zeros_like(visible_height), where=target_height > 0)
+    visible_percent = np.where(clear, 100.0, partial_percent)
+
+    status = np.where(visible_percent < BLOCKED_THRESHOLD, 'blocked',
+                      np.where(visible_percent < PARTIAL_THRESHOLD, 'partial', 'visible'))
+    no_data = np.isnan(ground_obs) | np.isnan(ground_tgt)
+    status = np.where(no_data, 'no_data', status)
+
+    return {
+        'status': status,
+        'visible': status == 'visible',
+        'visible_percent': np.where(no_data, np.nan, visible_percent),
+        'visible_height': np.where(no_data, np.nan, visible_height),
+        'blocked_index': np.where(clear | no_data, -1, block + 1),
+        'ground_observer': ground_obs,
+        'ground_target': ground_tgt,
+        'eye_elevation': eye,
+        'target_top': target_top,
+        'distance': distance,
+        'profile': prof,
+    }
+
+
+def round2(value):
+    return None if value is None or np.isnan(value) else round(float(value), 2)
+
+
+def round6(value):
+    return round(float(value), 6)
+
+
+def parse_coord(text, default_height=None):
+    """"lat,lon[,h]" → (lat, lon, h)"""
+    parts = [float(v) for v in text.split(',')]
+    if len(parts) not in (2, 3) or (len(parts) == 3 and default_height is None):
+        raise ValueError(f"Koordinate erwartet als lat,lon{'[,h]' if default_height is not None else ''}: {text}")
+    return parts[0], parts[1], parts[2] if len(parts) == 3 else default_height
+
+
+def los_response(result, obs, tgt, samples):
+    """JSON-Antwort im Format von /v1/line-of-sight (ein Beobachter/Ziel-Paar)"""
+    prof = result['profile']
+    blocked_index = int(result['blocked_index'])
+    blocked_at = None
+    if blocked_index >= 0:
+        blocked_at = {
+            'lat': round6(prof['lat'][blocked_index]),
+            'lon': round6(prof['lon'][blocked_index]),
+            'elevation': round2(prof['elevation'][blocked_index]),
+            'distance_m': round2(prof['distance_m'][blocked_index]),
+        }
+    return {
+        'visible': bool(result['visible']),
+        'status': str(result['status']),
+        'visiblePercent': round2(result['visible_percent']),
+        'visibleHeight_m': round2(result['visible_height']),
+        'blockedAt': blocked_at,
+        'observer': {
+            'lat': obs[0], 'lon': obs[1],
+            'groundElevation_m': round2(result['ground_observer']),
+            'height_m': obs[2],
+            'eyeElevation_m': round2(result['eye_elevation']),
+        },
+        'target': {
+            'lat': tgt[0], 'lon': tgt[1],
+            'groundElevation_m': round2(result['ground_target']),
+            'height_m': tgt[2],
+            'topElevation_m': round2(result['target_top']),
+        },
+        'distance_m': round2(result['distance']),
+        'samples': samples,
+    }
+
+
+def main():
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(
+        description="Offline elevation queries (point, profile, line-of-sight) on local tiles",
+        epilog="Beispiel: python3 elevation.py los 51.6546,14.4178 51.6711,14.4319,166"
+    )
+    parser.add_argument("-d", "--tiles-dir", help="Tile directory (default: paths.tiles_output)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    point_parser = subparsers.add_parser("point", help="Elevation at a point")
+    point_parser.add_argument("lat", type=float)
+    point_parser.add_argument("lon", type=float)
+
+    profile_parser = subparsers.add_parser("profile", help="Elevation profile between two points")
+    profile_parser.add_argument("start", help="lat,lon")
+    profile_parser.add_argument("end", help="lat,lon")
+    profile_parser.add_argument("-n", "--samples", type=int, default=DEFAULT_SAMPLES,
+                                help=f"Number of samples (default: {DEFAULT_SAMPLES})")
+
+    los_parser = subparsers.add_parser("los", help="Line of sight from observer to target")
+    los_parser.add_argument("observer", help=f"lat,lon[,h] (default h: {EYE_HEIGHT} m eye height)")
+    los_parser.add_argument("target", help="lat,lon[,h] (default h: 0, e.g. turbine tip height)")
+    los_parser.add_argument("-n", "--samples", type=int, default=DEFAULT_SAMPLES,
+                            help=f"Number of samples (default: {DEFAULT_SAMPLES})")
+
+    args = parser.parse_args()
+
+    tiles_dir = Path(args.tiles_dir) if args.tiles_dir else config_path(config, 'tiles_output', '../tiles_output')
+    store = TileStore(tiles_dir)
+
+    try:
+        if args.command == "point":
+            elevation = point(store, args.lat, args.lon)
+            if np.isnan(elevation):
+                print(f"❌ Keine Höhendaten für {args.lat}, {args.lon} (außerhalb der Tiles in {tiles_dir})")
+                sys.exit(1)
+            response = {'lat': args.lat, 'lon': args.lon, 'elevation': round2(elevation), 'unit': 'm'}
+
+        elif args.command == "profile":
+            start, end = parse_coord(args.start), parse_coord(args.end)
+            prof = profile(store, start[0], start[1], end[0], end[1], args.samples)
+            response = {
+                'from': {'lat': start[0], 'lon': start[1]},
+                'to': {'lat': end[0], 'lon': end[1]},
+                'distance_m': round2(prof['distance']),
+                'samples': args.samples,
+                'unit': 'm',
+                'profile': [
+                    {'lat': round6(lat), 'lon': round6(lon), 'distance_m': round2(dist), 'elevation': round2(elev)}
+                    for lat, lon, dist, elev in zip(prof['lat'], prof['lon'], prof['distance_m'], prof['elevation'])
+                ],
+            }
+
+        else:
+            obs, tgt = parse_coord(args.observer, EYE_HEIGHT), parse_coord(args.target, 0.0)
+            result = line_of_sight(store, obs[0], obs[1], tgt[0], tgt[1], obs[2], tgt[2], args.samples)
+            if result['status'] == 'no_data':
+                print("❌ Beobachter oder Ziel ohne Höhendaten (außerhalb der Abdeckung)")
+                sys.exit(1)
+            response = los_response(result, obs, tgt, args.samples)
+
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(json.dumps(response, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
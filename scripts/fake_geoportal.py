@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Lokaler Stand-in für den Geoportal-Downloadserver
+Für Tests und Benchmarks von download_laz.py ohne Internet
+
+Liefert die Dateien eines Verzeichnisses über HTTP/1.1 mit Keep-Alive und
+Range-Requests und zählt Verbindungen und Requests, damit
+Verbindungs-Wiederverwendung und Rate-Limit sichtbar werden. Mit --flaky
+bricht ein Teil der Übertragungen mittendrin ab (wackelige Leitung), um
+Fortsetzen und Retries zu testen.
+
+Usage:
+    python3 fake_geoportal.py ../laz_downloads -p 8001
+    python3 download_laz.py ../tiles/windrad-tiles.txt -y -o /tmp/laz \\
+        --base-url http://localhost:8001
+"""
+
+import re
+import random
+import threading
+import http.server
+from pathlib import Path
+
+
+class GeoportalHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.1-Handler: GET/HEAD auf Dateien im Wurzelverzeichnis"""
+
+    protocol_version = "HTTP/1.1"
+    root = Path('.')
+    flaky = 0.0
+    stats = {'connections': 0, 'requests': 0, 'bytes': 0, 'ranges': 0, 'aborted': 0}
+    stats_lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.stats_lock:
+            self.stats['connections'] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET(body=False)
+
+    def do_GET(self, body=True):
+        with self.stats_lock:
+            self.stats['requests'] += 1
+
+        file_path = self.root / Path(self.path.split('?')[0]).name
+        if not file_path.is_file():
+            self.send_error(404, "Not found")
+            return
+
+        data = file_path.read_bytes()
+        start = 0
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(data)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            with self.stats_lock:
+                self.stats['ranges'] += 1
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+
+        body_bytes = data[start:]
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Length', str(len(body_bytes)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if not body:
+            return
+
+        if random.random() < self.flaky:
+            # Verbindung nach der Hälfte kappen
+            cut = len(body_bytes) // 2
+            self.wfile.write(body_bytes[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            with self.stats_lock:
+                self.stats['bytes'] += cut
+                self.stats['aborted'] += 1
+            return
+
+        self.wfile.write(body_bytes)
+        with self.stats_lock:
+            self.stats['bytes'] += len(body_bytes)
+
+
+def serve(directory, port=8001, flaky=0.0):
+    """
+    Startet den Server im Hintergrund-Thread
+
+    Returns:
+        ThreadingHTTPServer (server.shutdown() beendet ihn)
+    """
+    handler = type('Handler', (GeoportalHandler,), {
+        'root': Path(directory),
+        'flaky': flaky,
+        'stats': {'connections': 0, 'requests': 0, 'bytes': 0, 'ranges': 0, 'aborted': 0},
+    })
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the geoportal download server")
+    parser.add_argument("directory", help="Directory with the ZIP files to serve")
+    parser.add_argument("-p", "--port", type=int, default=8001, help="Port (default: 8001)")
+    parser.add_argument("--flaky", type=float, default=0.0,
+                        help="Fraction of transfers to abort halfway, 0-1 (default: 0)")
+
+    args = parser.parse_args()
+
+    server = serve(args.directory, args.port, args.flaky)
+    print(f"🚀 Geoportal-Stand-in läuft auf:")
+    print(f"   http://localhost:{args.port}")
+    print(f"\n📂 Serving from: {Path(args.directory).resolve()}")
+    print(f"\n⏹  Stoppen mit Ctrl+C\n")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stats = server.RequestHandlerClass.stats
+        print(f"\n📊 {stats['requests']} Requests über {stats['connections']} Verbindungen, "
+              f"{stats['bytes'] / (1024 * 1024):.1f} MB ({stats['ranges']} Range, {stats['aborted']} abgebrochen)")
+        server.shutdown()
@@ -2,179 +2,162 @@
 """
 Generate correct tile list based on windrad coordinates
 Uses accurate UTM Zone 33N conversion
+
+Liest die Windräder aus windraeder.csv (Export der Admin-Seite) und
+wählt alle 1-km-Kacheln, die den Sichtradius um ein Windrad tatsächlich
+schneiden. Das umschließende Quadrat enthält Eckkacheln komplett
+außerhalb des Kreises – die würden sonst umsonst heruntergeladen,
+konvertiert und hochgeladen.
+
+UTM-Umrechnung (vorwärts und invers) vektorisiert aus elevation.py.
+
+Usage:
+    python3 generate_correct_tiles.py
+    python3 generate_correct_tiles.py --radius 5000 -o ../tiles/windrad-tiles-5km.txt
 """
 
-import math
+import sys
+from datetime import date
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install numpy")
+    sys.exit(1)
+
+from pipeline_config import load_config, config_path
+from elevation import TILE_SIZE, wgs84_to_utm33, utm33_to_wgs84, tiles_in_radius
+from turbines import load_turbines
+from tile_archive import loose_tiles
 
-def wgs84_to_utm33(lat, lng):
+DEFAULT_RADIUS = 3000        # m Sichtradius
+LAZ_MB_PER_TILE = 50         # geschätzte LAZ-Größe pro Kachel (wie download_laz.py)
+
+
+def get_required_tiles(x, y, radius):
     """
-    Convert WGS84 to UTM Zone 33N (EPSG:25833)
-    Accurate conversion for Brandenburg
+    Kacheln im Sichtradius eines Windrads
+
+    Returns:
+        (tiles_in_circle, tiles_in_square) als Sets von "tile_X_Y.bin"
     """
-    # WGS84 parameters
-    a = 6378137.0  # semi-major axis
-    f = 1 / 298.257223563  # flattening
-    e = math.sqrt(2 * f - f * f)  # eccentricity
-    e2 = e * e
-    e4 = e2 * e2
-    e6 = e4 * e2
-
-    # UTM Zone 33N parameters
-    k0 = 0.9996  # scale factor
-    E0 = 500000  # false easting
-    N0 = 0  # false northing (northern hemisphere)
-    lambda0 = math.radians(15)  # central meridian (15°E for Zone 33)
-
-    # Convert to radians
-    phi = math.radians(lat)
-    lambda_ = math.radians(lng)
-
-    sin_phi = math.sin(phi)
-    cos_phi = math.cos(phi)
-    tan_phi = math.tan(phi)
-
-    # Calculate meridional arc
-    n = (a - a * math.sqrt(1 - e2)) / (a + a * math.sqrt(1 - e2))
-    n2 = n * n
-    n3 = n2 * n
-    n4 = n3 * n
-    n5 = n4 * n
-    n6 = n5 * n
-
-    A_coeff = a / (1 + n) * (1 + n2/4 + n4/64 + n6/256)
-
-    M = A_coeff * (
-        phi
-        - (3*n/2 - 27*n3/32 + 269*n5/512) * math.sin(2*phi)
-        + (21*n2/16 - 55*n4/32) * math.sin(4*phi)
-        - (151*n3/96) * math.sin(6*phi)
-        + (1097*n4/512) * math.sin(8*phi)
-    )
+    circle = {f"tile_{tile_x}_{tile_y}.bin" for tile_x, tile_y in tiles_in_radius(x, y, radius)}
+    square = {f"tile_{tile_x}_{tile_y}.bin"
+              for tile_x in range(int((x - radius) // TILE_SIZE), int((x + radius) // TILE_SIZE) + 1)
+              for tile_y in range(int((y - radius) // TILE_SIZE), int((y + radius) // TILE_SIZE) + 1)}
+    return circle, square
 
-    # Transverse Mercator parameters
-    N = a / math.sqrt(1 - e2 * sin_phi * sin_phi)
-    T = tan_phi * tan_phi
-    C = e2 / (1 - e2) * cos_phi * cos_phi
-    A = (lambda_ - lambda0) * cos_phi
-
-    # Calculate UTM Easting
-    x = E0 + k0 * N * (
-        A +
-        (1 - T + C) * A**3 / 6 +
-        (5 - 18*T + T*T + 72*C - 58*e2/(1-e2)) * A**5 / 120
-    )
 
-    # Calculate UTM Northing
-    y = N0 + k0 * (
-        M +
-        N * tan_phi * (
-            A**2 / 2 +
-            (5 - T + 9*C + 4*C*C) * A**4 / 24 +
-            (61 - 58*T + T*T + 600*C - 330*e2/(1-e2)) * A**6 / 720
-        )
-    )
+def tile_mb(tiles_dir):
+    """Durchschnittliche Größe einer konvertierten Kachel (.bin.gz, ohne Overviews) in MB, None ohne Tiles"""
+    sizes = [path.stat().st_size for path in loose_tiles(tiles_dir, 'gz').values()]
+    return sum(sizes) / len(sizes) / (1024 * 1024) if sizes else None
 
-    return x, y
 
+def write_tile_list(output_file, tiles, turbine_count, radius):
+    """Schreibt die Tile-Liste im Format für download_laz.py / convert_all_laz.py"""
+    with open(output_file, 'w') as f:
+        f.write("# Windrad AR - Benötigte Höhendaten-Tiles (KORRIGIERT)\n")
+        f.write(f"# Generiert: {date.today().isoformat()} (mit korrekter UTM-Konvertierung)\n")
+        f.write(f"# Anzahl WKAs: {turbine_count}\n")
+        f.write(f"# Sichtradius: {radius / 1000:g} km (nur Kacheln, die den Kreis schneiden)\n")
+        f.write(f"# Anzahl Tiles: {len(tiles)}\n")
+        f.write("#\n")
+        f.write("# Verwendung:\n")
+        f.write("#   python3 download_laz.py windrad-tiles.txt --yes\n")
+        f.write("#   python3 laz_to_binary.py input.laz --tile-list windrad-tiles.txt\n")
+        f.write("#\n\n")
 
-def get_required_tiles(lat, lng, radius_km=3):
-    """Get all tiles within radius of a point"""
-    x, y = wgs84_to_utm33(lat, lng)
-    radius_m = radius_km * 1000
+        for tile in tiles:
+            f.write(tile + '\n')
 
-    # Bounding box
-    min_x = x - radius_m
-    max_x = x + radius_m
-    min_y = y - radius_m
-    max_y = y + radius_m
 
-    # Tile IDs (1km x 1km tiles)
-    min_tile_x = int(min_x // 1000)
-    max_tile_x = int(max_x // 1000)
-    min_tile_y = int(min_y // 1000)
-    max_tile_y = int(max_y // 1000)
+def main():
+    import argparse
 
-    tiles = set()
-    for tile_x in range(min_tile_x, max_tile_x + 1):
-        for tile_y in range(min_tile_y, max_tile_y + 1):
-            tiles.add(f"tile_{tile_x}_{tile_y}.bin")
+    config = load_config()
 
-    return tiles
+    parser = argparse.ArgumentParser(
+        description="Generate the list of height tiles within the view radius of every turbine",
+        epilog="Beispiel: python3 generate_correct_tiles.py --radius 3000"
+    )
+    parser.add_argument("-t", "--turbines", help="Turbine CSV (default: paths.turbines)")
+    parser.add_argument("-o", "--output", help="Tile list (default: paths.tile_list)")
+    parser.add_argument("-r", "--radius", type=float,
+                        default=config.get('visibility', {}).get('radius', DEFAULT_RADIUS),
+                        help=f"View radius in meters (default: visibility.radius or {DEFAULT_RADIUS})")
 
+    args = parser.parse_args()
 
-# Windrad coordinates from windraeder.csv
-windraeder = [
-    {"name": "Test-Laubsdorf", "lat": 51.654580371640826, "lon": 14.41783905029297},
-    {"name": "Acker", "lat": 51.67112586229757, "lon": 14.431936740875246},
-    {"name": "Kathlow", "lat": 51.763929032538854, "lon": 14.493198394775392},
-    {"name": "Richtung Roggosen", "lat": 51.690499516603225, "lon": 14.451913833618166}
-]
+    output_file = Path(args.output) if args.output else config_path(config, 'tile_list', '../tiles/windrad-tiles.txt')
 
-print("🌍 Windrad AR - Korrekte Tile-Berechnung")
-print("=" * 60)
-print()
+    try:
+        turbines = load_turbines(args.turbines)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
 
-all_tiles = set()
-radius_km = 3
+    print("🌍 Windrad AR - Korrekte Tile-Berechnung")
+    print("=" * 60)
+    print()
 
-for wka in windraeder:
-    x, y = wgs84_to_utm33(wka['lat'], wka['lon'])
-    print(f"📍 {wka['name']}")
-    print(f"   WGS84: {wka['lat']:.6f}°N, {wka['lon']:.6f}°E")
-    print(f"   UTM33: {x:.1f}m E, {y:.1f}m N")
+    xs, ys = wgs84_to_utm33([t['lat'] for t in turbines], [t['lon'] for t in turbines])
 
-    tile_x = int(x // 1000)
-    tile_y = int(y // 1000)
-    print(f"   Tile:  {tile_x}_{tile_y}")
-    print()
+    all_tiles = set()
+    square_tiles = set()
+
+    for turbine, x, y in zip(turbines, xs.tolist(), ys.tolist()):
+        print(f"📍 {turbine['name']}")
+        print(f"   WGS84: {turbine['lat']:.6f}°N, {turbine['lon']:.6f}°E")
+        print(f"   UTM33: {x:.1f}m E, {y:.1f}m N")
+        print(f"   Tile:  {int(x // TILE_SIZE)}_{int(y // TILE_SIZE)}")
 
-    tiles = get_required_tiles(wka['lat'], wka['lon'], radius_km)
-    all_tiles.update(tiles)
+        circle, square = get_required_tiles(x, y, args.radius)
+        print(f"   Tiles: {len(circle)} im Kreis (Quadrat: {len(square)})")
+        print()
 
-print("=" * 60)
-print(f"📦 Gesamt: {len(all_tiles)} Tiles für {len(windraeder)} WKAs ({radius_km} km Radius)")
-print()
+        all_tiles.update(circle)
+        square_tiles.update(square)
 
-# Sort tiles
-sorted_tiles = sorted(all_tiles)
+    print("=" * 60)
+    print(f"📦 Gesamt: {len(all_tiles)} Tiles für {len(turbines)} WKAs ({args.radius / 1000:g} km Radius)")
 
-# Extract tile IDs to check range
-tile_coords = []
-for tile in sorted_tiles:
-    parts = tile.replace('.bin', '').split('_')
-    if len(parts) == 3:
-        tile_coords.append((int(parts[1]), int(parts[2])))
+    saved = len(square_tiles) - len(all_tiles)
+    saved_mb = saved * LAZ_MB_PER_TILE
+    converted_mb = tile_mb(config_path(config, 'tiles_output', '../tiles_output'))
+    detail = f"~{saved_mb} MB LAZ-Download"
+    if converted_mb is not None:
+        detail += f", ~{saved * converted_mb:.0f} MB Tiles für Konvertierung/Upload"
+    print(f"✂️  Gespart: {saved} von {len(square_tiles)} Tiles des umschließenden Quadrats ({detail})")
+    print()
+
+    # Sort tiles
+    sorted_tiles = sorted(all_tiles)
+
+    if sorted_tiles:
+        coords = np.array([[int(part) for part in tile[len("tile_"):-len(".bin")].split('_')]
+                           for tile in sorted_tiles])
+        min_x, min_y = coords.min(axis=0)
+        max_x, max_y = coords.max(axis=0)
+        lat, lon = utm33_to_wgs84([min_x * TILE_SIZE, (max_x + 1) * TILE_SIZE],
+                                  [min_y * TILE_SIZE, (max_y + 1) * TILE_SIZE])
 
-if tile_coords:
-    min_x = min(c[0] for c in tile_coords)
-    max_x = max(c[0] for c in tile_coords)
-    min_y = min(c[1] for c in tile_coords)
-    max_y = max(c[1] for c in tile_coords)
+        print(f"📊 Tile-Bereich:")
+        print(f"   X: {min_x} - {max_x} (UTM {min_x}km - {max_x}km E)")
+        print(f"   Y: {min_y} - {max_y} (UTM {min_y}km - {max_y}km N)")
+        print(f"   WGS84: {lat[0]:.4f}°N {lon[0]:.4f}°E – {lat[1]:.4f}°N {lon[1]:.4f}°E")
+        print()
 
-    print(f"📊 Tile-Bereich:")
-    print(f"   X: {min_x} - {max_x} (UTM {min_x}km - {max_x}km E)")
-    print(f"   Y: {min_y} - {max_y} (UTM {min_y}km - {max_y}km N)")
+    write_tile_list(output_file, sorted_tiles, len(turbines), args.radius)
+
+    print(f"✅ Tile-Liste gespeichert: {output_file}")
     print()
+    print("🔄 Nächster Schritt:")
+    print(f"   python3 scripts/download_laz.py {output_file} --yes")
+
 
-# Write to file
-output_file = "../tiles/windrad-tiles.txt"
-
-with open(output_file, 'w') as f:
-    f.write("# Windrad AR - Benötigte Höhendaten-Tiles (KORRIGIERT)\n")
-    f.write(f"# Generiert: 2026-02-14 (mit korrekter UTM-Konvertierung)\n")
-    f.write(f"# Anzahl WKAs: {len(windraeder)}\n")
-    f.write(f"# Sichtradius: {radius_km} km\n")
-    f.write(f"# Anzahl Tiles: {len(all_tiles)}\n")
-    f.write("#\n")
-    f.write("# Verwendung:\n")
-    f.write("#   python3 download_laz.py windrad-tiles.txt --yes\n")
-    f.write("#   python3 laz_to_binary.py input.laz --tile-list windrad-tiles.txt\n")
-    f.write("#\n\n")
-
-    for tile in sorted_tiles:
-        f.write(tile + '\n')
-
-print(f"✅ Tile-Liste gespeichert: {output_file}")
-print()
-print("🔄 Nächster Schritt:")
-print("   python3 scripts/download_laz.py tiles/windrad-tiles.txt --yes")
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,28 @@ Konvertiert LAZ-Dateien zu kompaktem Binary-Format:
 - ~500 KB mit GZIP
 """
 
+import io
+import os
 import sys
+import json
+import mmap
 import struct
 import gzip
+import time
+import zipfile
+import contextlib
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: keine Dateisperren, nur sequentiell sicher
+    fcntl = None
+
 try:
     import laspy
     import numpy as np
@@ -24,6 +41,59 @@ except ImportError:
     print("  pip install laspy numpy")
     sys.exit(1)
 
+from tile_format import encode_tile, decode_tile
+from tile_manifest import load_manifest, locked_manifest, source_fingerprint, record_tile
+from tile_archive import sync_archive, DEFAULT_ARCHIVE_NAME
+
+# Optional: exakter Nearest-Neighbour-Fill über Distanztransformation
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+# Optional: zusätzliche Kompressionsformate (.bin.zst / .bin.br)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Version des Konverters (im Manifest). Erhöhen, wenn sich der Inhalt der
+# erzeugten Tiles ändert, damit inkrementelle Läufe alles neu bauen.
+CONVERTER_VERSION = "2.0"
+
+# Strategien für das Füllen von Lücken (Zellen ohne Punkte)
+FILL_STRATEGIES = ('ring', 'iterative', 'nearest', 'none')
+DEFAULT_FILL_ITERATIONS = 10
+
+# Ausgabeformate pro Tile: bin = roh, gz/zst/br = komprimiert (tile_X_Y.bin.<fmt>),
+# v2 = Delta-kodiert mit Header (tile_X_Y.v2, siehe tile_format.py)
+TILE_FORMATS = ('bin', 'gz', 'zst', 'br', 'v2')
+DEFAULT_TILE_FORMATS = ('bin', 'gz')
+DEFAULT_GZIP_LEVEL = 9
+
+# Übersichtsstufen (Max-Pooling): Stufe k hat die 2^k-fache Zellgröße,
+# z.B. tile_X_Y_2m.bin, tile_X_Y_4m.bin, tile_X_Y_8m.bin bei 1 m Auflösung
+DEFAULT_OVERVIEW_LEVELS = 3
+ZSTD_LEVEL = 19
+BROTLI_QUALITY = 11
+
+# Unterverzeichnis im Output mit den ungefüllten DSM-Maxima pro Tile
+ACCUMULATOR_DIR = ".dsm_accumulator"
+
+# Halo-Tiles (optional): jede Kachel zusätzlich mit einem Rand von N Zellen
+# aus den Nachbarkacheln unter halo/v<Version>-h<N>/, damit eine bilineare
+# Interpolation am Kachelrand nur noch eine Kachel braucht. Version erhöhen,
+# wenn sich Aufbau oder Ursprung der Halo-Tiles ändern.
+HALO_LAYOUT_VERSION = 1
+HALO_DIR = "halo"
+HALO_LOCK = ".halo.lock"
+DEFAULT_HALO = 1
+
 
 def load_tile_list(tile_list_file):
     """
@@ -45,7 +115,836 @@ def load_tile_list(tile_list_file):
     return tiles
 
 
-def laz_to_height_grid(laz_file, output_dir, tile_size=1000, resolution=1.0, tile_filter=None):
+class MappedZipMember(io.RawIOBase):
+    """
+    Lesbare, seekbare Sicht auf einen unkomprimierten (STORED) ZIP-Eintrag
+
+    Liest direkt aus dem memory-mapped Archiv – keine entpackte Kopie auf der
+    Platte und keine Kopie im Speicher. laspy/lazrs können darin frei seeken
+    (z.B. zur LAZ-Chunk-Tabelle am Dateiende).
+    """
+
+    def __init__(self, archive_path, info):
+        super().__init__()
+        self._file = open(archive_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Lokaler Header: 30 Bytes + Dateiname + Extra-Feld, danach die Daten
+        name_len, extra_len = struct.unpack_from('<HH', self._map, info.header_offset + 26)
+        self._start = info.header_offset + 30 + name_len + extra_len
+        self._size = info.file_size
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, buffer):
+        count = max(0, min(len(buffer), self._size - self._pos))
+        start = self._start + self._pos
+        buffer[:count] = self._map[start:start + count]
+        self._pos += count
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+            self._file.close()
+        super().close()
+
+
+def point_cloud_member(archive):
+    """
+    Sucht die Punktwolke (.laz/.las) in einem ZIP-Archiv
+
+    Raises:
+        ValueError: Keine oder mehrere Punktwolken im Archiv
+    """
+    members = [info for info in archive.infolist()
+               if info.filename.lower().endswith(('.laz', '.las')) and not info.is_dir()]
+    if len(members) != 1:
+        raise ValueError(f"{archive.filename}: {len(members)} LAZ/LAS-Dateien im Archiv (erwartet: 1)")
+    return members[0]
+
+
+@contextlib.contextmanager
+def open_point_cloud(path):
+    """
+    Öffnet eine LAS/LAZ-Datei oder die LAZ-Datei in einem ZIP-Archiv (als_33X-Y.zip)
+
+    ZIP-Archive werden nicht entpackt: Unkomprimierte Einträge werden über
+    mmap gelesen, komprimierte (Deflate) einmal in den Speicher entpackt.
+
+    Yields:
+        laspy.LasReader
+    """
+    path = Path(path)
+    if path.suffix.lower() != '.zip':
+        with laspy.open(path) as reader:
+            yield reader
+        return
+
+    with zipfile.ZipFile(path) as archive:
+        info = point_cloud_member(archive)
+        if info.compress_type == zipfile.ZIP_STORED:
+            stream = MappedZipMember(path, info)
+        else:
+            stream = io.BytesIO(archive.read(info))
+
+    with laspy.open(stream) as reader:
+        yield reader
+
+
+def tile_grid(header, tile_size=1000):
+    """
+    Kachel-Raster, das die Bounds einer LAZ-Datei abdeckt
+
+    Args:
+        header: laspy-Header (x_min, x_max, y_min, y_max)
+        tile_size: Kachel-Größe in Metern
+
+    Returns:
+        (tile_xs, tile_ys): ranges der unteren linken Kachel-Ecken (UTM, Meter)
+    """
+    x_min = int(header.x_min / tile_size) * tile_size
+    y_min = int(header.y_min / tile_size) * tile_size
+    x_max = int(np.ceil(header.x_max / tile_size)) * tile_size
+    y_max = int(np.ceil(header.y_max / tile_size)) * tile_size
+
+    return range(int(x_min), int(x_max), tile_size), range(int(y_min), int(y_max), tile_size)
+
+
+def tile_name_for(tile_x, tile_y):
+    """Tile-Name (wie in der Tile-Liste) zur unteren linken Kachel-Ecke"""
+    return f"tile_{int(tile_x / 1000)}_{int(tile_y / 1000)}.bin"
+
+
+def conversion_params(tile_size=1000, resolution=1.0, fill_strategy='ring', fill_iterations=DEFAULT_FILL_ITERATIONS,
+                      formats=DEFAULT_TILE_FORMATS, overview_levels=DEFAULT_OVERVIEW_LEVELS, halo=0):
+    """Parameter, die Inhalt und Dateien eines Tiles bestimmen (Vergleich im Manifest)"""
+    params = {
+        'version': CONVERTER_VERSION,
+        'tile_size': tile_size,
+        'resolution': resolution,
+        'fill': fill_strategy,
+        'fill_iterations': fill_iterations,
+        'formats': sorted(formats),
+        'overview_levels': overview_levels,
+    }
+    # Nur mit Halo eingetragen: bestehende Manifeste bleiben ohne Halo gültig
+    if halo:
+        params['halo'] = halo
+    return params
+
+
+def plan_incremental(laz_files, output_dir, params, tile_filter=None, force=False):
+    """
+    Bestimmt, welche Tiles pro LAZ-Datei (neu) konvertiert werden müssen
+
+    Ein Tile ist für eine Datei aktuell, wenn das Manifest dieselben
+    Parameter und denselben Inhalt (SHA-256) der Datei verzeichnet und das
+    Tile auf der Platte liegt. Neue Quellen werden per Merge ergänzt.
+
+    Hat sich eine Quelle oder haben sich die Parameter geändert, wird das
+    Tile zurückgesetzt (Akkumulator + Manifest-Eintrag gelöscht): Dann müssen
+    alle Quellen des Tiles erneut beitragen. Quellen, die in laz_files
+    enthalten sind, werden automatisch eingeplant; für andere gibt es eine
+    Warnung.
+
+    Args:
+        laz_files: Liste von LAZ-Paths (ein Batch)
+        output_dir: Ausgabe-Verzeichnis der Tiles
+        params: Siehe conversion_params
+        tile_filter: Set mit Tile-Namen (optional)
+        force: Alle Tiles neu konvertieren (Manifest wird trotzdem geführt)
+
+    Nicht lesbare Dateien (defekte Signatur, abgeschnitten, ZIP ohne oder
+    mit mehreren LAZ) brechen die Planung nicht ab: Sie landen in errors
+    und fehlen in plan, die übrigen Dateien werden normal geplant.
+
+    Returns:
+        (plan, fingerprints, errors): plan = {laz_file: set(tile_names)},
+        fingerprints = {laz_file: source_fingerprint},
+        errors = {laz_file: Fehlermeldung}
+    """
+    output_dir = Path(output_dir)
+    manifest = load_manifest(output_dir)
+    tile_size = params['tile_size']
+
+    plan = {}
+    fingerprints = {}
+    coverage = {}
+    resets = set()
+    errors = {}
+
+    for laz_file in laz_files:
+        try:
+            with open_point_cloud(laz_file) as reader:
+                tile_xs, tile_ys = tile_grid(reader.header, tile_size)
+            fingerprint = source_fingerprint(laz_file, manifest)
+        except Exception as e:
+            errors[laz_file] = f"{type(e).__name__}: {e}"
+            continue
+
+        fingerprints[laz_file] = fingerprint
+        stale = set()
+
+        for tile_x in tile_xs:
+            for tile_y in tile_ys:
+                name = tile_name_for(tile_x, tile_y)
+                if tile_filter and name not in tile_filter:
+                    continue
+                coverage.setdefault(name, set()).add(laz_file)
+
+                entry = manifest['tiles'].get(name)
+                source = entry['sources'].get(laz_file.name) if entry else None
+
+                if entry and entry['params'] != params:
+                    resets.add(name)                    # Parameter/Version geändert
+                elif source and source['sha256'] != fingerprint['sha256']:
+                    resets.add(name)                    # Quelle geändert
+                elif source and source['points'] and not all(
+                        (output_dir / output).exists() for output in tile_outputs(name, params)):
+                    resets.add(name)                    # Tile gelöscht
+                elif source is None or force:
+                    stale.add(name)                     # Neue Quelle (Merge)
+
+        plan[laz_file] = stale
+
+    if resets:
+        with locked_manifest(output_dir) as locked:
+            for name in sorted(resets):
+                entry = locked['tiles'].pop(name, None)
+                (output_dir / ACCUMULATOR_DIR / name.replace('.bin', '.f32')).unlink(missing_ok=True)
+
+                # Alle Quellen des Tiles im Batch tragen erneut bei
+                for laz_file in coverage[name]:
+                    plan[laz_file].add(name)
+
+                batch = {laz_file.name for laz_file in coverage[name]}
+                missing = sorted(set(entry['sources']) - batch) if entry else []
+                if missing:
+                    print(f"⚠️  {name} zurückgesetzt – bitte auch neu konvertieren: {', '.join(missing)}")
+
+    return plan, fingerprints, errors
+
+
+def partition_points(x, y, origin_x, origin_y, tiles_x, tiles_y, tile_size=1000, tile_mask=None):
+    """
+    Ordnet alle Punkte in einem Durchlauf ihren Kacheln zu
+
+    Statt pro Kachel eine Maske über alle Punkte zu berechnen, wird die
+    Tile-ID jedes Punkts einmal bestimmt und die Punkte per (stabilem)
+    argsort nach Tile-ID gruppiert. Die Zuordnung entspricht exakt dem
+    Vergleich tile_x <= x < tile_x + tile_size.
+
+    Args:
+        x, y: Koordinaten-Arrays der Punkte
+        origin_x, origin_y: Untere linke Ecke der ersten Kachel (UTM, Meter)
+        tiles_x, tiles_y: Anzahl Kacheln in X- und Y-Richtung
+        tile_size: Kachel-Größe in Metern
+        tile_mask: Bool-Array (tiles_x * tiles_y), False = Kachel überspringen (optional)
+
+    Returns:
+        (order, offsets): Die Punkte der Kachel k (k = ix * tiles_y + iy)
+        sind order[offsets[k]:offsets[k + 1]]
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n_tiles = tiles_x * tiles_y
+
+    ix = np.floor((x - origin_x) / tile_size).astype(np.int64)
+    iy = np.floor((y - origin_y) / tile_size).astype(np.int64)
+
+    # Rundungsfehler der Division an Kachelgrenzen korrigieren
+    ix -= x < origin_x + ix * tile_size
+    ix += x >= origin_x + (ix + 1) * tile_size
+    iy -= y < origin_y + iy * tile_size
+    iy += y >= origin_y + (iy + 1) * tile_size
+
+    inside = (ix >= 0) & (ix < tiles_x) & (iy >= 0) & (iy < tiles_y)
+    tile_ids = ix * tiles_y + iy
+    if tile_mask is not None:
+        inside &= tile_mask[np.where(inside, tile_ids, 0)]
+
+    points = np.flatnonzero(inside)
+    # Kleine ID-Typen erlauben numpy den linearen Radix-Sort
+    id_dtype = np.uint16 if n_tiles <= np.iinfo(np.uint16).max else np.int64
+    point_ids = tile_ids[points].astype(id_dtype)
+
+    order = points[np.argsort(point_ids, kind='stable')]
+    offsets = np.zeros(n_tiles + 1, dtype=np.int64)
+    np.cumsum(np.bincount(point_ids, minlength=n_tiles), out=offsets[1:])
+
+    return order, offsets
+
+
+def rasterize_dsm(x, y, z, tile_x, tile_y, tile_size=1000, resolution=1.0, out=None):
+    """
+    Rastert Punkte in ein DSM-Grid (höchster Punkt pro Zelle gewinnt)
+
+    Vektorisierte Variante der früheren Punkt-für-Punkt-Schleife: Zellindizes
+    per NumPy-Indexarithmetik, Maximum per Scatter-Reduktion (np.maximum.at).
+    Liefert bitgenau dasselbe Ergebnis wie die Schleife (Zellen ohne Punkte
+    und Zellen mit nur negativen Höhen bleiben 0).
+
+    Args:
+        x, y, z: Koordinaten-Arrays der Punkte (gleiche Länge)
+        tile_x, tile_y: Untere linke Ecke der Kachel (UTM, Meter)
+        tile_size: Kachel-Größe in Metern
+        resolution: Auflösung in Metern
+        out: Bestehendes float32-Grid, in das die Punkte per Maximum
+             eingerechnet werden (laufendes Maximum beim Streaming, optional)
+
+    Returns:
+        float32-Array (grid_size × grid_size), Höhen in Metern
+    """
+    grid_size = int(tile_size / resolution)
+    if out is None:
+        out = np.zeros((grid_size, grid_size), dtype=np.float32)
+    dsm = out.reshape(-1)
+
+    if len(z) == 0:
+        return out
+
+    # Grid-Position (astype truncatet wie int()), an Grid-Grenzen clampen
+    grid_x = ((np.asarray(x) - tile_x) / resolution).astype(np.int64)
+    grid_y = ((np.asarray(y) - tile_y) / resolution).astype(np.int64)
+    np.clip(grid_x, 0, grid_size - 1, out=grid_x)
+    np.clip(grid_y, 0, grid_size - 1, out=grid_y)
+
+    # Höchster Punkt gewinnt (DSM). float32-Rundung ist monoton, daher ist
+    # max(float32(z)) == float32(max(z)) wie bei der Zuweisung in der Schleife.
+    np.maximum.at(dsm, grid_y * grid_size + grid_x, np.asarray(z, dtype=np.float32))
+
+    return out
+
+
+def _fill_ring(dsm):
+    """
+    Füllt leere Zellen mit dem Mittel ihrer gültigen 3×3-Nachbarn (in-place)
+
+    Maskierte Faltung über verschobene Slices: Summe und Anzahl gültiger
+    Nachbarn werden für alle Zellen gleichzeitig berechnet.
+
+    Returns:
+        Anzahl gefüllter Zellen
+    """
+    valid = dsm > 0
+    height, width = dsm.shape
+
+    values = np.pad(np.where(valid, dsm, 0).astype(np.float64), 1)
+    counts = np.pad(valid, 1).astype(np.uint8)
+
+    total = np.zeros((height, width), dtype=np.float64)
+    count = np.zeros((height, width), dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            total += values[dy:dy + height, dx:dx + width]
+            count += counts[dy:dy + height, dx:dx + width]
+
+    holes = ~valid & (count > 0)
+    dsm[holes] = total[holes] / count[holes]
+    return int(np.count_nonzero(holes))
+
+
+def _nearest_valid_indices(valid):
+    """
+    Index der nächsten gültigen Zelle für jede Zelle (exakt euklidisch, ohne SciPy)
+
+    Zweistufige Distanztransformation nach Meijster et al. in linearer Zeit:
+    erst je Spalte die nächste gültige Zeile (vorwärts/rückwärts kumuliert),
+    dann je Zeile die untere Hülle der Parabeln (x - i)² + g(i)². Im zweiten
+    Schritt laufen alle Zeilen als Vektor parallel. Gerechnet wird in int64,
+    damit auch große Grids nicht überlaufen.
+
+    Returns:
+        (iy, ix) als int64-Arrays in Gridgröße
+    """
+    height, width = valid.shape
+    rows = np.arange(height, dtype=np.int64)[:, None]
+
+    # 1. Schritt: nächste gültige Zeile je Spalte. Spalten ohne gültige Zelle
+    # bekommen einen Abstand, der größer ist als jeder echte.
+    never = height + width
+    above = np.where(valid, rows, -never)
+    np.maximum.accumulate(above, axis=0, out=above)
+    below = np.where(valid, rows, 2 * never)
+    below = np.minimum.accumulate(below[::-1], axis=0)[::-1]
+    col_y = np.where(rows - above <= below - rows, above, below)
+    # Spaltenweise abgelegt: g2[x] ist der Vektor über alle Zeilen
+    g2 = np.ascontiguousarray(np.minimum((col_y - rows) ** 2, never * never).T)
+
+    # 2. Schritt: Stack der Parabeln (Scheitel s, Beginn t) je Zeile, q = Spitze
+    lanes = np.arange(height, dtype=np.int64)
+    s = np.zeros((width, height), dtype=np.int64)
+    t = np.zeros((width, height), dtype=np.int64)
+    s_flat, t_flat, g2_flat = s.ravel(), t.ravel(), g2.ravel()
+    q = np.zeros(height, dtype=np.int64)
+    for u in range(1, width):
+        g2_u = g2[u]
+        # Parabeln von der Spitze entfernen, die die neue ab t vollständig verdeckt
+        active = lanes
+        while active.size:
+            top = q[active] * height + active
+            top_s = s_flat[top]
+            top_t = t_flat[top]
+            pop = (top_t - top_s) ** 2 + g2_flat[top_s * height + active] > (top_t - u) ** 2 + g2_u[active]
+            active = active[pop]
+            q[active] -= 1
+            active = active[q[active] >= 0]
+        empty = q < 0
+        q[empty] = 0
+        s[0, empty] = u
+        t[0, empty] = 0
+        # Sonst ab dem Schnittpunkt sep mit der Spitze auf den Stack legen
+        top_s = s_flat[q * height + lanes]
+        sep = 1 + (u * u - top_s * top_s + g2_u - g2_flat[top_s * height + lanes]) // np.maximum(2 * (u - top_s), 1)
+        push = ~empty & (sep < width)
+        q[push] += 1
+        top = q[push] * height + lanes[push]
+        s_flat[top] = u
+        t_flat[top] = sep[push]
+
+    ix = np.empty((width, height), dtype=np.int64)
+    for u in range(width - 1, -1, -1):
+        top = q * height + lanes
+        ix[u] = s_flat[top]
+        q -= t_flat[top] == u
+    ix = ix.T
+    return col_y[rows, ix], ix
+
+
+def _fill_nearest(dsm):
+    """
+    Füllt leere Zellen mit dem Wert der nächsten gültigen Zelle (in-place)
+
+    Exakt über die euklidische Distanztransformation – mit SciPy über
+    ndimage, sonst über _nearest_valid_indices (ebenfalls linear, etwa
+    0,1–0,3 s pro 1000²-Tile).
+    """
+    valid = dsm > 0
+    if valid.all() or not valid.any():
+        return
+
+    if ndimage is not None:
+        iy, ix = ndimage.distance_transform_edt(~valid, return_distances=False, return_indices=True)
+    else:
+        iy, ix = _nearest_valid_indices(valid)
+    dsm[...] = dsm[iy, ix]
+
+
+def fill_gaps(dsm, strategy='ring', max_iterations=DEFAULT_FILL_ITERATIONS):
+    """
+    Füllt Lücken im DSM-Grid (Zellen mit Wert 0) in-place
+
+    Strategien:
+        ring:      Ein Ring – Mittel der gültigen 3×3-Nachbarn
+        iterative: Ring-Füllen wiederholt, bis zu max_iterations Zellen tief
+        nearest:   Jede Lücke bekommt den Wert der nächsten gültigen Zelle
+                   (füllt auch große Löcher wie Gewässer vollständig)
+        none:      Keine Lückenfüllung
+
+    Args:
+        dsm: float32-Grid (wird verändert)
+        strategy: Eine der FILL_STRATEGIES
+        max_iterations: Maximale Tiefe für 'iterative'
+
+    Returns:
+        Das gefüllte Grid (dasselbe Objekt wie dsm)
+    """
+    if strategy not in FILL_STRATEGIES:
+        raise ValueError(f"Unbekannte Fill-Strategie: {strategy} (erlaubt: {', '.join(FILL_STRATEGIES)})")
+
+    if strategy == 'ring':
+        _fill_ring(dsm)
+    elif strategy == 'iterative':
+        for _ in range(max_iterations):
+            if not _fill_ring(dsm):
+                break
+    elif strategy == 'nearest':
+        _fill_nearest(dsm)
+
+    return dsm
+
+
+def tile_file_name(tile_name, fmt):
+    """Dateiname eines Tiles im gegebenen Format (tile_X_Y.bin, tile_X_Y.bin.gz, tile_X_Y.v2, ...)"""
+    if fmt == 'bin':
+        return tile_name
+    if fmt == 'v2':
+        return tile_name[:-len(".bin")] + ".v2"
+    return f"{tile_name}.{fmt}"
+
+
+def overview_name(tile_name, resolution):
+    """Dateiname einer Übersichtsstufe, z.B. tile_459_5722.bin → tile_459_5722_4m.bin"""
+    return f"{tile_name[:-len('.bin')]}_{resolution:g}m.bin"
+
+
+def overview_resolutions(resolution, levels):
+    """Zellgrößen der Übersichtsstufen (2×, 4×, ... der Basisauflösung)"""
+    return [resolution * 2 ** level for level in range(1, levels + 1)]
+
+
+def halo_dir_name(halo):
+    """Unterverzeichnis der Halo-Tiles (relativ zum Output), z.B. halo/v1-h1"""
+    return f"{HALO_DIR}/v{HALO_LAYOUT_VERSION}-h{halo}"
+
+
+def tile_outputs(tile_name, params):
+    """Alle Dateien, die ein Tile mit diesen Parametern erzeugt (Basis + Übersichten + Halo)"""
+    names = [tile_name] + [overview_name(tile_name, res)
+                           for res in overview_resolutions(params['resolution'], params['overview_levels'])]
+    if params.get('halo'):
+        names.append(f"{halo_dir_name(params['halo'])}/{tile_name}")
+    return [tile_file_name(name, fmt) for name in names for fmt in params['formats']]
+
+
+def max_pool(grid):
+    """
+    Halbiert die Auflösung per 2×2-Maximum
+
+    Das Maximum hält die DSM-Semantik konservativ: Ein Hindernis verschwindet
+    in gröberen Stufen nie, es wird höchstens breiter. Ungerade Ränder werden
+    mit 0 (nodata) aufgefüllt.
+    """
+    rows, cols = grid.shape
+    padded = np.pad(grid, ((0, rows % 2), (0, cols % 2)))
+    return padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).max(axis=(1, 3))
+
+
+def build_overviews(grid, levels):
+    """
+    Baut die Übersichtspyramide eines Tiles
+
+    Returns:
+        Liste der Grids für Stufe 1..levels (jeweils halbe Kantenlänge)
+    """
+    overviews = []
+    for _ in range(levels):
+        grid = max_pool(grid)
+        overviews.append(grid)
+    return overviews
+
+
+def check_tile_formats(formats):
+    """
+    Prüft, ob alle Ausgabeformate verfügbar sind
+
+    Raises:
+        ValueError: Unbekanntes Format oder fehlende optionale Dependency
+    """
+    for fmt in formats:
+        if fmt not in TILE_FORMATS:
+            raise ValueError(f"Unbekanntes Tile-Format: {fmt} (erlaubt: {', '.join(TILE_FORMATS)})")
+        if fmt == 'zst' and zstandard is None:
+            raise ValueError("Format 'zst' benötigt: pip install zstandard")
+        if fmt == 'br' and brotli is None:
+            raise ValueError("Format 'br' benötigt: pip install brotli")
+
+
+def compress_tile(data, fmt, gzip_level=DEFAULT_GZIP_LEVEL):
+    """
+    Komprimiert ein Tile im Speicher
+
+    Args:
+        data: Rohdaten (bytes / bytes-like)
+        fmt: Eines der TILE_FORMATS
+        gzip_level: GZIP-Kompressionsstufe 1-9
+
+    Returns:
+        bytes
+    """
+    if fmt == 'bin':
+        return bytes(data)
+    if fmt == 'gz':
+        # mtime=0: gleiche Daten → gleiche Datei (stabile ETags/Hashes)
+        return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    if fmt == 'zst':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if fmt == 'br':
+        return brotli.compress(bytes(data), quality=BROTLI_QUALITY)
+    raise ValueError(f"Unbekanntes Tile-Format: {fmt}")
+
+
+def write_tile(output_dir, tile_name, grid, formats=DEFAULT_TILE_FORMATS, gzip_level=DEFAULT_GZIP_LEVEL,
+               origin=(0, 0), resolution=1.0):
+    """
+    Schreibt ein Tile in allen gewünschten Formaten direkt aus dem Speicher
+
+    Jede Variante wird einmal aus dem In-Memory-Puffer komprimiert und über
+    eine temporäre Datei atomar ersetzt, damit Leser nie ein halb
+    geschriebenes Tile sehen. Kein Zwischenschritt über die .bin-Datei.
+
+    Args:
+        output_dir: Ausgabe-Verzeichnis
+        tile_name: z.B. "tile_459_5722.bin"
+        grid: Uint16-Grid des Tiles (Höhen in cm)
+        formats: Auswahl aus TILE_FORMATS
+        gzip_level: GZIP-/Deflate-Kompressionsstufe 1-9
+        origin: UTM33-Ecke (x, y) für den v2-Header
+        resolution: Grid-Auflösung für den v2-Header
+
+    Returns:
+        Dict {Format: Dateigröße in Bytes}
+    """
+    data = grid.tobytes()
+    sizes = {}
+    for fmt in formats:
+        output_file = Path(output_dir) / tile_file_name(tile_name, fmt)
+        if fmt == 'v2':
+            payload = encode_tile(grid, origin[0], origin[1], resolution, level=gzip_level)
+        else:
+            payload = compress_tile(data, fmt, gzip_level)
+
+        tmp_file = output_file.with_name(output_file.name + ".tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_file, output_file)
+        sizes[fmt] = len(payload)
+    return sizes
+
+
+@contextlib.contextmanager
+def locked_accumulator(output_dir, tile_id_x, tile_id_y, grid_size):
+    """
+    Öffnet den Merge-Akkumulator eines Tiles (exklusiv gesperrt)
+
+    Der Akkumulator enthält das ungefüllte DSM-Maximum aller bisher
+    konvertierten LAZ-Dateien, die dieses Tile berühren, als float32
+    (memory-mapped). Neue Grids werden per Zell-Maximum eingerechnet; damit
+    ist das Ergebnis unabhängig von Reihenfolge und Parallelität der
+    Konvertierung. Die Sperre (flock) gilt, bis der Block verlassen wird,
+    sodass Zusammenführen und Schreiben des Tiles atomar sind.
+
+    Args:
+        output_dir: Ausgabe-Verzeichnis der Tiles
+        tile_id_x, tile_id_y: Tile-ID (km)
+        grid_size: Zellen pro Kante
+
+    Yields:
+        np.memmap (grid_size × grid_size, float32), 0 = keine Daten
+    """
+    acc_dir = Path(output_dir) / ACCUMULATOR_DIR
+    acc_dir.mkdir(exist_ok=True)
+    acc_file = acc_dir / f"tile_{tile_id_x}_{tile_id_y}.f32"
+    nbytes = grid_size * grid_size * 4
+
+    with open(acc_file, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            # Neu angelegt oder andere Auflösung → leerer Akkumulator
+            if os.fstat(f.fileno()).st_size != nbytes:
+                f.truncate(0)
+                f.truncate(nbytes)
+            acc = np.memmap(acc_file, dtype=np.float32, mode='r+', shape=(grid_size, grid_size))
+            try:
+                yield acc
+            finally:
+                acc.flush()
+                del acc
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_tile(tile_dir, tile_name, formats, grid_size):
+    """
+    Liest ein geschriebenes Tile im ersten vorhandenen Format
+
+    .bin wird bevorzugt und nur eingeblendet (memmap), sodass für Randstreifen
+    nur die berührten Seiten gelesen werden.
+
+    Returns:
+        Uint16-Grid (grid_size × grid_size, Zeile 0 = Süden) oder None
+    """
+    for fmt in sorted(formats, key=lambda fmt: fmt != 'bin'):
+        path = Path(tile_dir) / tile_file_name(tile_name, fmt)
+        try:
+            if fmt == 'bin':
+                return np.memmap(path, dtype='<u2', mode='r', shape=(grid_size, grid_size))
+            data = path.read_bytes()
+        except FileNotFoundError:
+            continue
+
+        if fmt == 'v2':
+            grid, _ = decode_tile(data)
+            return grid
+        if fmt == 'gz':
+            data = gzip.decompress(data)
+        elif fmt == 'zst':
+            data = zstandard.ZstdDecompressor().decompress(data)
+        elif fmt == 'br':
+            data = brotli.decompress(data)
+        return np.frombuffer(data, dtype='<u2').reshape(grid_size, grid_size)
+    return None
+
+
+def halo_grid(center, neighbour, halo):
+    """
+    Setzt ein Tile mit einem Rand aus den Nachbarkacheln zusammen
+
+    Args:
+        center: Uint16-Grid des Tiles (n × n, Zeile 0 = Süden)
+        neighbour: Funktion (dx, dy) → Grid der Nachbarkachel oder None
+            (dx = +1 Osten, dy = +1 Norden)
+        halo: Randbreite in Zellen
+
+    Returns:
+        Uint16-Grid (n + 2·halo)², Zeile 0 = Süden; Rand ohne
+        Nachbarkachel = 0 (nodata)
+    """
+    n = center.shape[0]
+    out = np.zeros((n + 2 * halo, n + 2 * halo), dtype=np.uint16)
+
+    # Richtung → (Ausschnitt der Quelle, Ziel im Halo-Grid) je Achse
+    spans = {
+        -1: (slice(n - halo, n), slice(0, halo)),
+        0: (slice(0, n), slice(halo, halo + n)),
+        1: (slice(0, halo), slice(halo + n, n + 2 * halo)),
+    }
+    for dy, (src_rows, dst_rows) in spans.items():
+        for dx, (src_cols, dst_cols) in spans.items():
+            grid = center if dx == dy == 0 else neighbour(dx, dy)
+            if grid is not None:
+                out[dst_rows, dst_cols] = grid[src_rows, src_cols]
+    return out
+
+
+def write_halo_layout(halo_dir, halo, tile_size, resolution, formats):
+    """Beschreibung des Halo-Layouts (layout.json) für Clients, nur bei Änderung neu geschrieben"""
+    layout = {
+        'layout_version': HALO_LAYOUT_VERSION,
+        'halo': halo,
+        'tile_size': tile_size,
+        'resolution': resolution,
+        'grid_size': int(tile_size / resolution) + 2 * halo,
+        'dtype': 'uint16le',
+        'unit': 'cm',
+        'nodata': 0,
+        'rows': 'south_to_north',
+        'origin': 'tile corner - halo * resolution',
+        'formats': sorted(formats),
+    }
+    layout_file = Path(halo_dir) / "layout.json"
+    text = json.dumps(layout, indent=2) + "\n"
+    if layout_file.exists() and layout_file.read_text() == text:
+        return
+    tmp_file = layout_file.with_name(layout_file.name + ".tmp")
+    tmp_file.write_text(text)
+    os.replace(tmp_file, layout_file)
+
+
+@contextlib.contextmanager
+def locked_halos(output_dir):
+    """
+    Exklusive Sperre (flock) für das Schreiben der Halo-Tiles
+
+    Ein Halo-Tile hängt von 9 Kacheln ab, die parallele Konverter gleichzeitig
+    schreiben können. Unter der Sperre liest jeder Konverter nach dem
+    Schreiben seiner Kachel den aktuellen Stand der Nachbarn; der zuletzt
+    laufende sieht damit alle Änderungen, und kein Halo bleibt veraltet.
+    """
+    with open(Path(output_dir) / HALO_LOCK, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def update_halo_tiles(output_dir, tile_x, tile_y, grid, halo, formats=DEFAULT_TILE_FORMATS,
+                      gzip_level=DEFAULT_GZIP_LEVEL, tile_size=1000, resolution=1.0):
+    """
+    Schreibt die Halo-Tiles einer neu geschriebenen Kachel und ihrer 8 Nachbarn
+
+    Die Randstreifen der Nachbarn ändern sich mit jeder neuen Kachel, deren
+    Halo-Tiles werden daher mit neu gebaut – aber nur geschrieben, wenn sich
+    ihr Inhalt tatsächlich ändert (keine unnötigen Uploads).
+
+    Args:
+        output_dir: Ausgabe-Verzeichnis der Tiles
+        tile_x, tile_y: UTM33-Ecke der Kachel (m)
+        grid: Uint16-Grid der Kachel (wie gerade geschrieben)
+        halo: Randbreite in Zellen
+        formats, gzip_level: wie write_tile
+        tile_size, resolution: Kachelgröße (m) und Auflösung (m)
+
+    Returns:
+        Anzahl geschriebener Halo-Tiles
+    """
+    grid_size = grid.shape[0]
+    halo_dir = Path(output_dir) / halo_dir_name(halo)
+    halo_dir.mkdir(parents=True, exist_ok=True)
+    write_halo_layout(halo_dir, halo, tile_size, resolution, formats)
+
+    loaded = {(0, 0): grid}
+
+    def load(dx, dy):
+        if (dx, dy) not in loaded:
+            name = tile_name_for(tile_x + dx * tile_size, tile_y + dy * tile_size)
+            loaded[dx, dy] = read_tile(output_dir, name, formats, grid_size)
+        return loaded[dx, dy]
+
+    written = 0
+    with locked_halos(output_dir):
+        for cx in (-1, 0, 1):
+            for cy in (-1, 0, 1):
+                center = load(cx, cy)
+                if center is None:
+                    continue
+                halo_tile = halo_grid(center, lambda dx, dy: load(cx + dx, cy + dy), halo)
+
+                name = tile_name_for(tile_x + cx * tile_size, tile_y + cy * tile_size)
+                if (cx, cy) != (0, 0):
+                    existing = read_tile(halo_dir, name, formats, grid_size + 2 * halo)
+                    if existing is not None and np.array_equal(existing, halo_tile):
+                        continue
+
+                origin = (tile_x + cx * tile_size - halo * resolution, tile_y + cy * tile_size - halo * resolution)
+                write_tile(halo_dir, name, halo_tile, formats, gzip_level, origin=origin, resolution=resolution)
+                written += 1
+    return written
+
+
+def peak_rss_mb():
+    """
+    Peak-Speicherverbrauch (Resident Set Size) dieses Prozesses in MB
+
+    Returns:
+        MB als float, oder None wenn nicht ermittelbar (Windows)
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: Linux in KB, macOS in Bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def laz_to_height_grid(laz_file, output_dir, tile_size=1000, resolution=1.0, tile_filter=None,
+                       fill_strategy='ring', fill_iterations=DEFAULT_FILL_ITERATIONS, chunk_size=None,
+                       merge=True, incremental=False, force=False, planned=None,
+                       formats=DEFAULT_TILE_FORMATS, gzip_level=DEFAULT_GZIP_LEVEL,
+                       overview_levels=DEFAULT_OVERVIEW_LEVELS, halo=0):
     """
     Konvertiert LAZ zu Height Grid
 
@@ -55,118 +954,217 @@ def laz_to_height_grid(laz_file, output_dir, tile_size=1000, resolution=1.0, til
         tile_size: Kachel-Größe in Metern (default: 1000m)
         resolution: Auflösung in Metern (default: 1m)
         tile_filter: Set mit Tile-Namen zum Filtern (optional)
+        fill_strategy: Lückenfüllung, eine der FILL_STRATEGIES (default: ring)
+        fill_iterations: Maximale Fülltiefe für 'iterative' (default: 10)
+        chunk_size: Punkte pro Chunk für Streaming (optional). Ohne Angabe wird
+            die ganze Datei geladen; mit Angabe hängt der Speicherbedarf nur
+            noch von Anzahl Tiles × Grid-Größe ab, nicht von der Punktzahl.
+        merge: Mit bereits konvertierten Daten desselben Tiles (aus anderen
+            LAZ-Dateien) per Zell-Maximum zusammenführen (default: True).
+            False ersetzt das Tile (und den Akkumulator) durch die Daten
+            dieser Datei.
+        incremental: Manifest führen und nur Tiles konvertieren, deren Quelle
+            oder Parameter sich geändert haben (siehe plan_incremental)
+        force: Mit incremental: alle Tiles neu konvertieren
+        planned: Mit incremental: bereits berechneter Plan (tile_names,
+            fingerprint) aus plan_incremental, z.B. vom Batch-Konverter
+        formats: Ausgabeformate, Auswahl aus TILE_FORMATS (default: bin, gz)
+        gzip_level: GZIP-Kompressionsstufe 1-9 (default: 9)
+        overview_levels: Anzahl Übersichtsstufen (2 m, 4 m, ... bei 1 m; 0 = keine)
+        halo: Zusätzlich Halo-Tiles mit so vielen Randzellen aus den
+            Nachbarkacheln schreiben (siehe update_halo_tiles; 0 = keine)
     """
     print(f"📂 Lade LAZ-Datei: {laz_file}")
 
     if tile_filter:
         print(f"🔍 Filter aktiv: Nur {len(tile_filter)} spezifische Tiles werden konvertiert")
 
-    # LAZ laden
-    las = laspy.read(laz_file)
+    check_tile_formats(formats)
+    if not 0 <= halo < tile_size / resolution:
+        raise ValueError(f"Ungültige Halo-Breite: {halo} (0 bis {int(tile_size / resolution) - 1} Zellen)")
+
+    # Inkrementell: nur veraltete Tiles konvertieren (Plan ersetzt den Filter)
+    params = conversion_params(tile_size, resolution, fill_strategy, fill_iterations, formats, overview_levels,
+                               halo)
+    fingerprint = None
+    if incremental:
+        if planned is None:
+            plan, fingerprints, errors = plan_incremental([laz_file], output_dir, params, tile_filter, force)
+            if errors:
+                raise ValueError(f"{laz_file.name} nicht lesbar: {errors[laz_file]}")
+            planned = plan[laz_file], fingerprints[laz_file]
+        tile_filter, fingerprint = planned
+        if not tile_filter:
+            print("⏭️  Alle Tiles aktuell (Manifest) – nichts zu tun")
+            print(f"\n✨ Fertig! 0 Tiles erstellt in: {output_dir}")
+            return 0
+        print(f"🔄 Inkrementell: {len(tile_filter)} Tiles veraltet oder neu")
+
+    with open_point_cloud(laz_file) as reader:
+        header = reader.header
+
+        print(f"   Punkte: {header.point_count:,}")
+        print(f"   Bounds: X=[{header.x_min:.2f}, {header.x_max:.2f}]")
+        print(f"   Bounds: Y=[{header.y_min:.2f}, {header.y_max:.2f}]")
+        print(f"   Bounds: Z=[{header.z_min:.2f}, {header.z_max:.2f}]")
+
+        # Tile-Grenzen berechnen
+        tile_xs, tile_ys = tile_grid(header, tile_size)
+        x_min, y_min = tile_xs.start, tile_ys.start
+
+        print(f"\n🔲 Erstelle Tiles:")
+        print(f"   Tile-Size: {tile_size}m × {tile_size}m")
+        print(f"   Resolution: {resolution}m")
+        print(f"   Grid: {int(tile_size/resolution)} × {int(tile_size/resolution)} Punkte")
+        print(f"   Lücken füllen: {fill_strategy}")
+        if chunk_size:
+            print(f"   Streaming: {chunk_size:,} Punkte pro Chunk")
+
+        timings = {'partition': 0.0, 'raster': 0.0, 'fill': 0.0, 'write': 0.0}
+
+        # Filter als Maske über alle Kacheln (Tile-ID = ix * len(tile_ys) + iy)
+        tile_mask = None
+        if tile_filter:
+            tile_mask = np.array([
+                tile_name_for(tile_x, tile_y) in tile_filter
+                for tile_x in tile_xs for tile_y in tile_ys
+            ], dtype=bool)
 
-    print(f"   Punkte: {len(las.points):,}")
-    print(f"   Bounds: X=[{las.header.x_min:.2f}, {las.header.x_max:.2f}]")
-    print(f"   Bounds: Y=[{las.header.y_min:.2f}, {las.header.y_max:.2f}]")
-    print(f"   Bounds: Z=[{las.header.z_min:.2f}, {las.header.z_max:.2f}]")
+        # Punkte lesen: komplett oder chunkweise (Streaming). Generator statt
+        # Liste, damit die Punkte nach dem Rastern freigegeben werden können.
+        if chunk_size:
+            chunks = reader.chunk_iterator(chunk_size)
+        else:
+            chunks = (reader.read() for _ in range(1))
 
-    # Koordinaten extrahieren
-    x = las.x
-    y = las.y
-    z = las.z
+        # DSM Grids pro Tile (laufendes Maximum über alle Chunks)
+        grids = {}
+        raster_times = {}
+        tile_points = {}
 
-    # Tile-Grenzen berechnen
-    x_min = int(las.header.x_min / tile_size) * tile_size
-    y_min = int(las.header.y_min / tile_size) * tile_size
-    x_max = int(np.ceil(las.header.x_max / tile_size)) * tile_size
-    y_max = int(np.ceil(las.header.y_max / tile_size)) * tile_size
+        for points in chunks:
+            x = np.asarray(points.x)
+            y = np.asarray(points.y)
+            z = np.asarray(points.z)
+            del points
 
-    print(f"\n🔲 Erstelle Tiles:")
-    print(f"   Tile-Size: {tile_size}m × {tile_size}m")
-    print(f"   Resolution: {resolution}m")
-    print(f"   Grid: {int(tile_size/resolution)} × {int(tile_size/resolution)} Punkte")
+            # Punkte des Chunks nach Kacheln gruppieren (zusammenhängende Blöcke pro Tile)
+            t_start = time.perf_counter()
+            order, offsets = partition_points(x, y, x_min, y_min, len(tile_xs), len(tile_ys), tile_size, tile_mask)
+            x, y, z = x[order], y[order], z[order]
+            del order
+            timings['partition'] += time.perf_counter() - t_start
+
+            for tile_index in np.flatnonzero(np.diff(offsets)):
+                start, end = offsets[tile_index], offsets[tile_index + 1]
+                tile_x = tile_xs[tile_index // len(tile_ys)]
+                tile_y = tile_ys[tile_index % len(tile_ys)]
+
+                # DSM Grid erstellen bzw. fortschreiben (höchster Punkt pro Zelle)
+                t_start = time.perf_counter()
+                grids[tile_index] = rasterize_dsm(
+                    x[start:end], y[start:end], z[start:end], tile_x, tile_y,
+                    tile_size, resolution, out=grids.get(tile_index)
+                )
+                raster_times[tile_index] = raster_times.get(tile_index, 0.0) + time.perf_counter() - t_start
+                tile_points[tile_index] = tile_points.get(tile_index, 0) + int(end - start)
+
+            del x, y, z
+
+    print(f"   Partitionierung: {timings['partition']:.2f}s")
 
     tiles_created = 0
 
-    # Für jede Kachel
-    for tile_x in range(int(x_min), int(x_max), tile_size):
-        for tile_y in range(int(y_min), int(y_max), tile_size):
+    # Für jede Kachel (in derselben Reihenfolge wie bisher: X außen, Y innen)
+    for tile_index in sorted(grids):
+        dsm = grids.pop(tile_index)
+        tile_x = tile_xs[tile_index // len(tile_ys)]
+        tile_y = tile_ys[tile_index % len(tile_ys)]
 
-            # Tile-ID berechnen
-            tile_id_x = int(tile_x / 1000)
-            tile_id_y = int(tile_y / 1000)
-            tile_name = f"tile_{tile_id_x}_{tile_id_y}.bin"
+        # Tile-ID berechnen
+        tile_id_x = int(tile_x / 1000)
+        tile_id_y = int(tile_y / 1000)
+
+        t_start = time.perf_counter()
+        merged = False
+
+        # Tile exklusiv mit bisherigen Daten zusammenführen (über Akkumulator)
+        with locked_accumulator(output_dir, tile_id_x, tile_id_y, dsm.shape[0]) as acc:
+            if merge:
+                merged = bool(acc.any())
+                np.maximum(acc, dsm, out=acc)
+            else:
+                acc[...] = dsm
+            dsm[...] = acc
+
+            # Lücken füllen (Zellen ohne Punkte)
+            fill_gaps(dsm, fill_strategy, fill_iterations)
 
-            # Prüfe Filter (wenn gesetzt)
-            if tile_filter and tile_name not in tile_filter:
-                continue  # Überspringe dieses Tile
-
-            # Punkte in dieser Kachel filtern
-            mask = (
-                (x >= tile_x) & (x < tile_x + tile_size) &
-                (y >= tile_y) & (y < tile_y + tile_size)
-            )
-
-            if not np.any(mask):
-                continue
-
-            tile_points = np.column_stack([x[mask], y[mask], z[mask]])
-
-            # DSM Grid erstellen (höchster Punkt pro Zelle)
-            grid_size = int(tile_size / resolution)
-            dsm = np.zeros((grid_size, grid_size), dtype=np.float32)
-
-            for px, py, pz in tile_points:
-                # Grid-Position
-                grid_x = int((px - tile_x) / resolution)
-                grid_y = int((py - tile_y) / resolution)
-
-                # Clamp to grid bounds
-                grid_x = max(0, min(grid_size - 1, grid_x))
-                grid_y = max(0, min(grid_size - 1, grid_y))
-
-                # Höchster Punkt gewinnt (DSM)
-                dsm[grid_y, grid_x] = max(dsm[grid_y, grid_x], pz)
-
-            # Lücken füllen (einfache Interpolation)
-            # Punkte ohne Daten bekommen Nachbar-Wert
-            for gy in range(grid_size):
-                for gx in range(grid_size):
-                    if dsm[gy, gx] == 0:
-                        # Suche nächsten Nachbarn
-                        neighbors = []
-                        for dy in [-1, 0, 1]:
-                            for dx in [-1, 0, 1]:
-                                ny, nx = gy + dy, gx + dx
-                                if 0 <= ny < grid_size and 0 <= nx < grid_size:
-                                    if dsm[ny, nx] > 0:
-                                        neighbors.append(dsm[ny, nx])
-                        if neighbors:
-                            dsm[gy, gx] = np.mean(neighbors)
+            t_fill = time.perf_counter()
 
             # Zu Uint16 konvertieren (cm Genauigkeit)
             dsm_uint16 = (dsm * 100).astype(np.uint16)
 
-            # Dateiname (tile_id_x und tile_id_y wurden bereits oben berechnet)
-            output_file = output_dir / f"tile_{tile_id_x}_{tile_id_y}.bin"
-            output_file_gz = output_dir / f"tile_{tile_id_x}_{tile_id_y}.bin.gz"
+            # Alle Formate direkt aus dem Speicher schreiben
+            tile_name = f"tile_{tile_id_x}_{tile_id_y}.bin"
+            sizes = write_tile(output_dir, tile_name, dsm_uint16, formats, gzip_level,
+                               origin=(tile_x, tile_y), resolution=resolution)
+
+            # Übersichtsstufen (Max-Pooling) für weite Sichtlinien
+            shown_format = next((fmt for fmt in formats if fmt != 'bin'), 'bin')
+            overview_sizes = {}
+            pyramid = build_overviews(dsm_uint16, overview_levels)
+            for level_res, overview in zip(overview_resolutions(resolution, overview_levels), pyramid):
+                level_sizes = write_tile(output_dir, overview_name(tile_name, level_res), overview, formats,
+                                         gzip_level, origin=(tile_x, tile_y), resolution=level_res)
+                overview_sizes[level_res] = level_sizes[shown_format]
+
+            # Halo-Tiles dieser Kachel und ihrer Nachbarn (die Halo-Sperre wird
+            # nie vor einer Akkumulator-Sperre genommen → keine Verklemmung)
+            halo_written = 0
+            if halo:
+                halo_written = update_halo_tiles(output_dir, tile_x, tile_y, dsm_uint16, halo, formats,
+                                                 gzip_level, tile_size, resolution)
+
+            if incremental:
+                record_tile(output_dir, tile_name, laz_file.name, fingerprint, params,
+                            tile_points[tile_index], replace=not merge)
 
-            # Speichern (Binary)
-            with open(output_file, 'wb') as f:
-                f.write(dsm_uint16.tobytes())
+        t_write = time.perf_counter()
 
-            # GZIP komprimieren
-            with open(output_file, 'rb') as f_in:
-                with gzip.open(output_file_gz, 'wb') as f_out:
-                    f_out.writelines(f_in)
+        size_raw = dsm_uint16.nbytes / 1024
+        compressed = " | ".join(f"{sizes[fmt] / 1024:.0f} KB ({fmt.upper()})" for fmt in formats if fmt != 'bin')
 
-            size_raw = output_file.stat().st_size / 1024
-            size_gz = output_file_gz.stat().st_size / 1024
+        merge_note = " (zusammengeführt)" if merged else ""
+        print(f"   ✅ Tile {tile_id_x}_{tile_id_y}: {size_raw:.0f} KB → {compressed or 'unkomprimiert'}{merge_note}")
+        if overview_sizes:
+            print("      🔭 Übersichten: " + " | ".join(f"{res:g}m {size / 1024:.0f} KB"
+                                                     for res, size in overview_sizes.items())
+                  + f" ({shown_format.upper()})")
+        if halo:
+            print(f"      🧩 Halo: {halo_written} Tiles aktualisiert ({halo_dir_name(halo)})")
+        print(f"      ⏱️  Raster {raster_times[tile_index]:.2f}s | Lücken {t_fill - t_start:.2f}s | "
+              f"Schreiben {t_write - t_fill:.2f}s")
 
-            print(f"   ✅ Tile {tile_id_x}_{tile_id_y}: {size_raw:.0f} KB → {size_gz:.0f} KB (GZIP)")
+        timings['raster'] += raster_times[tile_index]
+        timings['fill'] += t_fill - t_start
+        timings['write'] += t_write - t_fill
+        tiles_created += 1
 
-            tiles_created += 1
+    # Geplante Tiles ohne Punkte dieser Datei vermerken (sonst ewig "veraltet")
+    if incremental:
+        converted = {tile_name_for(tile_xs[i // len(tile_ys)], tile_ys[i % len(tile_ys)]) for i in tile_points}
+        for name in sorted(tile_filter - converted):
+            record_tile(output_dir, name, laz_file.name, fingerprint, params, 0)
 
     print(f"\n✨ Fertig! {tiles_created} Tiles erstellt in: {output_dir}")
+    if tiles_created:
+        print(f"   ⏱️  Gesamt: Partitionierung {timings['partition']:.2f}s | Raster {timings['raster']:.2f}s | "
+              f"Lücken {timings['fill']:.2f}s | Schreiben {timings['write']:.2f}s")
+
+    peak_mb = peak_rss_mb()
+    if peak_mb is not None:
+        print(f"   💾 Peak RSS: {peak_mb:.0f} MB")
     return tiles_created
 
 
@@ -182,13 +1180,51 @@ if __name__ == "__main__":
     parser.add_argument("-s", "--size", type=int, default=1000, help="Tile size in meters (default: 1000)")
     parser.add_argument("-r", "--resolution", type=float, default=1.0, help="Grid resolution in meters (default: 1.0)")
     parser.add_argument("-t", "--tile-list", help="Text file with list of tiles to convert (one per line)")
+    parser.add_argument("--fill", choices=FILL_STRATEGIES, default="ring",
+                        help="Gap fill strategy: ring (3x3 mean), iterative, nearest, none (default: ring)")
+    parser.add_argument("--fill-iterations", type=int, default=DEFAULT_FILL_ITERATIONS,
+                        help=f"Max fill depth in cells for --fill iterative (default: {DEFAULT_FILL_ITERATIONS})")
+    parser.add_argument("--chunk-size", type=int,
+                        help="Stream the LAZ file in chunks of N points (bounded memory, default: read whole file)")
+    parser.add_argument("--no-merge", action="store_true",
+                        help="Overwrite tiles instead of merging with data from other LAZ files (per-cell max)")
+    parser.add_argument("--force", action="store_true",
+                        help="Reconvert all tiles even if the manifest says they are up to date")
+    parser.add_argument("-f", "--formats", default=",".join(DEFAULT_TILE_FORMATS),
+                        help="Comma-separated output formats: bin, gz, zst, br, v2 (default: bin,gz)")
+    parser.add_argument("--gzip-level", type=int, choices=range(1, 10), default=DEFAULT_GZIP_LEVEL, metavar="1-9",
+                        help=f"GZIP compression level (default: {DEFAULT_GZIP_LEVEL})")
+    parser.add_argument("--overviews", type=int, default=DEFAULT_OVERVIEW_LEVELS, metavar="N",
+                        help=f"Max-pooled overview levels at 2x, 4x, ... the resolution, 0 = none "
+                             f"(default: {DEFAULT_OVERVIEW_LEVELS})")
+    parser.add_argument("--halo", type=int, nargs="?", const=DEFAULT_HALO, default=0, metavar="N",
+                        help=f"Also write tiles with an N-cell border from the neighbouring tiles to "
+                             f"{HALO_DIR}/v{HALO_LAYOUT_VERSION}-hN/ (N default: {DEFAULT_HALO}, default: off)")
+    parser.add_argument("--archive", nargs="?", const="", metavar="FILE",
+                        help=f"After converting, sync all .bin.gz tiles of the output directory (including "
+                             f"up-to-date ones) into a single-file tile archive "
+                             f"(default FILE: <output>/{DEFAULT_ARCHIVE_NAME}, needs format gz)")
 
     args = parser.parse_args()
 
+    formats = tuple(fmt.strip() for fmt in args.formats.split(",") if fmt.strip())
+    try:
+        check_tile_formats(formats)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
     # Output directory erstellen
     output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
 
+    archive = None
+    if args.archive is not None:
+        if 'gz' not in formats:
+            print("ERROR: --archive braucht das Format gz")
+            sys.exit(1)
+        archive = Path(args.archive) if args.archive else output_dir / DEFAULT_ARCHIVE_NAME
+
     # Tile-Filter laden (falls angegeben)
     tile_filter = None
     if args.tile_list:
@@ -201,5 +1237,20 @@ if __name__ == "__main__":
         output_dir,
         tile_size=args.size,
         resolution=args.resolution,
-        tile_filter=tile_filter
+        tile_filter=tile_filter,
+        fill_strategy=args.fill,
+        fill_iterations=args.fill_iterations,
+        chunk_size=args.chunk_size,
+        merge=not args.no_merge,
+        incremental=True,
+        force=args.force,
+        formats=formats,
+        gzip_level=args.gzip_level,
+        overview_levels=args.overviews,
+        halo=args.halo
     )
+
+    # Archiv nach dem Lauf abgleichen: auch übersprungene (aktuelle) Tiles
+    if archive:
+        appended, total = sync_archive(archive, output_dir, 'gz', int(args.size / args.resolution), args.resolution)
+        print(f"📦 Archiv: {appended} Tiles aktualisiert ({total} gesamt) → {archive}")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Lasttest für tile_server.py
+Misst Requests pro Sekunde und Latenz-Perzentile (p50/p95/p99)
+
+Mehrere Clients (Threads) mit je einer Keep-Alive-Verbindung holen
+zufällige Tiles. Mit --revalidate schicken die Clients den ETag der
+letzten Antwort mit (If-None-Match) – wie ein Browser mit warmem Cache,
+der Server antwortet dann mit 304. Am Ende werden Cache-Trefferquote und
+übertragene Bytes von /stats abgefragt.
+
+Usage:
+    python3 load_test_tiles.py --url http://localhost:8000 -d ../tiles_output
+    python3 load_test_tiles.py --serve .. -c 32 -t 10   # eigener Server im Prozess
+"""
+
+import sys
+import time
+import random
+import json
+import threading
+import http.client
+import urllib.parse
+from pathlib import Path
+
+
+def percentile(sorted_values, fraction):
+    """Perzentil einer sortierten Liste (nächster Rang)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def tile_paths(tiles_dir, suffix):
+    """URL-Pfade aller Tiles mit der Endung im Verzeichnis (/tiles/<name>)"""
+    return [f"/tiles/{path.name}" for path in sorted(Path(tiles_dir).glob(f"tile_*{suffix}"))]
+
+
+def client(base_url, paths, deadline, revalidate, headers, results, seed):
+    """Ein Client: Requests auf einer Keep-Alive-Verbindung bis zur Deadline"""
+    parts = urllib.parse.urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+    rng = random.Random(seed)
+    etags = {}
+    latencies, statuses, received = [], {}, 0
+
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths)
+        request_headers = dict(headers)
+        if revalidate and path in etags:
+            request_headers['If-None-Match'] = etags[path]
+
+        t0 = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=request_headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            statuses['error'] = statuses.get('error', 0) + 1
+            connection.close()
+            connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        received += len(body)
+        if response.getheader('ETag'):
+            etags[path] = response.getheader('ETag')
+
+    connection.close()
+    results.append((latencies, statuses, received))
+
+
+def fetch_server_stats(base_url):
+    """/stats des Servers (None, wenn nicht verfügbar)"""
+    parts = urllib.parse.urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.netloc, timeout=10)
+    try:
+        connection.request('GET', '/stats')
+        response = connection.getresponse()
+        body = response.read()
+        return json.loads(body) if response.status == 200 else None
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        connection.close()
+
+
+def run_load_test(base_url, paths, clients=16, duration=10.0, revalidate=False, headers=None):
+    """
+    Führt den Lasttest aus
+
+    Returns:
+        Dict mit requests, seconds, rps, p50, p95, p99 (Sekunden), statuses, mb_per_s
+    """
+    results = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=client, args=(base_url, paths, deadline, revalidate, headers or {}, results, i))
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    statuses = {}
+    for _, client_statuses, _ in results:
+        for status, count in client_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    received = sum(result[2] for result in results)
+
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'statuses': statuses,
+        'mb_per_s': received / (1024 * 1024) / elapsed,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Load test for tile_server.py (requests/s and p99 latency)",
+        epilog="Beispiel: python3 load_test_tiles.py --serve .. -c 32 -t 10"
+    )
+    parser.add_argument("--url", default="http://localhost:8000", help="Server base URL (default: localhost:8000)")
+    parser.add_argument("-d", "--tiles-dir", help="Directory with the tiles to request (default: <serve>/tiles)")
+    parser.add_argument("--serve", metavar="DIR",
+                        help="Start tile_server.py in-process on a free port with DIR as base directory")
+    parser.add_argument("-c", "--clients", type=int, default=16, help="Concurrent clients (default: 16)")
+    parser.add_argument("-t", "--duration", type=float, default=10.0, help="Test duration in seconds (default: 10)")
+    parser.add_argument("--suffix", default=".bin.gz", help="Tile file suffix to request (default: .bin.gz)")
+    parser.add_argument("--accept-encoding", default="gzip",
+                        help="Accept-Encoding header sent by the clients (default: gzip, '' = none)")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="Send If-None-Match with known ETags (warm browser cache, expects 304)")
+
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if args.serve:
+        from tile_server import make_server
+        server = make_server(args.serve, 0, host="127.0.0.1")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    tiles_dir = args.tiles_dir or (Path(args.serve) / "tiles" if args.serve else None)
+    if not tiles_dir:
+        print("❌ Tile-Verzeichnis fehlt (--tiles-dir oder --serve)")
+        sys.exit(1)
+    paths = tile_paths(tiles_dir, args.suffix)
+    if not paths:
+        print(f"❌ Keine Tiles (*{args.suffix}) in {tiles_dir}")
+        sys.exit(1)
+
+    print("⏱️  Tile-Server Lasttest")
+    print("=" * 60)
+    print(f"   Server:  {base_url}")
+    print(f"   Tiles:   {len(paths)} (*{args.suffix})")
+    print(f"   Clients: {args.clients}, Dauer {args.duration:g}s"
+          + (", If-None-Match" if args.revalidate else ""))
+    print()
+
+    headers = {'Accept-Encoding': args.accept_encoding} if args.accept_encoding else {}
+    stats = run_load_test(base_url, paths, args.clients, args.duration, args.revalidate, headers)
+    server_stats = fetch_server_stats(base_url)
+
+    if server:
+        server.shutdown()
+
+    print(f"   Requests:   {stats['requests']:,} in {stats['seconds']:.1f}s")
+    print(f"   Durchsatz:  {stats['rps']:,.0f} req/s ({stats['mb_per_s']:.1f} MB/s)")
+    print(f"   Latenz:     p50 {stats['p50'] * 1000:.2f} ms | p95 {stats['p95'] * 1000:.2f} ms | "
+          f"p99 {stats['p99'] * 1000:.2f} ms")
+    print(f"   Status:     " + ", ".join(f"{status}: {count:,}" for status, count in sorted(
+        stats['statuses'].items(), key=lambda item: str(item[0]))))
+    if server_stats:
+        cache = server_stats['cache']
+        hit_rate = f"{cache['hit_rate']:.1%}" if cache['hit_rate'] is not None else "-"
+        print(f"   Cache:      {hit_rate} Treffer, {cache['bytes'] / (1024 * 1024):.1f} MB belegt, "
+              f"{cache['evictions']:,} verdrängt")
+        print(f"   Server:     {server_stats['bytes_served'] / (1024 * 1024):.1f} MB gesendet, Encodings "
+              + ", ".join(f"{name}: {count:,}" for name, count in sorted(server_stats['encodings'].items())))
+
+    if 'error' in stats['statuses'] or any(str(status).startswith('5') for status in stats['statuses']):
+        print("\n❌ Fehler während des Lasttests!")
+        sys.exit(1)
+    print("\n✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()
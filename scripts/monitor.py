@@ -2,85 +2,123 @@
 """
 Windrad Pipeline Monitor
 Zeigt Status und Fortschritt der LAZ-Verarbeitung
+
+Liest die Fortschritts-Events aller Stufen
+(progress_events.py, paths.progress_log) inkrementell – im Watch-Modus
+nur die seit der letzten Anzeige angehängten Zeilen, ohne die
+Verzeichnisse zu scannen. Summen kommen aus den Events selbst (Anzahl
+Dateien des Laufs), Durchsatz und ETA aus den Zeitstempeln der Einträge.
+Der Schritt-Status (running/completed/failed) stammt aus pipeline_state.json.
 """
 
-import sys
 import json
 import time
-import subprocess
 from pathlib import Path
+from collections import deque
 from datetime import datetime, timedelta
 
+from progress_events import EventReader, default_progress_log
+
 # Konfiguration
 SCRIPT_DIR = Path(__file__).parent
-PROJECT_DIR = SCRIPT_DIR.parent
-LAZ_DIR = PROJECT_DIR / "laz_downloads"
-TILES_DIR = PROJECT_DIR / "tiles_output"
 STATE_FILE = SCRIPT_DIR / "pipeline_state.json"
 
-
-def get_file_count(directory, pattern):
-    """Zählt Dateien in Verzeichnis"""
-    try:
-        path = Path(directory)
-        if not path.exists():
-            return 0
-        return len(list(path.glob(pattern)))
-    except:
-        return 0
-
-
-def get_dir_size(directory):
-    """Berechnet Verzeichnisgröße in GB"""
-    try:
-        path = Path(directory)
-        if not path.exists():
-            return 0
-        total = sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
-        return total / (1024 ** 3)  # Convert to GB
-    except:
-        return 0
-
-
-def parse_conversion_log():
-    """Parse convert_all_laz.sh output für aktuellen Status"""
-    task_output = Path("/private/tmp/claude-501/-Users-pischdi-Documents-Windrad/tasks/b006b48.output")
-
-    if not task_output.exists():
-        return None
-
+STAGES = ("download", "convert", "visibility", "upload")
+RATE_WINDOW = 60             # s für die aktuelle Rate (gleitendes Fenster)
+
+
+class StageProgress:
+    """Fortschritt einer Stufe aus ihren Events (aktueller Lauf)"""
+
+    def __init__(self):
+        self.total = 0
+        self.ok = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        self.item_seconds = 0.0
+        self.started = None
+        self.last = None
+        self.ended = None
+        self.last_item = None
+        self.recent = deque()    # (ts, bytes) verarbeiteter Einträge im Fenster
+
+    @property
+    def done(self):
+        return self.ok + self.skipped + self.failed
+
+    @property
+    def processed(self):
+        """Tatsächlich bearbeitete Einträge (ohne übersprungene)"""
+        return self.ok + self.failed
+
+    def apply(self, event):
+        kind = event.get('event')
+        ts = event.get('ts', 0.0)
+        if kind == 'start':
+            if event.get('rerun') and self.started is not None:
+                # Nachlauf gehört zum selben Lauf
+                self.total += event.get('total', 0)
+                self.ended = None
+                return
+            self.__init__()
+            self.total = event.get('total', 0)
+            self.started = self.last = ts
+        elif kind == 'item':
+            status = event.get('status')
+            if status == 'skipped':
+                self.skipped += 1
+            else:
+                if status == 'ok':
+                    self.ok += 1
+                else:
+                    self.failed += 1
+                self.bytes += event.get('bytes', 0)
+                self.item_seconds += event.get('seconds', 0.0)
+                self.recent.append((ts, event.get('bytes', 0)))
+            self.last = ts
+            self.last_item = event.get('item')
+        elif kind == 'end':
+            self.ended = ts
+            self.last = ts
+
+    def elapsed(self, now):
+        if self.started is None:
+            return 0.0
+        return max((self.ended or now) - self.started, 1e-9)
+
+    def rates(self, now):
+        """
+        Returns:
+            (Einträge/s, Bytes/s) – im laufenden Betrieb über das letzte
+            RATE_WINDOW, nach Ende über den ganzen Lauf
+        """
+        if self.started is None:
+            return 0.0, 0.0
+        if self.ended is not None:
+            elapsed = self.elapsed(now)
+            return self.processed / elapsed, self.bytes / elapsed
+
+        while self.recent and self.recent[0][0] < now - RATE_WINDOW:
+            self.recent.popleft()
+        window = min(RATE_WINDOW, self.elapsed(now))
+        return len(self.recent) / window, sum(b for _, b in self.recent) / window
+
+    def eta(self, now):
+        """Restzeit in Sekunden (None, wenn noch keine Rate bekannt)"""
+        remaining = self.total - self.done
+        if remaining <= 0:
+            return 0.0
+        rate, _ = self.rates(now)
+        return remaining / rate if rate > 0 else None
+
+
+def load_state():
+    """pipeline_state.json (Schritt-Status aus pipeline.sh), leer wenn nicht vorhanden"""
     try:
-        with open(task_output, 'r') as f:
-            lines = f.readlines()
-
-        # Suche letzte [X/Y] Zeile
-        current_file = 0
-        total_files = 0
-        current_laz = ""
-
-        for line in reversed(lines):
-            if '[' in line and '/' in line and ']' in line:
-                # Parse "[21/     141] 🔄 Verarbeite: als_33458-5723.laz"
-                parts = line.split(']')
-                if len(parts) >= 2:
-                    nums = parts[0].strip('[').split('/')
-                    if len(nums) == 2:
-                        current_file = int(nums[0].strip())
-                        total_files = int(nums[1].strip())
-
-                        # Extract filename
-                        if '🔄 Verarbeite:' in line:
-                            current_laz = line.split('🔄 Verarbeite:')[-1].strip()
-                        break
-
-        return {
-            'current': current_file,
-            'total': total_files,
-            'current_file': current_laz,
-            'is_running': current_file < total_files
-        }
-    except:
-        return None
+        return json.loads(STATE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
 
 
 def format_progress_bar(current, total, width=30):
@@ -88,7 +126,7 @@ def format_progress_bar(current, total, width=30):
     if total == 0:
         return '░' * width
 
-    percent = current / total
+    percent = min(current / total, 1.0)
     filled = int(width * percent)
     empty = width - filled
 
@@ -104,33 +142,27 @@ def format_size(bytes_size):
     return f"{bytes_size:.1f} PB"
 
 
-def estimate_eta(current, total, start_time):
-    """Schätzt verbleibende Zeit"""
-    if current == 0:
+def format_duration(seconds):
+    if seconds is None:
         return "Berechne..."
+    return str(timedelta(seconds=int(seconds)))
 
-    elapsed = time.time() - start_time
-    rate = current / elapsed  # files per second
-    remaining = total - current
-    eta_seconds = remaining / rate if rate > 0 else 0
 
-    return str(timedelta(seconds=int(eta_seconds)))
+def stage_status(name, progress, state):
+    """Status-Text einer Stufe aus Events und pipeline_state.json"""
+    step = state.get('steps', {}).get(name, {}).get('status')
+    if step == 'failed':
+        return "❌ Fehlgeschlagen"
+    if progress.started is None:
+        return "✅ Completed" if step == 'completed' else "⏸️ Nicht gestartet"
+    if progress.ended is not None:
+        return f"✅ Completed ({progress.failed} Fehler)" if progress.failed else "✅ Completed"
+    return "🔄 In Progress"
 
 
-def show_status(watch_mode=False):
+def show_status(stages, state, watch_mode=False):
     """Zeigt aktuellen Pipeline-Status"""
-
-    # Conversion Status
-    conv_status = parse_conversion_log()
-
-    # File Counts
-    laz_count = get_file_count(LAZ_DIR, "*.laz")
-    bin_count = get_file_count(TILES_DIR, "*.bin")
-    gz_count = get_file_count(TILES_DIR, "*.bin.gz")
-
-    # Disk Usage
-    laz_size = get_dir_size(LAZ_DIR)
-    tiles_size = get_dir_size(TILES_DIR)
+    now = time.time()
 
     # Clear screen in watch mode
     if watch_mode:
@@ -140,53 +172,26 @@ def show_status(watch_mode=False):
     print("━" * 60)
     print()
 
-    # Download Status
-    print("┌─────────────────────────────────────────────────────────┐")
-    download_bar = format_progress_bar(laz_count, 141)
-    print(f"│ Download  [{download_bar}] {laz_count}/141   │")
-    print(f"│ Status: ✅ Completed ({laz_size:.1f} GB)                              │")
-    print("└─────────────────────────────────────────────────────────┘")
-    print()
-
-    # Conversion Status
-    print("┌─────────────────────────────────────────────────────────┐")
-    if conv_status:
-        conv_bar = format_progress_bar(conv_status['current'], conv_status['total'])
-        print(f"│ Convert   [{conv_bar}] {conv_status['current']}/{conv_status['total']}   │")
-
-        if conv_status['is_running']:
-            print(f"│ Status: 🔄 In Progress                                  │")
-            print(f"│ Current: {conv_status['current_file']:<45} │")
-        else:
-            print(f"│ Status: ✅ Completed                                    │")
-    else:
-        conv_bar = format_progress_bar(0, 141)
-        print(f"│ Convert   [{conv_bar}] 0/141     │")
-        print(f"│ Status: ⏸️ Nicht gestartet                              │")
-
-    print(f"│ Output: {gz_count} compressed tiles ({tiles_size:.1f} GB)              │")
-    print("└─────────────────────────────────────────────────────────┘")
-    print()
-
-    # Upload Status
-    print("┌─────────────────────────────────────────────────────────┐")
-    upload_bar = format_progress_bar(0, 141)
-    print(f"│ Upload    [{upload_bar}] 0/141     │")
-    print(f"│ Status: ⏸️ Pending                                       │")
-    print("└─────────────────────────────────────────────────────────┘")
-    print()
-
-    # Disk Usage
-    print("💾 Disk Usage:")
-    print(f"  LAZ Files: {laz_size:.1f} GB ({laz_count} files)")
-    print(f"  Binary Tiles: {tiles_size:.1f} GB ({gz_count} compressed)")
-    print()
-
-    # Commands
-    print("Commands:")
-    print("  tail -f /private/tmp/claude-501/-Users-pischdi-Documents-Windrad/tasks/b006b48.output")
-    print("  ls -lh tiles_output/*.bin.gz | wc -l")
-    print()
+    for name in STAGES:
+        progress = stages[name]
+        item_rate, byte_rate = progress.rates(now)
+
+        print(f"{name.capitalize():<9} [{format_progress_bar(progress.done, progress.total)}] "
+              f"{progress.done}/{progress.total}")
+        print(f"   Status:  {stage_status(name, progress, state)}")
+        if progress.started is None:
+            print()
+            continue
+
+        print(f"   Dateien: {progress.ok} ok, {progress.skipped} übersprungen, {progress.failed} fehlgeschlagen")
+        print(f"   Daten:   {format_size(progress.bytes)} in {format_duration(progress.elapsed(now))}")
+        print(f"   Rate:    {item_rate * 60:.1f} Dateien/min, {format_size(byte_rate)}/s"
+              + (f", Ø {progress.item_seconds / progress.processed:.1f}s pro Datei" if progress.processed else ""))
+        if progress.ended is None:
+            print(f"   ETA:     {format_duration(progress.eta(now))}")
+            if progress.last_item:
+                print(f"   Zuletzt: {progress.last_item}")
+        print()
 
     if watch_mode:
         print(f"Letzte Aktualisierung: {datetime.now().strftime('%H:%M:%S')}")
@@ -197,22 +202,43 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser(
-        description="Windrad Pipeline Monitor"
+        description="Windrad Pipeline Monitor",
+        epilog="Beispiel: python3 monitor.py --watch"
     )
     parser.add_argument("-w", "--watch", action="store_true",
-                       help="Live updates (refresh every 5s)")
+                       help="Live updates (refresh every --interval seconds)")
+    parser.add_argument("-i", "--interval", type=float, default=5.0,
+                        help="Refresh interval in seconds for --watch (default: 5)")
+    parser.add_argument("--progress-log", default=str(default_progress_log()),
+                        help="JSONL progress events (default: paths.progress_log)")
 
     args = parser.parse_args()
 
+    reader = EventReader(args.progress_log)
+    stages = {name: StageProgress() for name in STAGES}
+
+    def update():
+        events, reset = reader.read()
+        if reset:
+            stages.update({name: StageProgress() for name in STAGES})
+        for event in events:
+            if event.get('stage') in stages:
+                stages[event['stage']].apply(event)
+
+    update()
+    if not Path(args.progress_log).exists():
+        print(f"ℹ️  Noch keine Fortschritts-Events: {args.progress_log}")
+
     if args.watch:
         try:
             while True:
-                show_status(watch_mode=True)
-                time.sleep(5)
+                show_status(stages, load_state(), watch_mode=True)
+                time.sleep(args.interval)
+                update()
         except KeyboardInterrupt:
             print("\n\nMonitoring beendet.")
     else:
-        show_status(watch_mode=False)
+        show_status(stages, load_state(), watch_mode=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+Windrad LAZ Pipeline (Python-Orchestrator, überlappende Stufen)
+
+Download → Konvertierung → Sichtbarkeit → Upload als Pipeline mit
+begrenzten Queues: Ein Archiv geht in die Konvertierung, sobald es geladen
+ist, die Tiles eines Archivs gehen in den Upload, sobald sie geschrieben
+sind. Nach der letzten Konvertierung rechnet die Sichtbarkeits-Stufe
+(visibility_tiles.py, inkrementell über visibility/index.json) geänderte
+Windräder neu; ihre Tiles gehen ebenfalls sofort in den Upload,
+visibility/index.json zuletzt. Jede Stufe hat ihre eigenen Worker
+(config.json):
+
+- download.concurrency        Download-Threads
+- convert.parallel_workers    Konvertierungs-Prozesse
+- visibility.parallel_workers Viewshed-Prozesse
+- upload.parallel_uploads     Upload-Threads
+
+Volle Queues bremsen die vorherige Stufe (Backpressure), die Gesamtzeit
+nähert sich damit der langsamsten Stufe statt der Summe aller Stufen. Ein
+Fehler betrifft nur das jeweilige Archiv/Tile, der Rest läuft weiter.
+
+Zustand pro Tile in pipeline_state.json (hochgeladene Dateien mit Größe
+und mtime). Mit --resume werden bereits hochgeladene, unveränderte Dateien
+übersprungen; Download (vorhandene ZIPs) und Konvertierung (Manifest) sind
+ohnehin inkrementell. Fortschritts-Events für monitor.py wie bei den
+Einzel-Scripts.
+
+Usage:
+    python3 pipeline.py                  # komplette Pipeline
+    python3 pipeline.py --resume         # nach Abbruch fortsetzen
+    python3 pipeline.py --no-upload --convert-workers 8
+    python3 pipeline.py --no-visibility  # ohne Sichtbarkeits-Tiles
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from pipeline_config import load_config, config_path
+from progress_events import ProgressLog, default_progress_log
+from download_laz import (download_laz_file, tile_to_laz_filename, ConnectionPool, RateLimiter, DownloadProgress,
+                          BASE_URL, DEFAULT_CONCURRENCY, DEFAULT_RATE_LIMIT_DELAY, DEFAULT_RETRY_ATTEMPTS,
+                          DEFAULT_RETRY_DELAY)
+from laz_to_binary import (load_tile_list, conversion_params, plan_incremental, tile_outputs, halo_dir_name,
+                           DEFAULT_FILL_ITERATIONS, DEFAULT_TILE_FORMATS, DEFAULT_GZIP_LEVEL, DEFAULT_OVERVIEW_LEVELS)
+from convert_all_laz import convert_one, collect_result, print_result, record_result, unreadable_results
+from upload_tiles import S3Uploader, DEFAULT_PARALLEL_UPLOADS, DEFAULT_CACHE_CONTROL
+from visibility_tiles import update_visibility, VISIBILITY_DIR, INDEX_FILE as VISIBILITY_INDEX
+from viewshed import DEFAULT_RADIUS, DEFAULT_LEVELS
+from elevation import EYE_HEIGHT
+from turbines import load_turbines
+
+STATE_FILE = Path(__file__).parent / "pipeline_state.json"
+UPLOAD_SUFFIXES = (".bin.gz",)   # wie upload_tiles.py
+STATE_SAVE_INTERVAL = 2.0        # s zwischen zwei Schreibvorgängen von pipeline_state.json
+DONE = None                      # Queue-Ende
+STAGES = ('download', 'convert', 'visibility', 'upload')
+
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def file_signature(path):
+    """[Größe, mtime_ns] einer Datei, None wenn sie fehlt"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class PipelineState:
+    """
+    pipeline_state.json: Schritt-Status (wie pipeline.sh) und Zustand pro Tile
+
+    Thread-safe; geschrieben wird höchstens alle STATE_SAVE_INTERVAL
+    Sekunden (atomar per Umbenennen) und bei save(force=True).
+    """
+
+    def __init__(self, path=STATE_FILE, resume=False):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.last_save = 0.0
+        try:
+            self.state = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.state = {}
+        self.state.setdefault('steps', {})
+        if not resume or 'tiles' not in self.state:
+            self.state['tiles'] = {}
+
+    def step(self, step, status, data=None):
+        with self.lock:
+            entry = {'status': status, 'timestamp': now_iso()}
+            if data:
+                entry['data'] = data
+            self.state['steps'][step] = entry
+            self.state['last_run'] = entry['timestamp']
+        self.save(force=True)
+
+    def uploaded(self, tile, file_name):
+        """Signatur der zuletzt hochgeladenen Version einer Datei (oder None)"""
+        with self.lock:
+            return self.state['tiles'].get(tile, {}).get('uploaded', {}).get(file_name)
+
+    def mark(self, tile, key, value):
+        with self.lock:
+            self.state['tiles'].setdefault(tile, {})[key] = value
+        self.save()
+
+    def mark_uploaded(self, tile, file_name, signature):
+        with self.lock:
+            self.state['tiles'].setdefault(tile, {}).setdefault('uploaded', {})[file_name] = signature
+        self.save()
+
+    def save(self, force=False):
+        with self.lock:
+            if not force and time.monotonic() - self.last_save < STATE_SAVE_INTERVAL:
+                return
+            self.last_save = time.monotonic()
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.state, indent=2))
+            os.replace(tmp_path, self.path)
+
+
+def upload_files(tile_name, params, output_dir):
+    """
+    Hochzuladende Dateien eines Tiles (Basis + Übersichten + Halo), soweit vorhanden
+
+    Returns:
+        Liste von (key, path); key = Pfad relativ zum Output (wie upload_tiles.py)
+    """
+    return [(name, output_dir / name) for name in tile_outputs(tile_name, params)
+            if name.endswith(UPLOAD_SUFFIXES) and (output_dir / name).exists()]
+
+
+class Pipeline:
+    """
+    Download-, Konvertierungs- und Upload-Stufe mit begrenzten Queues
+
+    Ablauf:
+    1. Vorhandene Archive werden gemeinsam geplant (plan_incremental) und
+       direkt konvertiert; fehlende laden die Download-Threads.
+    2. Fertige Downloads landen in convert_queue; der Dispatcher plant sie
+       einzeln ein und hält höchstens convert_workers Jobs im Prozess-Pool.
+    3. Fertige Tiles landen in upload_queue; Upload-Threads überspringen
+       Dateien, deren Signatur schon hochgeladen ist.
+    4. Nachlauf wie convert_all_laz.py --download: Tiles mit mehreren
+       Quellen werden neu geplant.
+    5. Sichtbarkeit (update_visibility) für geänderte Windräder; fertige
+       Windräder gehen in upload_queue. Danach alle geänderten Dateien
+       hochladen, visibility/index.json zuletzt.
+    """
+
+    def __init__(self, archives, tile_filter, laz_dir, output_dir, options, params, state, config,
+                 workers, upload=None, progress_log=None, visibility=None):
+        """
+        upload: upload_tiles.S3Uploader (None = kein Upload)
+        visibility: Dict mit turbines, radius, levels, eye_height, workers
+            (None = keine Sichtbarkeits-Stufe)
+        """
+        self.archives = archives
+        self.tile_filter = tile_filter
+        self.laz_dir = laz_dir
+        self.output_dir = output_dir
+        self.options = options
+        self.params = params
+        self.state = state
+        self.download_config = config.get('download', {})
+        self.download_workers, self.convert_workers, self.upload_workers = workers
+        self.upload = upload
+        self.visibility = visibility
+
+        # Begrenzte Queues: je zwei Einträge pro Worker der nächsten Stufe
+        self.archive_queue = queue.Queue()
+        self.convert_queue = queue.Queue(maxsize=2 * self.convert_workers)
+        self.upload_queue = queue.Queue(maxsize=2 * self.upload_workers)
+
+        self.events = {stage: ProgressLog(progress_log, stage) for stage in STAGES}
+        self.stats = {stage: {'ok': 0, 'skipped': 0, 'failed': 0, 'busy': 0.0} for stage in self.events}
+        self.stats_lock = threading.Lock()
+        self.tile_of_archive = {tile_to_laz_filename(tile): tile for tile in tile_filter}
+        self.convert_results = []
+        self.unreadable = set()
+        self.queued = set()          # (Datei, Signatur) in diesem Lauf schon eingereiht
+
+    def count(self, stage, status, seconds=0.0):
+        with self.stats_lock:
+            self.stats[stage][status] += 1
+            self.stats[stage]['busy'] += seconds
+
+    # ---- Download ------------------------------------------------------
+
+    def download_worker(self, pool, limiter, progress):
+        base_url = self.download_config.get('base_url', BASE_URL).rstrip('/')
+        while True:
+            laz_filename = self.archive_queue.get()
+            if laz_filename is DONE:
+                return
+            result = download_laz_file(laz_filename, self.laz_dir, base_url, pool, limiter, progress,
+                                       self.download_config.get('retry_attempts', DEFAULT_RETRY_ATTEMPTS),
+                                       self.download_config.get('retry_delay', DEFAULT_RETRY_DELAY))
+            status = result['status'] if result['status'] in ('ok', 'skipped') else 'failed'
+            self.events['download'].item(laz_filename, status, result['seconds'], result['bytes'])
+            self.count('download', status, result['seconds'])
+            tile = self.tile_of_archive.get(laz_filename)
+            if tile:
+                self.state.mark(tile, 'download', status)
+            if status != 'failed':
+                self.convert_queue.put(self.laz_dir / laz_filename)   # blockiert bei voller Queue
+
+    def start_downloads(self, missing):
+        progress = DownloadProgress(len(missing), live=False, label="⬇️  ")
+        pool = ConnectionPool()
+        limiter = RateLimiter(self.download_config.get('rate_limit_delay', DEFAULT_RATE_LIMIT_DELAY))
+        for laz_filename in missing:
+            self.archive_queue.put(laz_filename)
+        threads = []
+        for _ in range(self.download_workers):
+            self.archive_queue.put(DONE)
+            thread = threading.Thread(target=self.download_worker, args=(pool, limiter, progress), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        def finish():
+            for thread in threads:
+                thread.join()
+            self.events['download'].end()
+            self.convert_queue.put(DONE)
+
+        threading.Thread(target=finish, daemon=True).start()
+
+    # ---- Upload --------------------------------------------------------
+
+    def upload_worker(self):
+        while True:
+            item = self.upload_queue.get()
+            if item is DONE:
+                return
+            tile, key, path = item
+            signature = file_signature(path)
+            if signature is None or self.state.uploaded(tile, key) == signature:
+                self.events['upload'].item(key, 'skipped')
+                self.count('upload', 'skipped')
+                continue
+
+            # Im Bucket schon identisch vorhanden (ETag) zählt ebenfalls als hochgeladen
+            result = self.upload.sync_file(path, key)
+            if result['status'] == 'failed':
+                print(f"☁️  ❌ {key}: {result['error']}", flush=True)
+            else:
+                self.state.mark_uploaded(tile, key, signature)
+            self.events['upload'].item(key, result['status'], result['seconds'], result['bytes'])
+            self.count('upload', result['status'], result['seconds'])
+
+    def queue_uploads(self, tiles, report_skipped=False):
+        """Geänderte Dateien der Tiles in die Upload-Queue (blockiert bei voller Queue)"""
+        if self.upload is None:
+            return
+        for tile in sorted(tiles):
+            self.queue_files(tile, upload_files(tile, self.params, self.output_dir), report_skipped)
+
+    def queue_visibility_uploads(self, turbine_id):
+        """Sichtbarkeits-Tiles eines Windrads in die Upload-Queue (Zustand unter visibility/<id>)"""
+        if self.upload is None:
+            return
+        turbine_dir = self.output_dir / VISIBILITY_DIR / turbine_id
+        files = [(path.relative_to(self.output_dir).as_posix(), path)
+                 for path in sorted(turbine_dir.glob("tile_*.bin.gz"))]
+        self.queue_files(f"{VISIBILITY_DIR}/{turbine_id}", files, report_skipped=True)
+
+    def queue_files(self, tile, files, report_skipped=False):
+        """(key, path) eines Zustands-Eintrags einreihen, sofern seit dem letzten Upload geändert"""
+        for key, path in files:
+            signature = file_signature(path)
+            with self.stats_lock:
+                if (key, str(signature)) in self.queued:
+                    continue
+                self.queued.add((key, str(signature)))
+            if self.state.uploaded(tile, key) != signature:
+                self.upload_queue.put((tile, key, path))
+            elif report_skipped:
+                self.events['upload'].item(key, 'skipped')
+                self.count('upload', 'skipped')
+
+    def upload_visibility_index(self):
+        """visibility/index.json zuletzt – nur, wenn alle Objekte angekommen sind (wie upload_tiles.upload_all)"""
+        key = f"{VISIBILITY_DIR}/{VISIBILITY_INDEX}"
+        path = self.output_dir / key
+        if not path.exists():
+            return
+        if self.stats['upload']['failed']:
+            result = {'key': key, 'status': 'failed', 'bytes': 0, 'seconds': 0.0,
+                      'error': "nicht hochgeladen, weil andere Objekte fehlgeschlagen sind"}
+        else:
+            result = self.upload.sync_file(path, key)
+        if result['status'] == 'failed':
+            print(f"☁️  ❌ {key}: {result['error']}", flush=True)
+        self.events['upload'].item(key, result['status'], result['seconds'], result['bytes'])
+        self.count('upload', result['status'], result['seconds'])
+
+    # ---- Sichtbarkeit --------------------------------------------------
+
+    def run_visibility(self):
+        """Sichtbarkeits-Tiles geänderter Windräder (visibility_tiles.py), fertige direkt in den Upload"""
+        turbines = self.visibility['turbines']
+        events = self.events['visibility']
+        print(f"\n🗺️  Sichtbarkeit: {len(turbines)} Windräder", flush=True)
+        events.start(len(turbines))
+
+        def report(result):
+            status = 'skipped' if result['status'] == 'unchanged' else result['status']
+            events.item(result['id'], status, result.get('seconds', 0.0), result.get('bytes', 0))
+            self.count('visibility', status, result.get('seconds', 0.0))
+            if result['status'] == 'ok':
+                self.queue_visibility_uploads(result['id'])
+
+        results = update_visibility(self.output_dir, self.output_dir / VISIBILITY_DIR, turbines,
+                                    self.visibility['radius'], self.visibility['levels'],
+                                    self.visibility['eye_height'], self.visibility['workers'],
+                                    all_turbines=turbines, on_result=report)
+        # Unveränderte Windräder: Resume lädt noch nicht hochgeladene Tiles nach
+        for result in results:
+            if result['status'] == 'unchanged':
+                report(result)
+                self.queue_visibility_uploads(result['id'])
+        events.end()
+
+    # ---- Konvertierung -------------------------------------------------
+
+    def run(self):
+        """
+        Führt die Pipeline aus
+
+        Returns:
+            Dict stage → {ok, skipped, failed, busy}
+        """
+        present = [self.laz_dir / name for name in self.archives if (self.laz_dir / name).exists()]
+        missing = [name for name in self.archives if not (self.laz_dir / name).exists()]
+
+        self.events['download'].start(len(self.archives))
+        for laz_file in present:
+            self.events['download'].item(laz_file.name, 'skipped')
+            self.count('download', 'skipped')
+        self.events['convert'].start(len(self.archives))
+        per_tile = len([name for name in tile_outputs(next(iter(self.tile_filter)), self.params)
+                        if name.endswith(UPLOAD_SUFFIXES)]) if self.tile_filter else 0
+        self.events['upload'].start(len(self.tile_filter) * per_tile if self.upload else 0)
+
+        uploaders = [threading.Thread(target=self.upload_worker, daemon=True) for _ in range(self.upload_workers)]
+        for thread in uploaders:
+            thread.start()
+
+        # Vorhandene Archive gemeinsam planen (Resets vor dem ersten Worker)
+        plan, fingerprints, errors = plan_incremental(present, self.output_dir, self.params, self.tile_filter)
+        self.report_unreadable(errors)
+        pending = [(laz_file, plan, fingerprints) for laz_file in present if laz_file in plan]
+        planned_tiles = set().union(*plan.values()) if plan else set()
+
+        # Resume: Tiles, die schon konvertiert, aber noch nicht hochgeladen sind
+        converted = [tile for tile in set(self.tile_filter) - planned_tiles
+                     if upload_files(tile, self.params, self.output_dir)]
+        self.start_downloads(missing)
+        feeder = threading.Thread(target=self.queue_uploads, args=(converted, True), daemon=True)
+        feeder.start()
+
+        with ProcessPoolExecutor(max_workers=self.convert_workers) as pool:
+            self.dispatch(pool, pending)
+
+            # Nachlauf: Tiles, deren Quellen erst nachträglich vollständig wurden
+            complete = sorted(self.laz_dir / name for name in self.archives
+                              if (self.laz_dir / name).exists() and self.laz_dir / name not in self.unreadable)
+            plan, fingerprints, errors = plan_incremental(complete, self.output_dir, self.params, self.tile_filter)
+            self.report_unreadable(errors)
+            stale = [laz_file for laz_file in complete if plan.get(laz_file)]
+            if stale:
+                print(f"\n🔄 Nachlauf: {len(stale)} Dateien", flush=True)
+                self.events['convert'].start(len(stale), rerun=True)
+                self.dispatch(pool, [(laz_file, plan, fingerprints) for laz_file in stale], downloads=False)
+        self.events['convert'].end()
+
+        # Sichtbarkeit erst nach der letzten Konvertierung (Viewsheds lesen die fertigen Height Tiles)
+        if self.visibility is not None:
+            self.run_visibility()
+
+        # Alles, was sich seit dem letzten Upload geändert hat
+        feeder.join()
+        self.queue_uploads(self.tile_filter)
+        if self.upload and self.params.get('halo'):
+            layout = f"{halo_dir_name(self.params['halo'])}/layout.json"
+            if (self.output_dir / layout).exists():
+                self.upload.sync_file(self.output_dir / layout, layout)
+        for _ in uploaders:
+            self.upload_queue.put(DONE)
+        for thread in uploaders:
+            thread.join()
+        if self.upload and self.visibility is not None:
+            self.upload_visibility_index()
+        self.events['upload'].end()
+        self.state.save(force=True)
+        return self.stats
+
+    def report_unreadable(self, errors):
+        """Archive, die schon beim Planen nicht lesbar waren, als fehlgeschlagen melden"""
+        for laz_file, result in zip(sorted(errors), unreadable_results(errors)):
+            self.unreadable.add(laz_file)
+            self.convert_results.append(result)
+            record_result(self.events['convert'], result)
+            self.count('convert', 'failed')
+            print_result(result, len(self.convert_results), len(self.archives), label="🔲 ")
+
+    def dispatch(self, pool, pending, downloads=True):
+        """
+        Konvertiert geplante und neu geladene Archive, höchstens convert_workers gleichzeitig
+
+        Neue Archive kommen aus convert_queue (bis DONE, wenn downloads=True).
+        """
+        futures = {}
+        total = len(self.archives)
+        receiving = downloads
+
+        def finish(done):
+            for future in done:
+                laz_file, tiles = futures.pop(future)
+                result = collect_result(future, laz_file)
+                self.convert_results.append(result)
+                record_result(self.events['convert'], result)
+                status = 'failed' if result['error'] else 'ok'
+                self.count('convert', status, result['seconds'])
+                print_result(result, len(self.convert_results), total, label="🔲 ")
+                for tile in tiles:
+                    self.state.mark(tile, 'convert', status)
+                if not result['error']:
+                    self.queue_uploads(tiles)
+
+        while pending or receiving or futures:
+            if len(futures) >= self.convert_workers or not (pending or receiving):
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                finish(done)
+                continue
+
+            if pending:
+                laz_file, plan, fingerprints = pending.pop(0)
+            else:
+                try:
+                    laz_file = self.convert_queue.get(timeout=0.2)
+                except queue.Empty:
+                    finish([future for future in list(futures) if future.done()])
+                    continue
+                if laz_file is DONE:
+                    receiving = False
+                    continue
+                plan, fingerprints, errors = plan_incremental([laz_file], self.output_dir, self.params,
+                                                              self.tile_filter)
+                if errors:
+                    self.report_unreadable(errors)
+                    continue
+
+            tiles = plan[laz_file]
+            if not tiles:
+                self.events['convert'].item(laz_file.name, 'skipped')
+                self.count('convert', 'skipped')
+                continue
+            future = pool.submit(convert_one, laz_file, self.output_dir,
+                                 dict(self.options, planned=(tiles, fingerprints[laz_file])))
+            futures[future] = (laz_file, tiles)
+            finish([future for future in list(futures) if future.done()])
+
+
+def main():
+    import argparse
+
+    config = load_config()
+    convert_config = config.get('convert', {})
+    upload_config = config.get('upload', {})
+
+    parser = argparse.ArgumentParser(
+        description="Run download → convert → visibility → upload as overlapping stages with bounded queues",
+        epilog="Beispiel: python3 pipeline.py --resume"
+    )
+    parser.add_argument("-t", "--tile-list", help="Tile list (default: paths.tile_list)")
+    parser.add_argument("--laz-dir", help="Archive directory (default: paths.laz_downloads)")
+    parser.add_argument("-o", "--output", help="Tile directory (default: paths.tiles_output)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep per-tile state and skip files that were already uploaded unchanged")
+    parser.add_argument("--no-upload", action="store_true", help="Skip the upload stage")
+    parser.add_argument("--no-visibility", action="store_true",
+                        help="Skip the per-turbine visibility tiles (visibility_tiles.py)")
+    parser.add_argument("--download-workers", type=int,
+                        default=config.get('download', {}).get('concurrency', DEFAULT_CONCURRENCY),
+                        help="Download threads (default: download.concurrency)")
+    parser.add_argument("--convert-workers", type=int, default=convert_config.get('parallel_workers', os.cpu_count()),
+                        help="Conversion processes (default: convert.parallel_workers)")
+    parser.add_argument("--upload-workers", type=int,
+                        default=upload_config.get('parallel_uploads', DEFAULT_PARALLEL_UPLOADS),
+                        help="Upload threads (default: upload.parallel_uploads)")
+    parser.add_argument("--bucket", default=upload_config.get('bucket_name', 'windrad-tiles'),
+                        help="R2 bucket (default: upload.bucket_name)")
+    parser.add_argument("--endpoint-url", default=os.environ.get('S3_ENDPOINT_URL') or upload_config.get('endpoint_url'),
+                        help="S3 endpoint (default: $S3_ENDPOINT_URL or upload.endpoint_url)")
+    parser.add_argument("--progress-log", default=str(default_progress_log()),
+                        help="JSONL progress events for monitor.py (default: paths.progress_log, '' to disable)")
+
+    args = parser.parse_args()
+
+    tile_list = args.tile_list or config_path(config, 'tile_list', '../tiles/windrad-tiles.txt')
+    laz_dir = Path(args.laz_dir) if args.laz_dir else config_path(config, 'laz_downloads', '../laz_downloads')
+    output_dir = Path(args.output) if args.output else config_path(config, 'tiles_output', '../tiles_output')
+
+    print("🌍 Windrad LAZ Pipeline (Download → Convert → Visibility → Upload, überlappend)")
+    print("=" * 60)
+
+    try:
+        tile_filter = load_tile_list(tile_list)
+    except OSError as e:
+        print(f"❌ Tile-Liste nicht lesbar: {e}")
+        sys.exit(1)
+
+    upload = None
+    if not args.no_upload:
+        try:
+            upload = S3Uploader(args.bucket, args.endpoint_url, args.upload_workers,
+                                upload_config.get('verify_after_upload', True),
+                                upload_config.get('cache_control', DEFAULT_CACHE_CONTROL))
+            upload.list_remote()
+        except Exception as e:
+            print(f"❌ Upload nicht möglich: {e} (oder --no-upload)")
+            sys.exit(1)
+
+    visibility = None
+    if not args.no_visibility:
+        visibility_config = config.get('visibility', {})
+        try:
+            turbines = load_turbines()
+        except (OSError, ValueError) as e:
+            print(f"❌ Windräder nicht lesbar: {e} (oder --no-visibility)")
+            sys.exit(1)
+        visibility = {
+            'turbines': turbines,
+            'radius': visibility_config.get('radius', DEFAULT_RADIUS),
+            'levels': visibility_config.get('levels', DEFAULT_LEVELS),
+            'eye_height': visibility_config.get('eye_height', EYE_HEIGHT),
+            'workers': max(1, visibility_config.get('parallel_workers', 1)),
+        }
+
+    laz_dir.mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    archives = sorted({tile_to_laz_filename(tile) for tile in tile_filter} - {None})
+
+    tile_size = convert_config.get('tile_size', 1000)
+    resolution = convert_config.get('resolution', 1.0)
+    overview_levels = convert_config.get('overview_levels', DEFAULT_OVERVIEW_LEVELS)
+    halo = convert_config.get('halo', 0)
+    params = conversion_params(tile_size, resolution, 'ring', DEFAULT_FILL_ITERATIONS, DEFAULT_TILE_FORMATS,
+                               overview_levels, halo)
+    options = {
+        'tile_size': tile_size,
+        'resolution': resolution,
+        'tile_filter': tile_filter,
+        'fill_strategy': 'ring',
+        'merge': True,
+        'incremental': True,
+        'formats': DEFAULT_TILE_FORMATS,
+        'gzip_level': DEFAULT_GZIP_LEVEL,
+        'overview_levels': overview_levels,
+        'halo': halo,
+    }
+    workers = (max(1, args.download_workers), max(1, args.convert_workers), max(1, args.upload_workers))
+
+    print(f"📋 Tile-Liste: {tile_list} ({len(tile_filter)} Tiles, {len(archives)} Archive)")
+    print(f"📁 Archive: {laz_dir}")
+    print(f"📁 Tiles:   {output_dir}")
+    print(f"⚙️  Worker:  {workers[0]} Download, {workers[1]} Konvertierung, "
+          + (f"{visibility['workers']} Sichtbarkeit, " if visibility else "keine Sichtbarkeit, ")
+          + (f"{workers[2]} Upload → {args.bucket}" if upload else "kein Upload"))
+    print(f"🔄 Resume:  {'ja (hochgeladene Dateien überspringen)' if args.resume else 'nein'}")
+    print()
+
+    state = PipelineState(resume=args.resume)
+    state.step('pipeline', 'running')
+    start = time.perf_counter()
+
+    pipeline = Pipeline(archives, tile_filter, laz_dir, output_dir, options, params, state, config, workers,
+                        upload, args.progress_log or None, visibility)
+    try:
+        stats = pipeline.run()
+    except KeyboardInterrupt:
+        state.step('pipeline', 'failed', 'interrupted')
+        print("\n\nAbgebrochen – weiter mit: python3 pipeline.py --resume")
+        sys.exit(130)
+    elapsed = time.perf_counter() - start
+
+    failed = sum(stage['failed'] for stage in stats.values())
+    for stage in STAGES:
+        if stage == 'visibility' and visibility is None:
+            continue
+        state.step(stage, 'failed' if stats[stage]['failed'] else 'completed',
+                   f"{stats[stage]['ok']} ok, {stats[stage]['skipped']} skipped, {stats[stage]['failed']} failed")
+    state.step('pipeline', 'failed' if failed else 'completed', f"{elapsed:.0f}s")
+
+    print()
+    print("=" * 60)
+    print("📊 Zusammenfassung")
+    stage_workers = {'download': workers[0], 'convert': workers[1],
+                     'visibility': visibility['workers'] if visibility else 1, 'upload': workers[2]}
+    for stage, label in (('download', "Download"), ('convert', "Convert"), ('visibility', "Visibility"),
+                         ('upload', "Upload")):
+        if stage == 'visibility' and visibility is None:
+            continue
+        s = stats[stage]
+        workers_count = stage_workers[stage]
+        print(f"   {label:<10} {s['ok']:>5} ok, {s['skipped']:>5} übersprungen, {s['failed']:>3} fehlgeschlagen"
+              f" | {s['busy'] / workers_count:.1f}s pro Worker")
+    stage_seconds = sum(stats[stage]['busy'] / count for stage, count in stage_workers.items())
+    print(f"⏱️  Gesamt: {elapsed:.1f}s (Stufen nacheinander: ~{stage_seconds:.1f}s)")
+
+    if failed:
+        print(f"\n⚠️  {failed} Fehler – erneut versuchen mit: python3 pipeline.py --resume")
+        sys.exit(1)
+    print("\n✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,13 @@
 # ========================================
 # Windrad LAZ Automation Pipeline
 # ========================================
-# Vollautomatische Verarbeitung: Download → Convert → Upload
+# Vollautomatische Verarbeitung: Download → Convert → Visibility → Upload
 #
 # Usage:
 #   ./pipeline.sh --all                    # Complete pipeline
 #   ./pipeline.sh --download               # Only download
 #   ./pipeline.sh --convert                # Only convert
+#   ./pipeline.sh --visibility             # Only precompute visibility tiles
 #   ./pipeline.sh --upload                 # Only upload
 #   ./pipeline.sh --convert --upload       # Convert + Upload
 #   ./pipeline.sh --resume                 # Resume from last failure
@@ -102,7 +103,7 @@ EOF
 # ========================================
 
 step_download() {
-    log_info "Schritt 1/3: Download LAZ-Dateien"
+    log_info "Schritt 1/4: Download LAZ-Dateien"
     log_info "Tile-Liste: $TILE_LIST"
     log_info "Output: $LAZ_DIR"
 
@@ -110,7 +111,7 @@ step_download() {
 
     # Run download script
     if python3 "$SCRIPT_DIR/download_laz.py" "$TILE_LIST" --yes -o "$LAZ_DIR" >> "$LOG_FILE" 2>&1; then
-        LAZ_COUNT=$(ls -1 "$LAZ_DIR"/*.laz 2>/dev/null | wc -l | tr -d ' ')
+        LAZ_COUNT=$(ls -1 "$LAZ_DIR"/*.zip "$LAZ_DIR"/*.laz 2>/dev/null | wc -l | tr -d ' ')
         log_success "Download abgeschlossen: $LAZ_COUNT LAZ-Dateien"
         update_state "download" "completed" "$LAZ_COUNT files"
         return 0
@@ -122,7 +123,7 @@ step_download() {
 }
 
 step_convert() {
-    log_info "Schritt 2/3: Konvertiere LAZ → Binary Tiles"
+    log_info "Schritt 2/4: Konvertiere LAZ → Binary Tiles"
     log_info "Input: $LAZ_DIR"
     log_info "Output: $TILES_OUTPUT"
 
@@ -140,8 +141,10 @@ step_convert() {
     # Create output dir
     mkdir -p "$TILES_OUTPUT"
 
-    # Run conversion
-    if bash "$SCRIPT_DIR/convert_all_laz.sh" >> "$LOG_FILE" 2>&1; then
+    # Run conversion (parallel, Worker-Anzahl aus config.json)
+    if python3 "$SCRIPT_DIR/convert_all_laz.py" "$LAZ_DIR" \
+        --tile-list "$TILE_LIST" \
+        --output "$TILES_OUTPUT" >> "$LOG_FILE" 2>&1; then
         TILE_COUNT=$(ls -1 "$TILES_OUTPUT"/*.bin.gz 2>/dev/null | wc -l | tr -d ' ')
         log_success "Konvertierung abgeschlossen: $TILE_COUNT Tiles"
         update_state "convert" "completed" "$TILE_COUNT tiles"
@@ -153,19 +156,39 @@ step_convert() {
     fi
 }
 
+step_visibility() {
+    log_info "Schritt 3/4: Sichtbarkeits-Kacheln pro Windrad"
+    log_info "Input: $TILES_OUTPUT"
+    log_info "Output: $TILES_OUTPUT/visibility"
+
+    update_state "visibility" "running" ""
+
+    if [ -f "$VENV/bin/activate" ]; then
+        source "$VENV/bin/activate"
+    fi
+
+    # Nur geänderte Windräder werden neu gerechnet (index.json)
+    if python3 "$SCRIPT_DIR/visibility_tiles.py" --tiles-dir "$TILES_OUTPUT" >> "$LOG_FILE" 2>&1; then
+        TURBINE_COUNT=$(ls -1d "$TILES_OUTPUT"/visibility/*/ 2>/dev/null | wc -l | tr -d ' ')
+        log_success "Sichtbarkeit berechnet: $TURBINE_COUNT Windräder"
+        update_state "visibility" "completed" "$TURBINE_COUNT turbines"
+        return 0
+    else
+        log_error "Sichtbarkeits-Berechnung fehlgeschlagen!"
+        update_state "visibility" "failed" ""
+        return 1
+    fi
+}
+
 step_upload() {
-    log_info "Schritt 3/3: Upload zu Cloudflare R2"
+    log_info "Schritt 4/4: Upload zu Cloudflare R2"
     log_info "Bucket: windrad-tiles"
-    log_info "Files: $TILES_OUTPUT/*.bin.gz"
+    log_info "Files: $TILES_OUTPUT/*.bin.gz + visibility/"
 
     update_state "upload" "running" ""
 
-    # Check wrangler
-    if ! command -v wrangler &> /dev/null; then
-        log_error "Wrangler CLI nicht gefunden!"
-        log_info "Installation: npm install -g wrangler"
-        update_state "upload" "failed" "wrangler missing"
-        return 1
+    if [ -f "$VENV/bin/activate" ]; then
+        source "$VENV/bin/activate"
     fi
 
     # Check tiles exist
@@ -176,8 +199,8 @@ step_upload() {
         return 1
     fi
 
-    # Run upload
-    if bash "$SCRIPT_DIR/upload_to_r2.sh" <<< "y" >> "$LOG_FILE" 2>&1; then
+    # Run upload (parallel über die S3-API, unveränderte Objekte werden übersprungen)
+    if python3 "$SCRIPT_DIR/upload_tiles.py" --tiles-dir "$TILES_OUTPUT" >> "$LOG_FILE" 2>&1; then
         log_success "Upload abgeschlossen: $TILE_COUNT Tiles"
         update_state "upload" "completed" "$TILE_COUNT tiles"
         return 0
@@ -202,16 +225,18 @@ main() {
     # Parse arguments
     DO_DOWNLOAD=false
     DO_CONVERT=false
+    DO_VISIBILITY=false
     DO_UPLOAD=false
     DO_RESUME=false
 
     if [ "$#" -eq 0 ]; then
-        echo "Usage: $0 [--all|--download|--convert|--upload|--resume]"
+        echo "Usage: $0 [--all|--download|--convert|--visibility|--upload|--resume]"
         echo ""
         echo "Options:"
-        echo "  --all        Run complete pipeline (download → convert → upload)"
+        echo "  --all        Run complete pipeline (download → convert → visibility → upload)"
         echo "  --download   Only download LAZ files"
         echo "  --convert    Only convert LAZ to binary tiles"
+        echo "  --visibility Only precompute per-turbine visibility tiles"
         echo "  --upload     Only upload tiles to R2"
         echo "  --resume     Resume from last failure"
         echo ""
@@ -227,6 +252,7 @@ main() {
             --all)
                 DO_DOWNLOAD=true
                 DO_CONVERT=true
+                DO_VISIBILITY=true
                 DO_UPLOAD=true
                 ;;
             --download)
@@ -235,6 +261,9 @@ main() {
             --convert)
                 DO_CONVERT=true
                 ;;
+            --visibility)
+                DO_VISIBILITY=true
+                ;;
             --upload)
                 DO_UPLOAD=true
                 ;;
@@ -260,7 +289,7 @@ main() {
             # If LAZ files exist but no tiles → start at convert
             # If tiles exist but not uploaded → start at upload
 
-            LAZ_COUNT=$(ls -1 "$LAZ_DIR"/*.laz 2>/dev/null | wc -l | tr -d ' ')
+            LAZ_COUNT=$(ls -1 "$LAZ_DIR"/*.zip "$LAZ_DIR"/*.laz 2>/dev/null | wc -l | tr -d ' ')
             TILE_COUNT=$(ls -1 "$TILES_OUTPUT"/*.bin.gz 2>/dev/null | wc -l | tr -d ' ')
 
             if [ "$TILE_COUNT" -gt 0 ]; then
@@ -269,17 +298,20 @@ main() {
             elif [ "$LAZ_COUNT" -gt 0 ]; then
                 log_info "LAZ-Dateien gefunden ($LAZ_COUNT) → Starte bei Konvertierung"
                 DO_CONVERT=true
+                DO_VISIBILITY=true
                 DO_UPLOAD=true
             else
                 log_warn "Keine vorherigen Daten gefunden → Starte komplette Pipeline"
                 DO_DOWNLOAD=true
                 DO_CONVERT=true
+                DO_VISIBILITY=true
                 DO_UPLOAD=true
             fi
         else
             log_warn "Kein State-File gefunden → Starte komplette Pipeline"
             DO_DOWNLOAD=true
             DO_CONVERT=true
+            DO_VISIBILITY=true
             DO_UPLOAD=true
         fi
     fi
@@ -304,6 +336,12 @@ main() {
         fi
     fi
 
+    if [ "$FAILED" = false ] && [ "$DO_VISIBILITY" = true ]; then
+        if ! step_visibility; then
+            FAILED=true
+        fi
+    fi
+
     if [ "$FAILED" = false ] && [ "$DO_UPLOAD" = true ]; then
         if ! step_upload; then
             FAILED=true
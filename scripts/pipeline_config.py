@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Gemeinsame Konfiguration der Pipeline-Scripts
+
+Liest scripts/config.json. Pfade in der Konfiguration sind relativ
+zum scripts-Verzeichnis angegeben (z.B. "../tiles_output").
+"""
+
+import json
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+CONFIG_FILE = SCRIPT_DIR / "config.json"
+
+
+def load_config(config_file=CONFIG_FILE):
+    """
+    Lädt die Pipeline-Konfiguration
+
+    Args:
+        config_file: Path zur config.json (default: scripts/config.json)
+
+    Returns:
+        Dict mit der Konfiguration (leer, wenn die Datei fehlt)
+    """
+    config_file = Path(config_file)
+    if not config_file.exists():
+        return {}
+    with open(config_file, 'r') as f:
+        return json.load(f)
+
+
+def config_path(config, key, default=None):
+    """
+    Löst einen Pfad aus dem Abschnitt "paths" auf
+
+    Args:
+        config: Konfiguration (siehe load_config)
+        key: Schlüssel in config["paths"] (z.B. "tiles_output")
+        default: Fallback, wenn der Schlüssel fehlt (relativ zu scripts/)
+
+    Returns:
+        Absoluter Path oder None
+    """
+    value = config.get('paths', {}).get(key, default)
+    if value is None:
+        return None
+    return (SCRIPT_DIR / value).resolve()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Fortschritts-Events der Pipeline-Stufen (JSONL)
+
+Jede Stufe (download, convert, visibility, upload) hängt für jede fertige
+Datei eine Zeile an die Event-Datei an (paths.progress_log in config.json).
+monitor.py liest nur die neu hinzugekommenen Zeilen – kein Scannen der
+Verzeichnisse.
+
+Eine Zeile pro Event:
+    {"ts": 1760000000.1, "stage": "download", "event": "start", "total": 117}
+    {"ts": ..., "stage": "download", "event": "item", "item": "als_33459-5722.zip",
+     "status": "ok", "seconds": 12.3, "bytes": 52428800}
+    {"ts": ..., "stage": "download", "event": "end", "seconds": 300.0}
+
+status: ok, skipped, failed (wie in den Ergebnissen der Stufen).
+"""
+
+import os
+import json
+import time
+import threading
+
+from pipeline_config import load_config, config_path
+
+
+def default_progress_log():
+    """Event-Datei aus config.json (paths.progress_log)"""
+    return config_path(load_config(), 'progress_log', './pipeline_events.jsonl')
+
+
+class ProgressLog:
+    """
+    Schreibt Events einer Stufe (thread-safe, eine Zeile pro write)
+
+    path=None schaltet das Logging ab (alle Methoden sind dann No-ops).
+    """
+
+    def __init__(self, path, stage):
+        self.path = path
+        self.stage = stage
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+
+    def _write(self, event, **fields):
+        if self.path is None:
+            return
+        line = json.dumps(dict(ts=round(time.time(), 3), stage=self.stage, event=event, **fields),
+                          ensure_ascii=False) + "\n"
+        with self.lock:
+            # O_APPEND: Zeilen paralleler Schreiber landen vollständig hintereinander
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode('utf-8'))
+            finally:
+                os.close(fd)
+
+    def start(self, total, **info):
+        """Neuer Lauf der Stufe mit total Einträgen"""
+        self.start_time = time.time()
+        self._write('start', total=total, **info)
+
+    def item(self, name, status, seconds=0.0, bytes=0, **info):
+        """Ein Eintrag fertig (ok/skipped/failed) mit Dauer und Bytes"""
+        self._write('item', item=name, status=status, seconds=round(seconds, 3), bytes=int(bytes), **info)
+
+    def end(self, **info):
+        """Lauf der Stufe beendet"""
+        self._write('end', seconds=round(time.time() - self.start_time, 3), **info)
+
+
+class EventReader:
+    """
+    Liest eine Event-Datei inkrementell
+
+    Merkt sich die Leseposition; eine unvollständige letzte Zeile wird beim
+    nächsten Aufruf vervollständigt. Wird die Datei ersetzt oder gekürzt,
+    beginnt das Lesen von vorn.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self.partial = b""
+
+    def read(self):
+        """
+        Returns:
+            (events, reset): neue Events seit dem letzten Aufruf; reset=True,
+            wenn die Datei neu begonnen hat (bisherige Auswertung verwerfen)
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [], False
+
+        reset = False
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            reset = self.inode is not None
+            self.inode = stat.st_ino
+            self.offset = 0
+            self.partial = b""
+        if stat.st_size == self.offset:
+            return [], reset
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = self.partial + f.read(stat.st_size - self.offset)
+        self.offset = stat.st_size
+
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        events = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events, reset
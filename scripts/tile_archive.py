@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Tile-Archiv: alle Height Tiles in einer Datei (tiles.dsma)
+
+Statt hunderter loser tile_X_Y.bin.gz-Objekte (ein HTTP-Request und eine
+Storage-Operation pro Tile) liegen die komprimierten Tiles hintereinander
+in einer Datei, mit einem nach (tile_x, tile_y) sortierten Index – nach dem
+Vorbild von PMTiles. Ein Client lädt Header und Index einmal und holt
+danach jedes Tile mit genau einem HTTP-Range-Request aus einem Objekt.
+
+Aufbau (little-endian):
+
+    Header (32 Bytes)
+    Offset  Typ      Feld
+    0       4s       Magic b"DSMA"
+    4       uint8    Version (1)
+    5       uint8    Codec der Tiles (0 = bin, 1 = gz, 2 = zst, 3 = br)
+    6       uint16   Zellen pro Kachelkante (1000)
+    8       float32  Auflösung in Metern
+    12      uint32   Anzahl Index-Einträge
+    16      uint64   Offset des Index
+    24      uint32   CRC32 des Index
+    28      uint32   reserviert
+
+    Index (20 Bytes pro Eintrag, sortiert nach tile_x, tile_y)
+    0       int32    tile_x (km, wie im Dateinamen)
+    4       int32    tile_y
+    8       uint64   Offset der Tile-Daten
+    16      uint32   Länge der Tile-Daten
+
+    Tile-Daten: je Tile der Inhalt von tile_X_Y.bin.<codec> (Uint16-Grid
+    in cm, Zeile 0 = Süden, komprimiert wie die losen Dateien)
+
+Anhängen (append_tiles): neue Tile-Daten und ein neuer Index kommen ans
+Dateiende, zuletzt wird der Header überschrieben. Bis dahin zeigt der alte
+Header auf den alten, weiter gültigen Index – Leser sehen nie einen halben
+Stand, ein Abbruch hinterlässt nur ungenutzte Bytes am Ende. Ersetzte Tiles
+bleiben als Leerstand in der Datei, bis "compact" sie neu schreibt.
+Frisch gepackte Archive haben den Index direkt hinter dem Header: Die
+ersten 16 KB enthalten dann Header und Index von ~800 Tiles.
+
+Usage:
+    python3 tile_archive.py pack ../tiles_output -o ../tiles_output/tiles.dsma
+    python3 tile_archive.py sync ../tiles_output
+    python3 tile_archive.py info ../tiles_output/tiles.dsma
+    python3 tile_archive.py compact ../tiles_output/tiles.dsma
+"""
+
+import os
+import re
+import sys
+import zlib
+import struct
+import threading
+import contextlib
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: keine Dateisperren, nur sequentiell sicher
+    fcntl = None
+
+MAGIC = b"DSMA"
+VERSION = 1
+HEADER_FORMAT = "<4sBBHfIQII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+ENTRY_FORMAT = "<iiQI"
+ENTRY_SIZE = struct.calcsize(ENTRY_FORMAT)
+
+# Codec der Tile-Daten (wie die Tile-Formate in laz_to_binary.py)
+CODECS = {'bin': 0, 'gz': 1, 'zst': 2, 'br': 3}
+CONTENT_ENCODINGS = {'bin': None, 'gz': 'gzip', 'zst': 'zstd', 'br': 'br'}
+DEFAULT_CODEC = 'gz'
+DEFAULT_ARCHIVE_NAME = "tiles.dsma"
+SYNC_BATCH = 64              # Tiles pro Anhang beim Abgleich (begrenzt den Speicher)
+
+# Nur Basis-Tiles (keine Übersichtsstufen tile_X_Y_4m.bin)
+TILE_PATTERN = re.compile(r"tile_(-?\d+)_(-?\d+)\.bin")
+
+
+def pack_header(codec, grid_size, resolution, count, index_offset, index_crc):
+    """Header-Bytes (HEADER_SIZE)"""
+    return struct.pack(HEADER_FORMAT, MAGIC, VERSION, CODECS[codec], grid_size, resolution,
+                       count, index_offset, index_crc, 0)
+
+
+def read_header(data):
+    """
+    Liest den Archiv-Header
+
+    Returns:
+        Dict mit version, codec, grid_size, resolution, count, index_offset, index_crc
+
+    Raises:
+        ValueError: Kein Tile-Archiv oder unbekannte Version
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Datei zu kurz für einen Archiv-Header")
+
+    magic, version, codec, grid_size, resolution, count, index_offset, index_crc, _ = \
+        struct.unpack_from(HEADER_FORMAT, data)
+
+    if magic != MAGIC:
+        raise ValueError(f"Kein Tile-Archiv (Magic {magic!r})")
+    if version != VERSION:
+        raise ValueError(f"Nicht unterstützte Archiv-Version: {version}")
+
+    return {
+        'version': version,
+        'codec': {v: k for k, v in CODECS.items()}[codec],
+        'grid_size': grid_size,
+        'resolution': round(resolution, 6),
+        'count': count,
+        'index_offset': index_offset,
+        'index_crc': index_crc,
+    }
+
+
+def encode_index(entries):
+    """Index-Bytes aus {(tile_x, tile_y): (offset, length)}, sortiert"""
+    return b"".join(struct.pack(ENTRY_FORMAT, tile_x, tile_y, offset, length)
+                    for (tile_x, tile_y), (offset, length) in sorted(entries.items()))
+
+
+def decode_index(data, header):
+    """
+    Index-Einträge aus den Index-Bytes
+
+    Returns:
+        Dict {(tile_x, tile_y): (offset, length)}
+
+    Raises:
+        ValueError: Index unvollständig oder CRC-Fehler
+    """
+    if len(data) != header['count'] * ENTRY_SIZE:
+        raise ValueError(f"Index unvollständig: {len(data)} Bytes statt {header['count'] * ENTRY_SIZE}")
+    if zlib.crc32(data) != header['index_crc']:
+        raise ValueError("CRC32 des Index stimmt nicht – Archiv beschädigt")
+    return {(tile_x, tile_y): (offset, length)
+            for tile_x, tile_y, offset, length in struct.iter_unpack(ENTRY_FORMAT, data)}
+
+
+def read_archive_index(fd):
+    """(Header, Index) eines geöffneten Archivs per pread"""
+    header = read_header(os.pread(fd, HEADER_SIZE, 0))
+    index = os.pread(fd, header['count'] * ENTRY_SIZE, header['index_offset'])
+    return header, decode_index(index, header)
+
+
+@contextlib.contextmanager
+def locked_archive(path):
+    """
+    Öffnet ein Archiv exklusiv zum Schreiben (flock, legt es bei Bedarf an)
+
+    Wurde die Datei ersetzt, während auf die Sperre gewartet wurde (compact),
+    wird die neue Datei geöffnet – sonst gingen Anhänge ins Leere.
+
+    Yields:
+        Dateideskriptor (O_RDWR)
+    """
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            current = os.stat(path).st_ino == os.fstat(fd).st_ino
+        except FileNotFoundError:
+            current = False
+        if current:
+            break
+        os.close(fd)
+    try:
+        yield fd
+    finally:
+        os.close(fd)   # gibt auch die Sperre frei
+
+
+def append_tiles(path, payloads, codec=DEFAULT_CODEC, grid_size=1000, resolution=1.0):
+    """
+    Hängt Tiles an ein Archiv an (legt es bei Bedarf an)
+
+    Bereits enthaltene Tiles werden im Index ersetzt; ihre alten Daten
+    bleiben bis zum nächsten compact_archive als Leerstand stehen.
+
+    Args:
+        path: Archiv-Datei
+        payloads: Dict {(tile_x, tile_y): komprimierte Tile-Daten im codec}
+        codec: Codec der Tile-Daten (muss zum Archiv passen)
+        grid_size: Zellen pro Kachelkante
+        resolution: Auflösung in Metern
+
+    Raises:
+        ValueError: Archiv mit anderem Codec / Grid
+    """
+    with locked_archive(path) as fd:
+        if os.fstat(fd).st_size:
+            header, entries = read_archive_index(fd)
+            if (header['codec'], header['grid_size'], header['resolution']) != (codec, grid_size, round(resolution, 6)):
+                raise ValueError(f"Archiv {path} hat {header['codec']}/{header['grid_size']} Zellen/"
+                                 f"{header['resolution']:g} m, nicht {codec}/{grid_size}/{resolution:g} m")
+        else:
+            entries = {}
+            os.pwrite(fd, pack_header(codec, grid_size, resolution, 0, HEADER_SIZE, zlib.crc32(b"")), 0)
+
+        offset = os.fstat(fd).st_size
+        for key, payload in sorted(payloads.items()):
+            os.pwrite(fd, payload, offset)
+            entries[key] = (offset, len(payload))
+            offset += len(payload)
+
+        index = encode_index(entries)
+        os.pwrite(fd, index, offset)
+        os.fsync(fd)
+
+        # Erst jetzt umschalten: Header zeigt auf den neuen Index
+        os.pwrite(fd, pack_header(codec, grid_size, resolution, len(entries), offset, zlib.crc32(index)), 0)
+        os.fsync(fd)
+
+
+def write_archive(path, sources, codec=DEFAULT_CODEC, grid_size=1000, resolution=1.0):
+    """
+    Schreibt ein neues Archiv ohne Leerstand (atomar über eine temporäre Datei)
+
+    Der Index steht direkt hinter dem Header, die Tile-Daten folgen
+    sortiert – Header und Index lassen sich mit einem Range-Request laden.
+
+    Args:
+        path: Archiv-Datei (wird ersetzt)
+        sources: Dict {(tile_x, tile_y): Funktion () → Tile-Daten}
+        codec, grid_size, resolution: wie append_tiles
+
+    Returns:
+        Dateigröße in Bytes
+    """
+    path = Path(path)
+    keys = sorted(sources)
+    index_offset = HEADER_SIZE
+    entries = {}
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.seek(index_offset + len(keys) * ENTRY_SIZE)
+        for key in keys:
+            payload = sources[key]()
+            entries[key] = (f.tell(), len(payload))
+            f.write(payload)
+
+        index = encode_index(entries)
+        f.seek(0)
+        f.write(pack_header(codec, grid_size, resolution, len(entries), index_offset, zlib.crc32(index)))
+        f.write(index)
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+def loose_tiles(tiles_dir, codec=DEFAULT_CODEC):
+    """Lose Basis-Tiles (tile_X_Y.bin.<codec>) eines Verzeichnisses als {(tile_x, tile_y): Path}"""
+    suffix = "" if codec == 'bin' else f".{codec}"
+    tiles = {}
+    for file_path in Path(tiles_dir).glob(f"tile_*.bin{suffix}"):
+        match = TILE_PATTERN.fullmatch(file_path.name[:len(file_path.name) - len(suffix)])
+        if match:
+            tiles[int(match.group(1)), int(match.group(2))] = file_path
+    return tiles
+
+
+def pack_directory(tiles_dir, path, codec=DEFAULT_CODEC, grid_size=1000, resolution=1.0):
+    """
+    Packt alle losen Basis-Tiles (tile_X_Y.bin.<codec>) eines Verzeichnisses
+
+    Returns:
+        (Anzahl Tiles, Dateigröße in Bytes)
+    """
+    sources = {key: file_path.read_bytes for key, file_path in loose_tiles(tiles_dir, codec).items()}
+    return len(sources), write_archive(path, sources, codec, grid_size, resolution)
+
+
+def sync_archive(path, tiles_dir, codec=DEFAULT_CODEC, grid_size=1000, resolution=1.0):
+    """
+    Bringt ein Archiv auf den Stand der losen Basis-Tiles eines Verzeichnisses
+
+    Fehlende oder geänderte Tiles werden angehängt (append_tiles, in
+    Gruppen von SYNC_BATCH), unveränderte bleiben stehen – auch Tiles, die
+    ein inkrementeller Lauf gar nicht angefasst hat. Legt das Archiv bei
+    Bedarf an. Aufruf nach der Konvertierung (ohne parallele Konverter).
+
+    Returns:
+        (Anzahl angehängt, Anzahl Tiles im Verzeichnis)
+    """
+    files = loose_tiles(tiles_dir, codec)
+    current = set()
+    if Path(path).exists() and Path(path).stat().st_size:
+        archive = TileArchive(path)
+        try:
+            for key, file_path in files.items():
+                entry = archive.entry(*key)
+                if entry and entry[2] == file_path.stat().st_size and archive.read(*key) == file_path.read_bytes():
+                    current.add(key)
+        finally:
+            archive.close()
+
+    changed = sorted(set(files) - current)
+    for start in range(0, len(changed), SYNC_BATCH):
+        batch = changed[start:start + SYNC_BATCH]
+        append_tiles(path, {key: files[key].read_bytes() for key in batch}, codec, grid_size, resolution)
+    if not Path(path).exists():
+        append_tiles(path, {}, codec, grid_size, resolution)
+    return len(changed), len(files)
+
+
+def compact_archive(path):
+    """
+    Schreibt ein Archiv ohne Leerstand neu (ersetzte Tiles, abgebrochene Anhänge)
+
+    Returns:
+        (Größe vorher, Größe nachher) in Bytes
+    """
+    with locked_archive(path) as fd:
+        header, entries = read_archive_index(fd)
+        before = os.fstat(fd).st_size
+        sources = {key: (lambda entry=entry: os.pread(fd, entry[1], entry[0])) for key, entry in entries.items()}
+        after = write_archive(path, sources, header['codec'], header['grid_size'], header['resolution'])
+    return before, after
+
+
+class TileArchive:
+    """
+    Lesezugriff auf ein Tile-Archiv (thread-safe)
+
+    Tile-Daten werden per pread gelesen, der Index liegt im Speicher.
+    Jeder Zugriff prüft per stat(), ob das Archiv seit dem letzten Laden
+    ergänzt (Größe/mtime) oder ersetzt (Inode, z.B. compact) wurde, und
+    lädt dann Header und Index neu. Deskriptoren ersetzter Dateien bleiben
+    bis close() offen, damit laufende Lesezugriffe nicht ins Leere gehen.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.fd = None
+        self.retired = []
+        self.signature = None
+        self.header = None
+        self.entries = {}
+
+    def refresh(self):
+        """Header und Index neu laden, wenn sich die Datei geändert hat"""
+        stat = os.stat(self.path)
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            if signature == self.signature:
+                return
+            if self.signature is None or signature[0] != self.signature[0]:
+                fd = os.open(self.path, os.O_RDONLY)
+                if self.fd is not None:
+                    self.retired.append(self.fd)
+                self.fd = fd
+            self.header, self.entries = read_archive_index(self.fd)
+            self.signature = signature
+
+    @property
+    def codec(self):
+        return self.header['codec']
+
+    @property
+    def content_encoding(self):
+        """Content-Encoding der Tile-Daten (None = roh)"""
+        return CONTENT_ENCODINGS[self.header['codec']]
+
+    def entry(self, tile_x, tile_y):
+        """
+        Lage eines Tiles im Archiv
+
+        Returns:
+            (fd, offset, length) oder None, wenn das Tile fehlt. fd bleibt
+            gültig, solange das Archiv nicht geschlossen wird.
+        """
+        self.refresh()
+        with self.lock:
+            entry = self.entries.get((int(tile_x), int(tile_y)))
+            return (self.fd, *entry) if entry else None
+
+    def read(self, tile_x, tile_y):
+        """Komprimierte Tile-Daten (bytes) oder None"""
+        entry = self.entry(tile_x, tile_y)
+        if entry is None:
+            return None
+        fd, offset, length = entry
+        return os.pread(fd, length, offset)
+
+    def stats(self):
+        """Anzahl Tiles, Dateigröße und Leerstand in Bytes"""
+        self.refresh()
+        with self.lock:
+            payload = sum(length for _, length in self.entries.values())
+            size = self.signature[1]
+            return {
+                'tiles': len(self.entries),
+                'codec': self.codec,
+                'grid_size': self.header['grid_size'],
+                'resolution': self.header['resolution'],
+                'bytes': size,
+                'payload_bytes': payload,
+                'unused_bytes': size - HEADER_SIZE - len(self.entries) * ENTRY_SIZE - payload,
+                'index_offset': self.header['index_offset'],
+            }
+
+    def close(self):
+        with self.lock:
+            for fd in self.retired + ([self.fd] if self.fd is not None else []):
+                os.close(fd)
+            self.fd = None
+            self.retired = []
+            self.signature = None
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Pack height tiles into a single archive file with a spatial index",
+        epilog="Beispiel: python3 tile_archive.py pack ../tiles_output -o ../tiles_output/tiles.dsma"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = subparsers.add_parser("pack", help="Pack all loose tiles of a directory")
+    pack_parser.add_argument("tiles_dir", help="Tile directory")
+    pack_parser.add_argument("-o", "--output", help=f"Archive file (default: <tiles_dir>/{DEFAULT_ARCHIVE_NAME})")
+    pack_parser.add_argument("-c", "--codec", choices=CODECS, default=DEFAULT_CODEC,
+                             help=f"Tile files to pack: bin, gz, zst, br (default: {DEFAULT_CODEC})")
+    pack_parser.add_argument("-g", "--grid-size", type=int, default=1000,
+                             help="Cells per tile edge (default: 1000)")
+    pack_parser.add_argument("-r", "--resolution", type=float, default=1.0,
+                             help="Grid resolution in meters (default: 1.0)")
+
+    sync_parser = subparsers.add_parser("sync", help="Append new or changed loose tiles to an archive")
+    sync_parser.add_argument("tiles_dir", help="Tile directory")
+    sync_parser.add_argument("-o", "--output", help=f"Archive file (default: <tiles_dir>/{DEFAULT_ARCHIVE_NAME})")
+
+    info_parser = subparsers.add_parser("info", help="Show header, tile count and unused bytes")
+    info_parser.add_argument("archive")
+
+    compact_parser = subparsers.add_parser("compact", help="Rewrite an archive without unused bytes")
+    compact_parser.add_argument("archive")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "pack":
+            output = Path(args.output) if args.output else Path(args.tiles_dir) / DEFAULT_ARCHIVE_NAME
+            count, size = pack_directory(args.tiles_dir, output, args.codec, args.grid_size, args.resolution)
+            print(f"📦 {count} Tiles → {output} ({size / (1024 * 1024):.1f} MB)")
+
+        elif args.command == "sync":
+            output = Path(args.output) if args.output else Path(args.tiles_dir) / DEFAULT_ARCHIVE_NAME
+            appended, total = sync_archive(output, args.tiles_dir)
+            print(f"📦 {output}: {appended} von {total} Tiles angehängt")
+
+        elif args.command == "info":
+            archive = TileArchive(args.archive)
+            stats = archive.stats()
+            archive.close()
+            print(f"📦 {args.archive}")
+            print(f"   Tiles:     {stats['tiles']} ({stats['codec']}, {stats['grid_size']}² Zellen, "
+                  f"{stats['resolution']:g} m)")
+            print(f"   Größe:     {stats['bytes'] / (1024 * 1024):.1f} MB "
+                  f"(Tile-Daten {stats['payload_bytes'] / (1024 * 1024):.1f} MB)")
+            print(f"   Leerstand: {stats['unused_bytes'] / (1024 * 1024):.1f} MB")
+            print(f"   Index:     Offset {stats['index_offset']}")
+
+        elif args.command == "compact":
+            before, after = compact_archive(args.archive)
+            print(f"🧹 {args.archive}: {before / (1024 * 1024):.1f} MB → {after / (1024 * 1024):.1f} MB")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
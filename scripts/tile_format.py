@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Tile-Format v2: Delta-/Prädiktor-kodiertes Height Grid mit Header
+
+Die v1-Tiles (tile_X_Y.bin[.gz]) sind rohe Uint16-Zentimeter-Grids. Glattes
+Gelände komprimiert darin schlecht, weil GZIP die Höhen nur als Bytes sieht.
+v2 (tile_X_Y.v2) wandelt die Höhen vor der Kompression in kleine Residuen um:
+
+    1. Prädiktor (pro Zelle, modulo 2^16 → verlustfrei):
+         row: r = h[y,x] - h[y,x-1]
+         2d:  r = h[y,x] - h[y,x-1] - h[y-1,x] + h[y-1,x-1]
+    2. ZigZag: kleine negative/positive Residuen → kleine Uint16
+    3. Byte-Planes: erst alle Low-Bytes, dann alle High-Bytes (fast nur 0)
+    4. Kompression: deflate (zlib), zstd oder brotli
+
+Dekodieren ist die Umkehrung, der 2D-Prädiktor z.B. eine doppelte
+kumulative Summe – vollständig vektorisiert.
+
+Header (48 Bytes, little-endian):
+
+    Offset  Typ      Feld
+    0       4s       Magic b"DSMT"
+    4       uint8    Version (2)
+    5       uint8    Prädiktor (0 = none, 1 = row, 2 = 2d)
+    6       uint8    Codec (0 = raw, 1 = deflate, 2 = zstd, 3 = brotli)
+    7       uint8    reserviert
+    8       float64  Origin X (UTM33, linke untere Ecke in Metern)
+    16      float64  Origin Y
+    24      float32  Auflösung in Metern
+    28      uint32   Breite (Spalten)
+    32      uint32   Höhe (Zeilen, Zeile 0 = Süden wie in v1)
+    36      uint16   Nodata-Wert (0)
+    38      uint16   reserviert
+    40      float32  Skalierung (0.01 = Zentimeter → Meter)
+    44      uint32   CRC32 des dekodierten Grids (Uint16, little-endian)
+    48      ...      komprimierte Daten
+"""
+
+import sys
+import zlib
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install numpy")
+    sys.exit(1)
+
+# Optional: bessere Codecs als deflate
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MAGIC = b"DSMT"
+VERSION = 2
+HEADER_FORMAT = "<4sBBBBddfIIHHfI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+PREDICTORS = {'none': 0, 'row': 1, '2d': 2}
+CODECS = {'raw': 0, 'deflate': 1, 'zstd': 2, 'brotli': 3}
+
+DEFAULT_PREDICTOR = 'row'
+DEFAULT_CODEC = 'deflate'
+NODATA = 0
+SCALE = 0.01
+
+
+def _row_delta(grid):
+    """Differenz zur linken Nachbarzelle (erste Spalte bleibt absolut)"""
+    delta = grid.astype(np.uint16, copy=True)
+    delta[:, 1:] -= grid[:, :-1]
+    return delta
+
+
+def _predict(grid, predictor):
+    """Höhen → Residuen (Uint16, Überlauf wickelt modulo 2^16)"""
+    if predictor == 'none':
+        return grid
+    residual = _row_delta(grid)
+    if predictor == '2d':
+        residual[1:, :] -= residual[:-1, :].copy()
+    return residual
+
+
+def _unpredict(residual, predictor):
+    """Residuen → Höhen (Umkehrung von _predict über kumulative Summen)"""
+    grid = residual
+    if predictor == '2d':
+        grid = np.cumsum(grid, axis=0, dtype=np.uint16)
+    if predictor in ('row', '2d'):
+        grid = np.cumsum(grid, axis=1, dtype=np.uint16)
+    return grid
+
+
+def _zigzag(values):
+    """Vorzeichenbehaftete Residuen (int16) → 0, 1, 2, ... für -0, -1, +1, ..."""
+    signed = values.view(np.int16)
+    return ((signed << 1) ^ (signed >> 15)).view(np.uint16)
+
+
+def _unzigzag(values):
+    """Umkehrung von _zigzag"""
+    return (values >> 1) ^ (np.uint16(0) - (values & 1))
+
+
+def _compress(data, codec, level):
+    if codec == 'raw':
+        return bytes(data)
+    if codec == 'deflate':
+        return zlib.compress(data, 9 if level is None else level)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("Codec 'zstd' benötigt: pip install zstandard")
+        return zstandard.ZstdCompressor(level=19 if level is None else level).compress(data)
+    if codec == 'brotli':
+        if brotli is None:
+            raise ValueError("Codec 'brotli' benötigt: pip install brotli")
+        return brotli.compress(bytes(data), quality=11 if level is None else level)
+    raise ValueError(f"Unbekannter Codec: {codec} (erlaubt: {', '.join(CODECS)})")
+
+
+def _decompress(payload, codec):
+    if codec == 'raw':
+        return payload
+    if codec == 'deflate':
+        return zlib.decompress(payload)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("Codec 'zstd' benötigt: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == 'brotli':
+        if brotli is None:
+            raise ValueError("Codec 'brotli' benötigt: pip install brotli")
+        return brotli.decompress(payload)
+    raise ValueError(f"Unbekannter Codec: {codec}")
+
+
+def encode_tile(grid, origin_x, origin_y, resolution=1.0, predictor=DEFAULT_PREDICTOR,
+                codec=DEFAULT_CODEC, level=None):
+    """
+    Kodiert ein Uint16-Height-Grid im v2-Format
+
+    Args:
+        grid: 2D-Array (Zeilen × Spalten) mit Höhen in cm, 0 = nodata
+        origin_x, origin_y: UTM33-Koordinate der linken unteren Ecke
+        resolution: Zellgröße in Metern
+        predictor: 'none', 'row' oder '2d'
+        codec: 'raw', 'deflate', 'zstd' oder 'brotli'
+        level: Kompressionsstufe des Codecs (None = Maximum)
+
+    Returns:
+        bytes (Header + komprimierte Daten)
+    """
+    if predictor not in PREDICTORS:
+        raise ValueError(f"Unbekannter Prädiktor: {predictor} (erlaubt: {', '.join(PREDICTORS)})")
+
+    grid = np.ascontiguousarray(grid, dtype='<u2')
+    height, width = grid.shape
+
+    planes = _zigzag(_predict(grid, predictor)).view(np.uint8).reshape(-1, 2).T
+    payload = _compress(np.ascontiguousarray(planes).tobytes(), codec, level)
+
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, VERSION, PREDICTORS[predictor], CODECS[codec], 0,
+        float(origin_x), float(origin_y), resolution, width, height, NODATA, 0, SCALE,
+        zlib.crc32(grid.tobytes())
+    )
+    return header + payload
+
+
+def read_header(data):
+    """
+    Liest den v2-Header
+
+    Returns:
+        Dict mit version, predictor, codec, origin_x, origin_y, resolution,
+        width, height, nodata, scale, crc32
+
+    Raises:
+        ValueError: Keine v2-Datei oder unbekannte Version
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Datei zu kurz für einen v2-Header")
+
+    (magic, version, predictor, codec, _, origin_x, origin_y, resolution,
+     width, height, nodata, _, scale, crc32) = struct.unpack_from(HEADER_FORMAT, data)
+
+    if magic != MAGIC:
+        raise ValueError(f"Kein v2-Tile (Magic {magic!r})")
+    if version != VERSION:
+        raise ValueError(f"Nicht unterstützte Tile-Version: {version}")
+
+    return {
+        'version': version,
+        'predictor': {v: k for k, v in PREDICTORS.items()}[predictor],
+        'codec': {v: k for k, v in CODECS.items()}[codec],
+        'origin_x': origin_x,
+        'origin_y': origin_y,
+        'resolution': resolution,
+        'width': width,
+        'height': height,
+        'nodata': nodata,
+        'scale': round(scale, 6),
+        'crc32': crc32,
+    }
+
+
+def decode_tile(data, verify=True):
+    """
+    Dekodiert ein v2-Tile
+
+    Args:
+        data: Dateiinhalt (bytes)
+        verify: CRC32 des Ergebnisses prüfen
+
+    Returns:
+        (grid, header): Uint16-Array (Zeilen × Spalten) und Header-Dict
+
+    Raises:
+        ValueError: Ungültige Datei oder CRC-Fehler
+    """
+    header = read_header(data)
+    raw = _decompress(memoryview(data)[HEADER_SIZE:], header['codec'])
+
+    count = header['width'] * header['height']
+    if len(raw) != 2 * count:
+        raise ValueError(f"Falsche Datenlänge: {len(raw)} Bytes statt {2 * count}")
+
+    planes = np.frombuffer(raw, dtype=np.uint8).reshape(2, count)
+    residual = _unzigzag(np.ascontiguousarray(planes.T).view('<u2').reshape(header['height'], header['width']))
+    grid = _unpredict(residual, header['predictor'])
+
+    if verify and zlib.crc32(grid.tobytes()) != header['crc32']:
+        raise ValueError("CRC32 stimmt nicht – Tile beschädigt")
+    return grid, header
+
+
+def load_tile(path, verify=True):
+    """Liest und dekodiert eine tile_X_Y.v2-Datei (siehe decode_tile)"""
+    with open(path, 'rb') as f:
+        return decode_tile(f.read(), verify)
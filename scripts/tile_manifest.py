@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tile-Manifest für inkrementelle Konvertierung
+
+Das Manifest (tiles_output/manifest.json) hält pro Tile fest, aus welchen
+LAZ-Dateien (Größe, mtime, SHA-256, Punktanzahl) und mit welchen Parametern
+(Tile-Größe, Auflösung, Lückenfüllung, Konverter-Version) es gebaut wurde:
+
+    {
+      "tiles": {
+        "tile_459_5722.bin": {
+          "params": {"version": "2.0", "tile_size": 1000, ...},
+          "sources": {"als_33459-5722.laz": {"size": ..., "mtime_ns": ...,
+                                              "sha256": "...", "points": ...}},
+          "updated": "2026-02-14T12:00:00Z"
+        }
+      }
+    }
+"""
+
+import os
+import json
+import hashlib
+import contextlib
+from pathlib import Path
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: keine Dateisperren, nur sequentiell sicher
+    fcntl = None
+
+MANIFEST_FILE = "manifest.json"
+
+
+def load_manifest(output_dir):
+    """
+    Lädt das Manifest (ohne Sperre, nur lesend)
+
+    Returns:
+        Dict mit Schlüssel "tiles" (leer, wenn noch kein Manifest existiert)
+    """
+    manifest_file = Path(output_dir) / MANIFEST_FILE
+    if not manifest_file.exists():
+        return {'tiles': {}}
+    with open(manifest_file, 'r') as f:
+        manifest = json.load(f)
+    manifest.setdefault('tiles', {})
+    return manifest
+
+
+@contextlib.contextmanager
+def locked_manifest(output_dir):
+    """
+    Öffnet das Manifest exklusiv zum Ändern (Read-Modify-Write)
+
+    Parallele Worker schreiben so keine Einträge gegenseitig kaputt.
+    Das Manifest wird beim Verlassen atomar ersetzt.
+
+    Yields:
+        Manifest-Dict (Änderungen werden gespeichert)
+    """
+    output_dir = Path(output_dir)
+    manifest_file = output_dir / MANIFEST_FILE
+    lock_file = output_dir / (MANIFEST_FILE + ".lock")
+
+    with open(lock_file, 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            manifest = load_manifest(output_dir)
+            yield manifest
+
+            tmp_file = manifest_file.with_name(MANIFEST_FILE + ".tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, manifest_file)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 einer Datei (gestreamt)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_fingerprint(laz_file, manifest=None):
+    """
+    Fingerabdruck einer LAZ-Datei (Größe, mtime, SHA-256)
+
+    Der Hash wird nur neu berechnet, wenn Größe oder mtime nicht zu einem
+    bereits im Manifest bekannten Eintrag derselben Datei passen.
+
+    Args:
+        laz_file: Path zur LAZ-Datei
+        manifest: Manifest zum Wiederverwenden bekannter Hashes (optional)
+
+    Returns:
+        Dict mit size, mtime_ns, sha256
+    """
+    laz_file = Path(laz_file)
+    stat = laz_file.stat()
+
+    if manifest:
+        for entry in manifest['tiles'].values():
+            known = entry['sources'].get(laz_file.name)
+            if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+                return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': known['sha256']}
+
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': _sha256(laz_file)}
+
+
+def record_tile(output_dir, tile_name, source_name, fingerprint, params, points, replace=False):
+    """
+    Trägt den Beitrag einer LAZ-Datei zu einem Tile ins Manifest ein
+
+    Args:
+        output_dir: Ausgabe-Verzeichnis der Tiles
+        tile_name: z.B. "tile_459_5722.bin"
+        source_name: Dateiname der LAZ-Datei
+        fingerprint: Siehe source_fingerprint
+        params: Konvertierungs-Parameter (siehe laz_to_binary.conversion_params)
+        points: Anzahl Punkte dieser Datei im Tile (0 = Tile nicht berührt)
+        replace: Andere Quellen des Tiles entfernen (Tile wurde ersetzt)
+    """
+    with locked_manifest(output_dir) as manifest:
+        entry = manifest['tiles'].get(tile_name)
+        if entry is None or replace or entry['params'] != params:
+            entry = {'params': params, 'sources': {}}
+            manifest['tiles'][tile_name] = entry
+
+        entry['sources'][source_name] = dict(fingerprint, points=int(points))
+        entry['updated'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
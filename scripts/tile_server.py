@@ -3,54 +3,586 @@
 Einfacher HTTP Server für Height Tiles
 Für lokale Entwicklung
 
-Liefert Binary Height Tiles mit CORS Support
+Liefert Binary Height Tiles mit CORS Support. Mehrere Clients werden
+parallel bedient (ein Thread pro Verbindung, HTTP/1.1 Keep-Alive).
+Tiles bekommen starke ETags, Last-Modified und Cache-Control; bedingte
+Requests (If-None-Match / If-Modified-Since) werden mit 304 beantwortet.
+Dateien werden per sendfile direkt aus dem Page-Cache verschickt.
+
+Height Tiles (tile_X_Y.bin / .bin.gz) werden nach Accept-Encoding
+ausgehandelt: vorkomprimierte .bin.br/.bin.zst, wenn vorhanden und vom
+Client akzeptiert, sonst .bin.gz oder rohes .bin (bei Bedarf aus .gz
+entpackt). Häufige Tiles liegen in einem LRU-Cache mit Byte-Budget;
+/stats liefert Trefferquote und übertragene Bytes als JSON.
+
+Mit --archive kommen die Tiles aus einem Tile-Archiv (tile_archive.py):
+/tiles/tile_X_Y.bin[.gz] wird per Index-Lookup und sendfile ab Offset
+direkt aus der einen Datei geliefert (lose Dateien nur noch als Fallback),
+das Archiv selbst unter /tiles/<Archivname> mit HTTP-Range-Requests.
 """
 
-import http.server
-import socketserver
+import os
+import re
 import gzip
+import json
+import time
+import threading
+import http.server
+import email.utils
 from pathlib import Path
+from functools import partial
+from collections import OrderedDict
+
+from tile_archive import TileArchive
+
+# Cache-Dauer für Tiles (Revalidierung per ETag danach)
+DEFAULT_MAX_AGE = 86400
+# Mit --immutable: Tiles ändern sich unter derselben URL nie
+IMMUTABLE_MAX_AGE = 31536000
+
+# Byte-Budget des Tile-Caches (Tiles größer als 1/4 davon gehen per sendfile)
+DEFAULT_CACHE_MB = 256
+
+# Content-Type/-Encoding pro Tile-Endung
+TILE_TYPES = {
+    '.bin.gz': ('application/octet-stream', 'gzip'),
+    '.bin': ('application/octet-stream', None),
+    '.v2': ('application/octet-stream', None),
+}
+
+# Height Grid-Varianten in Server-Präferenz (kleinste zuerst):
+# (Content-Encoding, Dateiendung an tile_X_Y.bin)
+ENCODINGS = (('br', '.br'), ('zstd', '.zst'), ('gzip', '.gz'), ('identity', ''))
+
+ARCHIVE_TILE_PATH = re.compile(r"/tiles/tile_(-?\d+)_(-?\d+)\.bin(?:\.gz)?")
+RANGE_HEADER = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def parse_accept_encoding(header):
+    """
+    Akzeptierte Content-Encodings mit q-Werten
+
+    None (Header fehlt) → nur identity; "*" gilt für nicht genannte Encodings.
+
+    Returns:
+        Dict {encoding: q}
+    """
+    if header is None:
+        return {'identity': 1.0}
+
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    wildcard = accepted.pop('*', None)
+    for encoding, _ in ENCODINGS:
+        if encoding not in accepted and wildcard is not None:
+            accepted[encoding] = wildcard
+    accepted.setdefault('identity', 1.0 if wildcard is None else wildcard)
+    return accepted
+
+
+class TileCache:
+    """
+    LRU-Cache für Tile-Inhalte mit Byte-Budget (thread-safe)
+
+    Einträge werden beim Zugriff per stat() gegen die Datei geprüft
+    (Inode, Größe, mtime) – neu konvertierte Tiles werden also nie aus
+    dem Cache veraltet ausgeliefert.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.max_entry = budget_bytes // 4
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, signature):
+        """Inhalt zu key, wenn vorhanden und signature passt (sonst None)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, signature, data):
+        """Speichert data (verdrängt die am längsten unbenutzten Einträge)"""
+        if len(data) > self.max_entry:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[key] = (signature, data)
+            self.size += len(data)
+            while self.size > self.budget:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'budget_bytes': self.budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+            }
+
+
+class ServerStats:
+    """Zähler über alle Requests (thread-safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.not_modified = 0
+        self.not_found = 0
+        self.bytes_served = 0
+        self.encodings = {}
+
+    def record(self, status, sent=0, encoding=None):
+        with self.lock:
+            self.requests += 1
+            self.bytes_served += sent
+            if status == 304:
+                self.not_modified += 1
+            elif status == 404:
+                self.not_found += 1
+            if encoding:
+                self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'uptime_seconds': round(time.time() - self.started, 1),
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'not_found': self.not_found,
+                'bytes_served': self.bytes_served,
+                'encodings': dict(self.encodings),
+            }
+
+
+def tile_etag(stat, variant=None):
+    """
+    Starker ETag aus Inode, Größe und mtime (Tiles werden atomar ersetzt → neue Werte)
+
+    Jede Encoding-Variante ist eine eigene Datei und hat damit einen eigenen
+    ETag; variant unterscheidet im Speicher erzeugte Varianten derselben Datei.
+    """
+    suffix = f"-{variant}" if variant else ""
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}{suffix}"'
+
+
+def parse_range(header, size):
+    """
+    Einzelner Byte-Bereich aus einem Range-Header
+
+    Returns:
+        (start, end) inklusive, None wenn der Header ignoriert wird (fehlt,
+        mehrere Bereiche, andere Einheit) – dann ganze Datei; ValueError,
+        wenn der Bereich nicht erfüllbar ist (416)
+    """
+    match = RANGE_HEADER.fullmatch(header.strip()) if header else None
+    if match is None or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix: die letzten N Bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Leerer Suffix-Bereich")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(f"Bereich {header} außerhalb von {size} Bytes")
+    return start, end
+
+
+def etag_matches(header, etag):
+    """Prüft If-None-Match (Liste von ETags, '*' oder schwache W/-Varianten)"""
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag.removeprefix('W/') == etag for tag in candidates)
 
 
 class TileHandler(http.server.SimpleHTTPRequestHandler):
-    """HTTP Handler mit CORS und GZIP Support"""
+    """HTTP Handler mit CORS, GZIP und HTTP-Caching"""
+
+    protocol_version = "HTTP/1.1"
+    # Header und sendfile-Body sind getrennte Writes: ohne TCP_NODELAY wartet
+    # Nagle auf das (verzögerte) ACK des Clients → ~40 ms pro Keep-Alive-Request
+    disable_nagle_algorithm = True
+    cache_control = f"public, max-age={DEFAULT_MAX_AGE}"
+    verbose = False
+    cache = TileCache(DEFAULT_CACHE_MB * 1024 * 1024)
+    stats = ServerStats()
+    archive = None
 
     def end_headers(self):
         # CORS Headers für lokale Entwicklung
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, HEAD, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag, Last-Modified, Content-Range, Accept-Ranges')
         super().end_headers()
 
+    def log_message(self, format, *args):
+        # Log pro Request nur mit --verbose (bremst unter Last)
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def tile_type(self, path):
+        """(Content-Type, Content-Encoding) für Tile-Requests, sonst None"""
+        if not path.startswith('/tiles/'):
+            return None
+        for suffix, tile_type in TILE_TYPES.items():
+            if path.endswith(suffix):
+                return tile_type
+        return None
+
     def do_GET(self):
         """Handle GET requests"""
         # Tile-Request? (z.B. /tiles/tile_460_5740.bin.gz)
-        if self.path.startswith('/tiles/') and self.path.endswith('.bin.gz'):
-            # Datei laden
-            file_path = Path('.') / self.path[1:]  # Remove leading /
-
-            if file_path.exists():
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/octet-stream')
-                self.send_header('Content-Encoding', 'gzip')
-                self.end_headers()
-
-                with open(file_path, 'rb') as f:
-                    self.wfile.write(f.read())
-
-                print(f"✅ Served: {self.path}")
-            else:
-                self.send_error(404, f"Tile not found: {file_path}")
-                print(f"❌ Not found: {file_path}")
+        path = self.path.split('?', 1)[0].split('#', 1)[0]
+        if path == '/stats':
+            self.send_stats()
+            return
+        if self.is_archive(path):
+            self.send_archive()
+            return
+        tile_type = self.tile_type(path)
+        if tile_type:
+            self.send_tile(path, *tile_type)
         else:
             # Standard file serving
             super().do_GET()
 
+    def do_HEAD(self):
+        """Handle HEAD requests (nur Header, z.B. für Upload-Checks)"""
+        path = self.path.split('?', 1)[0].split('#', 1)[0]
+        if self.is_archive(path):
+            self.send_archive(body=False)
+            return
+        tile_type = self.tile_type(path)
+        if tile_type:
+            self.send_tile(path, *tile_type, body=False)
+        else:
+            super().do_HEAD()
+
     def do_OPTIONS(self):
         """Handle preflight OPTIONS requests"""
         self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def not_modified(self, etag, stat):
+        """Bedingter Request: Hat der Client diese Version schon?"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            # If-None-Match hat Vorrang vor If-Modified-Since (RFC 9110)
+            return etag_matches(if_none_match, etag)
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(stat.st_mtime) <= since
+        return False
+
+    def choose_variant(self, path):
+        """
+        Height Grid-Variante nach Accept-Encoding wählen
+
+        /tiles/tile_X_Y.bin und /tiles/tile_X_Y.bin.gz sind dieselbe
+        Ressource (das rohe Grid) in verschiedenen Encodings. Gewählt wird
+        die vom Client akzeptierte, auf der Platte vorhandene Variante mit
+        dem höchsten q-Wert (bei Gleichstand die kleinste: br > zstd > gzip).
+
+        Returns:
+            (file_path, encoding) oder (None, None); encoding 'gunzip' =
+            nur .gz vorhanden, Client will identity → im Speicher entpacken
+        """
+        base = Path(self.translate_path(path.removesuffix('.gz')))
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding'))
+
+        candidates = [(accepted.get(encoding, 0.0), -rank, encoding, base.with_name(base.name + suffix))
+                      for rank, (encoding, suffix) in enumerate(ENCODINGS)]
+        available = [c for c in candidates if c[0] > 0 and c[3].is_file()]
+        if available:
+            _, _, encoding, file_path = max(available)
+            return file_path, encoding
+
+        gz_file = base.with_name(base.name + '.gz')
+        if accepted.get('identity', 0.0) > 0 and gz_file.is_file():
+            return gz_file, 'gunzip'
+        return None, None
+
+    def send_tile(self, path, content_type, content_encoding, body=True):
+        """Sendet ein Tile mit Caching-Headern (200, 304 oder 404)"""
+        negotiated = path.endswith(('.bin', '.bin.gz'))
+        if negotiated and self.archive is not None and self.send_archive_tile(path, content_type, body):
+            return
+        if negotiated:
+            file_path, content_encoding = self.choose_variant(path)
+        else:
+            file_path = Path(self.translate_path(path))
+
+        try:
+            f = open(file_path, 'rb')
+        except (OSError, TypeError):
+            self.send_error(404, f"Tile not found: {path}")
+            self.stats.record(404)
+            return
+
+        with f:
+            stat = os.fstat(f.fileno())
+            etag = tile_etag(stat, content_encoding if content_encoding == 'gunzip' else None)
+
+            if self.not_modified(etag, stat):
+                self.send_response(304)
+                self.send_caching_headers(etag, stat, negotiated)
+                self.end_headers()
+                self.stats.record(304)
+                return
+
+            # Hot Tiles aus dem Speicher, sonst von der Platte (und cachen)
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            cache_key = (str(file_path), content_encoding == 'gunzip')
+            data = self.cache.get(cache_key, signature)
+            if data is None and (content_encoding == 'gunzip' or stat.st_size <= self.cache.max_entry):
+                data = f.read()
+                if content_encoding == 'gunzip':
+                    data = gzip.decompress(data)
+                self.cache.put(cache_key, signature, data)
+
+            length = len(data) if data is not None else stat.st_size
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            if content_encoding and content_encoding not in ('identity', 'gunzip'):
+                self.send_header('Content-Encoding', content_encoding)
+            self.send_header('Content-Length', str(length))
+            self.send_caching_headers(etag, stat, negotiated)
+            self.end_headers()
+
+            if body:
+                if data is not None:
+                    self.wfile.write(data)
+                else:
+                    # Zero-Copy: Kernel kopiert direkt vom Page-Cache in den Socket
+                    self.wfile.flush()
+                    self.connection.sendfile(f)
+            self.stats.record(200, length if body else 0,
+                              'identity' if content_encoding in (None, 'gunzip') else content_encoding)
+
+    def is_archive(self, path):
+        return self.archive is not None and path == f"/tiles/{self.archive.path.name}"
+
+    def send_archive_tile(self, path, content_type, body=True):
+        """
+        Sendet ein Height Grid aus dem Tile-Archiv
+
+        Returns:
+            False, wenn das Tile nicht im Archiv liegt oder der Client das
+            Encoding des Archivs nicht akzeptiert (→ lose Dateien)
+        """
+        match = ARCHIVE_TILE_PATH.fullmatch(path)
+        try:
+            entry = self.archive.entry(int(match.group(1)), int(match.group(2))) if match else None
+        except (OSError, ValueError):
+            return False  # Archiv fehlt (noch) oder ist beschädigt → lose Dateien
+        if entry is None:
+            return False
+        fd, offset, length = entry
+
+        # Archiv-Encoding direkt, oder gzip im Speicher entpacken
+        encoding = self.archive.content_encoding or 'identity'
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding'))
+        if accepted.get(encoding, 0.0) > 0:
+            gunzip = False
+        elif encoding == 'gzip' and accepted.get('identity', 0.0) > 0:
+            gunzip = True
+        else:
+            return False
+
+        try:
+            stat = os.fstat(fd)
+        except OSError:
+            return False
+        etag = f'"{stat.st_ino:x}-{offset:x}-{length:x}{"-gunzip" if gunzip else ""}"'
+        if self.not_modified(etag, stat):
+            self.send_response(304)
+            self.send_caching_headers(etag, stat, negotiated=True)
+            self.end_headers()
+            self.stats.record(304)
+            return True
+
+        data = None
+        if gunzip:
+            cache_key, signature = (str(self.archive.path), offset), (stat.st_ino, offset, length)
+            data = self.cache.get(cache_key, signature)
+            if data is None:
+                try:
+                    data = gzip.decompress(os.pread(fd, length, offset))
+                except (OSError, EOFError):
+                    return False
+                self.cache.put(cache_key, signature, data)
+
+        sent = len(data) if data is not None else length
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        if not gunzip and encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(sent))
+        self.send_caching_headers(etag, stat, negotiated=True)
         self.end_headers()
 
+        if body:
+            if data is not None:
+                self.wfile.write(data)
+            else:
+                self.send_file_range(fd, offset, length)
+        self.stats.record(200, sent if body else 0, 'identity' if gunzip else encoding)
+        return True
+
+    def send_file_range(self, fd, offset, length):
+        """Zero-Copy: Bytes [offset, offset + length) der Datei per sendfile"""
+        self.wfile.flush()
+        with open(fd, 'rb', closefd=False) as f:
+            self.connection.sendfile(f, offset, length)
+
+    def send_archive(self, body=True):
+        """Das Tile-Archiv selbst, mit Range-Requests (206) für Clients mit eigenem Index-Lookup"""
+        try:
+            self.archive.refresh()
+        except (OSError, ValueError) as e:
+            self.send_error(404, f"Archive not available: {e}")
+            self.stats.record(404)
+            return
+
+        fd = self.archive.fd
+        stat = os.fstat(fd)
+        etag = tile_etag(stat)
+        if self.not_modified(etag, stat):
+            self.send_response(304)
+            self.send_caching_headers(etag, stat)
+            self.end_headers()
+            self.stats.record(304)
+            return
+
+        # If-Range: nur ein Teil derselben Version, sonst die ganze Datei
+        byte_range = None
+        if_range = self.headers.get('If-Range')
+        if if_range is None or if_range.strip() == etag:
+            try:
+                byte_range = parse_range(self.headers.get('Range'), stat.st_size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{stat.st_size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                self.stats.record(416)
+                return
+
+        start, end = byte_range or (0, stat.st_size - 1)
+        length = end - start + 1
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        if byte_range:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{stat.st_size}")
+        self.send_header('Content-Length', str(length))
+        self.send_caching_headers(etag, stat)
+        self.end_headers()
+
+        if body and length > 0:
+            self.send_file_range(fd, start, length)
+        self.stats.record(206 if byte_range else 200, length if body else 0, 'identity')
+
+    def send_stats(self):
+        """/stats: Cache-Trefferquote und übertragene Bytes als JSON"""
+        payload = dict(self.stats.snapshot(), cache=self.cache.stats())
+        if self.archive is not None:
+            try:
+                payload['archive'] = self.archive.stats()
+            except (OSError, ValueError) as e:
+                payload['archive'] = {'error': str(e)}
+        data = json.dumps(payload, indent=2).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_caching_headers(self, etag, stat, negotiated=False):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', email.utils.formatdate(stat.st_mtime, usegmt=True))
+        self.send_header('Cache-Control', self.cache_control)
+        if negotiated:
+            self.send_header('Vary', 'Accept-Encoding')
+
+
+def make_server(directory=".", port=8000, host="", immutable=False, max_age=DEFAULT_MAX_AGE, verbose=False,
+                cache_mb=DEFAULT_CACHE_MB, archive=None):
+    """
+    Erstellt den Tile-Server (ein Thread pro Verbindung)
+
+    Args:
+        directory: Basis-Verzeichnis (Tiles unter <directory>/tiles/)
+        port: TCP-Port
+        host: Bind-Adresse ("" = alle Interfaces)
+        immutable: Tiles ändern sich unter derselben URL nie (Cache 1 Jahr, immutable)
+        max_age: Cache-Dauer in Sekunden ohne immutable
+        verbose: Jeden Request loggen
+        cache_mb: Byte-Budget des Tile-Caches in MB (0 = kein Cache)
+        archive: Tile-Archiv (tile_archive.py), aus dem die Tiles bevorzugt
+            geliefert werden (optional)
+
+    Returns:
+        http.server.ThreadingHTTPServer
+    """
+    cache_control = (f"public, max-age={IMMUTABLE_MAX_AGE}, immutable" if immutable
+                     else f"public, max-age={max_age}")
+    handler = type('Handler', (TileHandler,), {
+        'cache_control': cache_control,
+        'verbose': verbose,
+        'cache': TileCache(int(cache_mb * 1024 * 1024)),
+        'stats': ServerStats(),
+        'archive': TileArchive(archive) if archive else None,
+    })
+    server = http.server.ThreadingHTTPServer((host, port), partial(handler, directory=str(directory)))
+    server.daemon_threads = True
+    return server
+
 
 if __name__ == "__main__":
     import argparse
@@ -58,19 +590,30 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Height Tile Server")
     parser.add_argument("-p", "--port", type=int, default=8000, help="Port (default: 8000)")
     parser.add_argument("-d", "--directory", default=".", help="Base directory (default: current)")
+    parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE,
+                        help=f"Cache-Control max-age in seconds (default: {DEFAULT_MAX_AGE})")
+    parser.add_argument("--immutable", action="store_true",
+                        help="Tiles never change under the same URL: cache for a year, immutable")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_MB,
+                        help=f"In-memory LRU cache budget in MB, 0 = off (default: {DEFAULT_CACHE_MB})")
+    parser.add_argument("--archive", help="Serve tiles from this tile archive (tile_archive.py), "
+                                          "loose files only as fallback")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
 
     args = parser.parse_args()
 
-    # Wechsel ins Verzeichnis
-    import os
-    os.chdir(args.directory)
-
     PORT = args.port
 
-    with socketserver.TCPServer(("", PORT), TileHandler) as httpd:
+    with make_server(args.directory, PORT, immutable=args.immutable, max_age=args.max_age,
+                     verbose=args.verbose, cache_mb=args.cache_mb, archive=args.archive) as httpd:
         print(f"🚀 Height Tile Server läuft auf:")
         print(f"   http://localhost:{PORT}")
-        print(f"\n📂 Serving from: {Path.cwd()}")
+        print(f"\n📂 Serving from: {Path(args.directory).resolve()}")
+        print(f"🗄️  Cache-Control: {httpd.RequestHandlerClass.func.cache_control}")
+        print(f"🧠 Tile-Cache: {args.cache_mb:g} MB (Statistik: http://localhost:{PORT}/stats)")
+        if args.archive:
+            print(f"📦 Tile-Archiv: {args.archive} (Range-Requests: "
+                  f"http://localhost:{PORT}/tiles/{Path(args.archive).name})")
         print(f"\n🔗 Test-URL:")
         print(f"   http://localhost:{PORT}/tiles/tile_460_5740.bin.gz")
         print(f"\n⏹  Stoppen mit Ctrl+C\n")
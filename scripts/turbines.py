@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Windräder aus windraeder.csv (Export der Admin-Seite)
+
+Spalten: id, name, hubHeight, rotorDiameter, lat, lon
+Gesamthöhe (Blattspitze oben) = Nabenhöhe + Rotordurchmesser / 2,
+wie in der App (js/app.js, js/windrad-renderer.js).
+"""
+
+import csv
+from pathlib import Path
+
+from pipeline_config import load_config, config_path
+
+
+def default_turbines_file():
+    """windraeder.csv aus config.json (paths.turbines), sonst ../windraeder.csv"""
+    return config_path(load_config(), 'turbines', '../windraeder.csv')
+
+
+def load_turbines(csv_file=None):
+    """
+    Liest die Windräder
+
+    Args:
+        csv_file: Path zur CSV (default: default_turbines_file())
+
+    Returns:
+        Liste von Dicts mit id, name, hub_height, rotor_diameter,
+        total_height, lat, lon
+
+    Raises:
+        ValueError: bei fehlenden Spalten oder ungültigen Zahlen
+    """
+    csv_file = Path(csv_file) if csv_file else default_turbines_file()
+    turbines = []
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'id', 'hubHeight', 'rotorDiameter', 'lat', 'lon'} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"{csv_file.name}: Spalten fehlen: {', '.join(sorted(missing))}")
+
+        for line, row in enumerate(reader, start=2):
+            try:
+                hub_height = float(row['hubHeight'])
+                rotor_diameter = float(row['rotorDiameter'])
+                turbines.append({
+                    'id': row['id'],
+                    'name': row.get('name') or row['id'],
+                    'hub_height': hub_height,
+                    'rotor_diameter': rotor_diameter,
+                    'total_height': hub_height + rotor_diameter / 2,
+                    'lat': float(row['lat']),
+                    'lon': float(row['lon']),
+                })
+            except (TypeError, ValueError):
+                raise ValueError(f"{csv_file.name}, Zeile {line}: ungültige Zahl") from None
+    return turbines
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Paralleler, idempotenter Tile-Upload nach Cloudflare R2 (S3-API)
+
+Nachfolger von upload_to_r2.sh: statt eines wrangler-Prozesses pro Datei
+ein S3-Client mit Connection-Pool und upload.parallel_uploads Threads.
+
+- Idempotent: Die Objektliste des Buckets wird einmal gelesen (1 Request
+  pro 1000 Objekte); Dateien mit gleicher Größe und gleichem ETag (MD5)
+  werden übersprungen.
+- Metadaten: Content-Type/Content-Encoding passend zur Endung
+  (.bin.gz → gzip, .zst → zstd, .br → br) und Cache-Control.
+- upload.verify_after_upload: nach jedem PUT per HEAD Größe, ETag und
+  Content-Encoding prüfen.
+- Tile-Archive (*.dsma, siehe tile_archive.py) als ein Objekt ohne
+  Content-Encoding – Clients lesen einzelne Tiles per Range-Request.
+  Header und Index ändern sich bei jedem sync/compact an Ort und Stelle,
+  deshalb Cache-Control: no-cache (Clients prüfen per ETag nach).
+- Große Dateien (ab MULTIPART_CHUNK_SIZE, z.B. ein landesweites Archiv
+  über dem 5-GB-Limit eines PUT) gestreamt als Multipart-Upload; der
+  Abgleich vergleicht dann den Multipart-ETag (MD5 der Teil-MD5s + "-N").
+- Halo-Tiles (halo/v1-h<N>/..., siehe laz_to_binary.py --halo) und
+  Sichtbarkeits-Tiles (visibility/<id>/...) mit gleichem Schlüssel,
+  visibility/index.json zuletzt.
+
+Zugangsdaten wie bei boto3 üblich (AWS_ACCESS_KEY_ID /
+AWS_SECRET_ACCESS_KEY = R2 API-Token), Endpoint aus upload.endpoint_url
+(https://<account-id>.r2.cloudflarestorage.com). Für Tests läuft das Script
+gegen jeden S3-kompatiblen Server, z.B. moto_server oder MinIO.
+
+Usage:
+    python3 upload_tiles.py
+    python3 upload_tiles.py --endpoint-url http://localhost:5000 --bucket test-tiles
+"""
+
+import os
+import sys
+import time
+import base64
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import boto3
+    import boto3.s3.transfer
+    import botocore.config
+    import botocore.exceptions
+except ImportError:
+    boto3 = None
+
+from pipeline_config import load_config, config_path
+from progress_events import ProgressLog, default_progress_log
+
+DEFAULT_PARALLEL_UPLOADS = 8
+DEFAULT_CACHE_CONTROL = "public, max-age=86400"
+INDEX_CACHE_CONTROL = "public, max-age=300"      # index.json ändert sich mit jedem Lauf
+ARCHIVE_CACHE_CONTROL = "no-cache"               # *.dsma: Header/Index werden überschrieben
+MULTIPART_CHUNK_SIZE = 64 * 1024 * 1024          # ab dieser Größe Multipart, gleiche Teilgröße
+UPLOAD_PATTERNS = ("tile_*.bin.gz", "*.dsma", "halo/*/tile_*.bin.gz", "halo/*/layout.json",
+                   "visibility/*/tile_*.bin.gz")
+INDEX_FILES = ("visibility/index.json",)         # nach allen anderen Objekten
+
+# Endung → (Content-Type, Content-Encoding)
+CONTENT_TYPES = (
+    (".bin.gz", "application/octet-stream", "gzip"),
+    (".bin.zst", "application/octet-stream", "zstd"),
+    (".bin.br", "application/octet-stream", "br"),
+    (".json", "application/json", None),
+    ("", "application/octet-stream", None),
+)
+
+
+def object_metadata(key, cache_control=DEFAULT_CACHE_CONTROL):
+    """put_object-Argumente für Content-Type, Content-Encoding und Cache-Control"""
+    for suffix, content_type, encoding in CONTENT_TYPES:
+        if key.endswith(suffix):
+            break
+    if key.endswith(INDEX_FILES):
+        cache_control = INDEX_CACHE_CONTROL
+    elif key.endswith(".dsma"):
+        cache_control = ARCHIVE_CACHE_CONTROL
+    metadata = {'ContentType': content_type, 'CacheControl': cache_control}
+    if encoding:
+        metadata['ContentEncoding'] = encoding
+    return metadata
+
+
+def file_md5(path):
+    """MD5 einer Datei (= S3-ETag bei einfachem PUT)"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest
+
+
+def multipart_etag(path, chunk_size=MULTIPART_CHUNK_SIZE):
+    """S3-ETag eines Multipart-Uploads mit Teilen à chunk_size (MD5 der Teil-MD5s, Suffix -<Teile>)"""
+    parts = []
+    with open(path, 'rb') as f:
+        for part in iter(lambda: f.read(chunk_size), b''):
+            parts.append(hashlib.md5(part).digest())
+    return f"{hashlib.md5(b''.join(parts)).hexdigest()}-{len(parts)}"
+
+
+def collect_files(tiles_dir, patterns=UPLOAD_PATTERNS):
+    """
+    Hochzuladende Dateien des Tile-Verzeichnisses
+
+    Returns:
+        Liste von (key, path), Index-Dateien am Ende
+    """
+    tiles_dir = Path(tiles_dir)
+    files = {}
+    for pattern in patterns:
+        for path in tiles_dir.glob(pattern):
+            files[path.relative_to(tiles_dir).as_posix()] = path
+    ordered = sorted(files.items())
+    ordered += [(key, tiles_dir / key) for key in INDEX_FILES if (tiles_dir / key).exists()]
+    return ordered
+
+
+class S3Uploader:
+    """
+    Gemeinsamer S3-Client (thread-safe, Pool mit parallel_uploads Verbindungen)
+
+    Raises:
+        ValueError: wenn boto3 fehlt
+    """
+
+    def __init__(self, bucket, endpoint_url=None, parallel_uploads=DEFAULT_PARALLEL_UPLOADS, verify=True,
+                 cache_control=DEFAULT_CACHE_CONTROL, region=None, multipart_chunk_size=MULTIPART_CHUNK_SIZE):
+        if boto3 is None:
+            raise ValueError("Upload benötigt boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.verify = verify
+        self.cache_control = cache_control
+        self.multipart_chunk_size = multipart_chunk_size
+        self.transfer_config = boto3.s3.transfer.TransferConfig(multipart_threshold=multipart_chunk_size,
+                                                                multipart_chunksize=multipart_chunk_size)
+        self.client = boto3.client(
+            's3', endpoint_url=endpoint_url or None, region_name=region or ('auto' if endpoint_url else None),
+            config=botocore.config.Config(max_pool_connections=max(1, parallel_uploads),
+                                          retries={'max_attempts': 5, 'mode': 'adaptive'}))
+        self.remote = {}
+        self.lock = threading.Lock()
+
+    def list_remote(self, prefix=""):
+        """Liest Größe + ETag aller Objekte (einmal pro Lauf)"""
+        remote = {}
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                remote[obj['Key']] = (obj['Size'], obj['ETag'].strip('"'))
+        with self.lock:
+            self.remote = remote
+        return remote
+
+    def local_etag(self, path):
+        """Erwarteter ETag: MD5 bei einfachem PUT, Multipart-ETag bei großen Dateien"""
+        if Path(path).stat().st_size >= self.multipart_chunk_size:
+            return multipart_etag(path, self.multipart_chunk_size)
+        return file_md5(path).hexdigest()
+
+    def is_current(self, key, path):
+        """True, wenn das Objekt mit gleicher Größe und gleichem Inhalt (ETag) schon existiert"""
+        with self.lock:
+            remote = self.remote.get(key)
+        if remote is None or remote[0] != path.stat().st_size:
+            return False
+        return remote[1] == self.local_etag(path)
+
+    def upload_file(self, path, key):
+        """
+        Lädt eine Datei hoch (mit Content-MD5, optional HEAD-Prüfung)
+
+        Returns:
+            Anzahl Bytes
+
+        Raises:
+            ValueError: wenn die Prüfung nach dem Upload fehlschlägt
+            botocore.exceptions.BotoCoreError/ClientError: bei S3-Fehlern
+        """
+        metadata = object_metadata(key, self.cache_control)
+        size = Path(path).stat().st_size
+        if size >= self.multipart_chunk_size:
+            # Gestreamt in Teilen statt komplett im Speicher (und über 5 GB)
+            etag = multipart_etag(path, self.multipart_chunk_size)
+            self.client.upload_file(str(path), self.bucket, key, ExtraArgs=metadata, Config=self.transfer_config)
+        else:
+            data = Path(path).read_bytes()
+            digest = hashlib.md5(data)
+            etag = digest.hexdigest()
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data,
+                                   ContentMD5=base64.b64encode(digest.digest()).decode('ascii'), **metadata)
+
+        if self.verify:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+            if head['ContentLength'] != size or head['ETag'].strip('"') != etag:
+                raise ValueError(f"{key}: Prüfung fehlgeschlagen (Größe/ETag weichen ab)")
+            if head.get('ContentEncoding') != metadata.get('ContentEncoding'):
+                raise ValueError(f"{key}: Content-Encoding {head.get('ContentEncoding')!r} statt "
+                                 f"{metadata.get('ContentEncoding')!r}")
+
+        with self.lock:
+            self.remote[key] = (size, etag)
+        return size
+
+    def sync_file(self, path, key, force=False):
+        """
+        Upload, falls nicht schon identisch vorhanden
+
+        Returns:
+            Dict mit key, status ('ok', 'skipped', 'failed'), bytes, seconds, error
+        """
+        start = time.perf_counter()
+        result = {'key': key, 'status': 'ok', 'bytes': 0, 'error': None}
+        try:
+            if not force and self.is_current(key, path):
+                result['status'] = 'skipped'
+            else:
+                result['bytes'] = self.upload_file(path, key)
+        except (OSError, ValueError, botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+
+def upload_all(uploader, files, parallel_uploads=DEFAULT_PARALLEL_UPLOADS, force=False, events=None):
+    """
+    Lädt alle Dateien parallel hoch, Index-Dateien erst danach
+
+    Args:
+        uploader: S3Uploader
+        files: Liste von (key, path) aus collect_files
+        events: progress_events.ProgressLog für die Stufe "upload" (optional)
+
+    Returns:
+        (results, seconds)
+    """
+    events = events or ProgressLog(None, 'upload')
+    events.start(len(files))
+    start = time.perf_counter()
+
+    index = [(key, path) for key, path in files if key.endswith(INDEX_FILES)]
+    objects = [(key, path) for key, path in files if not key.endswith(INDEX_FILES)]
+    results = []
+
+    def report(result):
+        results.append(result)
+        events.item(result['key'], result['status'], result['seconds'], result['bytes'])
+        if result['status'] == 'failed':
+            print(f"❌ {result['key']}: {result['error']}", flush=True)
+        elif result['status'] == 'ok':
+            print(f"✅ {result['key']} ({result['bytes'] / 1024:.0f} KB)", flush=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel_uploads)) as executor:
+        futures = [executor.submit(uploader.sync_file, path, key, force) for key, path in objects]
+        for future in as_completed(futures):
+            report(future.result())
+
+    # Index nur, wenn alle Objekte angekommen sind (Clients sehen sonst fehlende Tiles)
+    if any(result['status'] == 'failed' for result in results):
+        for key, _ in index:
+            report({'key': key, 'status': 'failed', 'bytes': 0, 'seconds': 0.0,
+                    'error': "nicht hochgeladen, weil andere Objekte fehlgeschlagen sind"})
+    else:
+        for key, path in index:
+            report(uploader.sync_file(path, key, force))
+
+    seconds = time.perf_counter() - start
+    events.end(bytes=sum(result['bytes'] for result in results))
+    return results, seconds
+
+
+def main():
+    import argparse
+
+    config = load_config()
+    upload_config = config.get('upload', {})
+
+    parser = argparse.ArgumentParser(
+        description="Parallel, idempotent tile upload to R2 or any S3-compatible server",
+        epilog="Beispiel: python3 upload_tiles.py --endpoint-url http://localhost:5000 --bucket test-tiles"
+    )
+    parser.add_argument("-d", "--tiles-dir", help="Tile directory (default: paths.tiles_output)")
+    parser.add_argument("--bucket", default=upload_config.get('bucket_name', 'windrad-tiles'),
+                        help="Bucket (default: upload.bucket_name)")
+    parser.add_argument("--endpoint-url", default=os.environ.get('S3_ENDPOINT_URL') or upload_config.get('endpoint_url'),
+                        help="S3 endpoint (default: $S3_ENDPOINT_URL or upload.endpoint_url)")
+    parser.add_argument("-j", "--parallel", type=int,
+                        default=upload_config.get('parallel_uploads', DEFAULT_PARALLEL_UPLOADS),
+                        help="Parallel uploads / pooled connections (default: upload.parallel_uploads)")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="Skip the HEAD check after each upload (default: upload.verify_after_upload)")
+    parser.add_argument("--cache-control", default=upload_config.get('cache_control', DEFAULT_CACHE_CONTROL),
+                        help=f"Cache-Control for tiles (default: upload.cache_control or '{DEFAULT_CACHE_CONTROL}')")
+    parser.add_argument("--force", action="store_true", help="Upload everything, even if the remote copy matches")
+    parser.add_argument("--progress-log", default=str(default_progress_log()),
+                        help="JSONL progress events for monitor.py (default: paths.progress_log, '' to disable)")
+
+    args = parser.parse_args()
+
+    tiles_dir = Path(args.tiles_dir) if args.tiles_dir else config_path(config, 'tiles_output', '../tiles_output')
+    verify = upload_config.get('verify_after_upload', True) and not args.no_verify
+
+    print("☁️  Tile-Upload (S3-API)")
+    print("=" * 60)
+
+    files = collect_files(tiles_dir)
+    if not files:
+        print(f"❌ Keine Tiles in {tiles_dir} gefunden")
+        sys.exit(1)
+
+    try:
+        uploader = S3Uploader(args.bucket, args.endpoint_url, args.parallel, verify, args.cache_control)
+        remote = uploader.list_remote()
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+        print(f"❌ Bucket {args.bucket} nicht erreichbar: {e}")
+        sys.exit(1)
+
+    total_bytes = sum(path.stat().st_size for _, path in files)
+    print(f"   Bucket:   {args.bucket}" + (f" ({args.endpoint_url})" if args.endpoint_url else ""))
+    print(f"   Dateien:  {len(files)} ({total_bytes / (1024 * 1024):.1f} MB), im Bucket: {len(remote)} Objekte")
+    print(f"   Parallel: {args.parallel}, Prüfung nach Upload: {'ja' if verify else 'nein'}")
+    print()
+
+    results, seconds = upload_all(uploader, files, args.parallel, args.force,
+                                  ProgressLog(args.progress_log or None, 'upload'))
+
+    counts = {status: sum(1 for r in results if r['status'] == status) for status in ('ok', 'skipped', 'failed')}
+    uploaded_bytes = sum(r['bytes'] for r in results)
+
+    print()
+    print("=" * 60)
+    print(f"📊 {len(results)} Objekte in {seconds:.1f}s → {len(results) / seconds if seconds else 0:.1f} Objekte/s")
+    print(f"   Hochgeladen:    {counts['ok']} ({uploaded_bytes / (1024 * 1024):.1f} MB, "
+          f"{counts['ok'] / seconds if seconds else 0:.1f} Objekte/s, "
+          f"{uploaded_bytes / (1024 * 1024) / seconds if seconds else 0:.1f} MB/s)")
+    print(f"   Übersprungen:   {counts['skipped']} (gleicher ETag im Bucket)")
+    print(f"   Fehlgeschlagen: {counts['failed']}")
+
+    if counts['failed']:
+        sys.exit(1)
+    print("\n✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()
@@ -80,6 +80,39 @@ for file in "$TILES_DIR"/*.bin.gz; do
     fi
 done
 
+# Sichtbarkeits-Kacheln (visibility/<windrad_id>/tile_X_Y.bin.gz + index.json)
+if [ -d "$TILES_DIR/visibility" ]; then
+    echo ""
+    echo -e "${BLUE}Sichtbarkeits-Kacheln...${NC}\n"
+
+    for file in "$TILES_DIR"/visibility/*/*.bin.gz; do
+        [ -e "$file" ] || continue
+        key="visibility/$(basename "$(dirname "$file")")/$(basename "$file")"
+
+        echo -n "Uploading $key... "
+
+        if wrangler r2 object put "$BUCKET_NAME/$key" --file="$file" --content-type="application/gzip" --content-encoding="gzip" --remote > /dev/null 2>&1; then
+            echo -e "${GREEN}✓${NC}"
+            ((UPLOADED++))
+        else
+            echo -e "${RED}✗${NC}"
+            ((FAILED++))
+        fi
+    done
+
+    # Index zuletzt: Clients sehen neue Windräder erst, wenn alle Kacheln da sind
+    if [ -f "$TILES_DIR/visibility/index.json" ]; then
+        echo -n "Uploading visibility/index.json... "
+        if wrangler r2 object put "$BUCKET_NAME/visibility/index.json" --file="$TILES_DIR/visibility/index.json" --content-type="application/json" --remote > /dev/null 2>&1; then
+            echo -e "${GREEN}✓${NC}"
+            ((UPLOADED++))
+        else
+            echo -e "${RED}✗${NC}"
+            ((FAILED++))
+        fi
+    fi
+fi
+
 echo ""
 echo -e "${BLUE}========================================${NC}"
 echo -e "${GREEN}✅ Upload abgeschlossen${NC}"
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Viewshed pro Windrad: sichtbarer Höhenanteil für jede Zelle im Umkreis
+
+Statt einzelner Strahlen wie /v1/viewshed (ein bilinearElevation-Aufruf
+pro Punkt) wird das ganze 1-m-Raster um das Windrad in einem Durchgang
+berechnet – R2-Sweep (Franklin & Ray): von der Windrad-Säule aus je ein
+Strahl zu jeder Randzelle des Quadrats, entlang des Strahls wird der
+Horizont (steilster bisheriger Höhenwinkel) als laufendes Maximum
+mitgeführt; jede überstrichene Zelle wird gegen den Horizont geprüft.
+
+Sichtbarkeit ist symmetrisch: Ein Beobachter (Augenhöhe 1,7 m) sieht den
+Punkt in Höhe z der Säule genau dann, wenn die Strecke das Gelände
+dazwischen nicht schneidet. Je höher z, desto freier die Strecke – der
+Sweep läuft deshalb für mehrere Höhen der Säule (--levels) gleichzeitig.
+Zwischen der letzten verdeckten und der ersten freien Stufe folgt die
+unterste sichtbare Höhe exakt aus dem Verdecker der verdeckten Stufe (die
+Sichtlinie streift ihn). Daraus folgt der sichtbare Anteil wie bei
+/v1/line-of-sight (visiblePercent / 100).
+
+Genauigkeit hängt vom Gelände ab: Jede Zelle wird entlang des Strahls zur
+Randzelle geprüft, nicht entlang der exakten Linie Zelle → Windrad. Der
+Strahl läuft bis zu eine halbe Zelle daneben, und das Gelände wird an den
+Gitterlinien zwischen 2 Zellen interpoliert statt wie /v1/line-of-sight
+bilinear in 1-m-Schritten ab dem Beobachter. Auf glattem Gelände ist das
+ohne Belang (--check: 1,5–2,7 % mittlere Abweichung, 95–99 % gleiche
+Klasse). Auf einem rauen DSM (Bäume, Gebäudekanten direkt vor dem Auge)
+entscheidet oft der erste Meter vor dem Beobachter, und die Abweichung
+steigt – gemessen bis ~11 % bei 77–81 % gleicher Klasse. Das Raster ist
+dann eine Übersicht; für Einzelpunkte gilt /v1/line-of-sight, und --check
+zeigt die Abweichung im eigenen Gebiet.
+
+Ausgabe: viewshed_<id>.npz mit
+- fraction:  uint8, 0..250 = 0..100 % sichtbar (0,4-%-Schritte), 255 = keine Daten/außerhalb
+- origin_x, origin_y, resolution: UTM-Koordinate der Zelle [0, 0] (Zeile 0 = Süden)
+- turbine_id, base_m, total_height_m, eye_height_m, radius_m
+
+Usage:
+    python3 viewshed.py                       # alle Windräder aus windraeder.csv
+    python3 viewshed.py 1769758971217 -o ../viewsheds --radius 3000
+    python3 viewshed.py Acker --check 200     # Stichprobe gegen Einzel-Sichtlinien
+"""
+
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install numpy")
+    sys.exit(1)
+
+from pipeline_config import load_config, config_path
+from elevation import TileStore, EYE_HEIGHT, wgs84_to_utm33
+from turbines import load_turbines
+
+DEFAULT_RADIUS = 3000        # m (wie generate_correct_tiles.py)
+DEFAULT_LEVELS = 8           # Höhenstufen der Säule (exakte Grenzhöhe dazwischen)
+RAY_CHUNK = 256              # Strahlen pro NumPy-Block
+FRACTION_SCALE = 250         # uint8-Wert für 100 % sichtbar
+NODATA = 255                 # uint8: keine Daten / außerhalb des Radius
+
+
+def perimeter(radius):
+    """Randzellen (dx, dy) des Quadrats [-radius, radius]², jede genau einmal"""
+    side = np.arange(-radius, radius)
+    dx = np.concatenate([side, np.full(2 * radius, radius), -side, np.full(2 * radius, -radius)])
+    dy = np.concatenate([np.full(2 * radius, -radius), side, np.full(2 * radius, radius), -side])
+    return dx, dy
+
+
+def sweep(dem, radius, base, total_height, eye_height=EYE_HEIGHT, levels=DEFAULT_LEVELS):
+    """
+    R2-Sweep vom Mittelpunkt des Höhenmodells aus
+
+    Näherung: geprüft wird entlang der Strahlen zu den Randzellen, Gelände
+    linear zwischen 2 Zellen – auf rauem DSM deutlich ungenauer als auf
+    glattem Gelände (siehe Moduldoku, Abgleich mit --check).
+
+    Args:
+        dem: Float32-Array [2r+1, 2r+1] (NaN = keine Daten), Windrad in der Mitte
+        radius: r in Zellen (= Meter)
+        base: Geländehöhe am Windrad (m ü.NN)
+        total_height: Höhe der Säule über base (Blattspitze)
+        eye_height: Augenhöhe der Beobachter über Gelände
+        levels: Anzahl Höhenstufen zwischen base und Spitze
+
+    Returns:
+        Float32-Array wie dem: sichtbarer Anteil 0..1, NaN ohne Daten/außerhalb
+    """
+    size = 2 * radius + 1
+    fraction = np.full((size, size), np.nan, dtype=np.float32)
+    padded = np.pad(dem, ((0, 1), (0, 1)), constant_values=np.nan)
+    flat_dem = padded.ravel()
+    stride = padded.shape[1]
+    heights = base + total_height * np.arange(levels + 1, dtype=np.float32) / levels
+    # Layout [Schritt, Strahl]: die laufenden Maxima entlang axis=0 sind
+    # zeilenweise Vektor-Operationen über alle Strahlen (axis=1 wäre ~3× langsamer)
+    steps = np.arange(1, radius + 1, dtype=np.float32)[:, None]
+    index = np.arange(radius, dtype=np.int32)[:, None]
+    ray_dx, ray_dy = perimeter(radius)
+
+    for begin in range(0, len(ray_dx), RAY_CHUNK):
+        dx = ray_dx[None, begin:begin + RAY_CHUNK].astype(np.float32) / radius
+        dy = ray_dy[None, begin:begin + RAY_CHUNK].astype(np.float32) / radius
+
+        # Schnittpunkte mit den Gitterlinien der Hauptachse: eine Koordinate
+        # ist ganzzahlig, das Gelände wird entlang der anderen zwischen den
+        # beiden Nachbarzellen linear interpoliert (2 Zugriffe statt 4)
+        px = radius + steps * dx
+        py = radius + steps * dy
+        x_major = np.abs(dx) == 1
+        minor = np.where(x_major, py, px)
+        lower = np.floor(minor)
+        weight = minor - lower
+        lower = lower.astype(np.int64)
+        flat = np.where(x_major, lower * stride + np.rint(px).astype(np.int64),
+                        np.rint(py).astype(np.int64) * stride + lower)
+        neighbor = np.where(x_major, stride, 1)
+        terrain = flat_dem[flat] * (1 - weight) + flat_dem[flat + neighbor] * weight
+        terrain[np.isnan(terrain)] = -np.inf  # keine Daten verdecken nichts
+        distance = np.broadcast_to(steps * np.sqrt(dx * dx + dy * dy), terrain.shape)
+
+        # Zelle unter dem Schnittpunkt (Beobachter dort)
+        cx = np.rint(px).astype(np.int32)
+        cy = np.rint(py).astype(np.int32)
+        eye = dem[cy, cx] + eye_height
+        cell_distance = np.hypot(cx - radius, cy - radius).astype(np.float32)
+
+        crossing = np.full(eye.shape, np.nan, dtype=np.float32)
+        visible = np.empty(eye.shape, dtype=bool)
+        previous_blocker = None
+        for k, z in enumerate(heights):
+            # Horizont von Höhe z aus: steilster Winkel zu Gelände vor der
+            # Zelle (running[i-1]) und die Position dieses Verdeckers (blocker[i-1])
+            slope = (terrain - z) / distance
+            running = np.maximum.accumulate(slope, axis=0)
+            blocker = np.maximum.accumulate(np.where(slope >= running, index, 0), axis=0)
+
+            visible[0] = True
+            np.greater_equal(((eye - z) / cell_distance)[1:], running[:-1], out=visible[1:])
+            visible &= np.isnan(crossing)
+            if previous_blocker is None:
+                crossing[visible] = z
+            else:
+                # Auf Stufe k-1 verdeckt, auf Stufe k frei: unterste sichtbare
+                # Höhe exakt über den Verdecker Q der Stufe k-1 (Sichtlinie
+                # Auge → Säule streift Q), begrenzt auf das Intervall
+                step, ray = np.nonzero(visible)
+                q = previous_blocker[step - 1, ray]
+                s_q = distance[q, ray]
+                h_q = terrain[q, ray]
+                d = cell_distance[step, ray]
+                e = eye[step, ray]
+                z_q = (h_q / s_q - e / d) / (1 / s_q - 1 / d)
+                crossing[step, ray] = np.clip(z_q, heights[k - 1], z)
+            previous_blocker = blocker
+
+        top = base + total_height
+        ray_fraction = np.where(np.isnan(crossing), 0.0, (top - crossing) / total_height)
+        ray_fraction[np.isnan(eye)] = np.nan
+
+        inside = (cx - radius) ** 2 + (cy - radius) ** 2 <= radius * radius
+        fraction[cy[inside], cx[inside]] = ray_fraction[inside]
+
+    # Standort selbst: Säule steht direkt vor dem Beobachter
+    if not np.isnan(dem[radius, radius]):
+        fraction[radius, radius] = 1.0
+    return fraction
+
+
+def turbine_viewshed(store, turbine, radius=DEFAULT_RADIUS, eye_height=EYE_HEIGHT, levels=DEFAULT_LEVELS):
+    """
+    Viewshed eines Windrads (dict aus turbines.load_turbines)
+
+    Returns:
+        Dict mit fraction (Float32 0..1, NaN = keine Daten), origin_x,
+        origin_y, base, center_x, center_y
+
+    Raises:
+        ValueError: wenn am Standort keine Höhendaten vorliegen
+    """
+    x, y = wgs84_to_utm33(turbine['lat'], turbine['lon'])
+    base = float(store.elevation(x, y))
+    if np.isnan(base):
+        raise ValueError(f"Keine Höhendaten am Standort von {turbine['name']}")
+
+    center_x, center_y = int(round(float(x))), int(round(float(y)))
+    origin_x, origin_y = center_x - radius, center_y - radius
+    dem = store.window(origin_x, origin_y, 2 * radius + 1, 2 * radius + 1)
+
+    return {
+        'fraction': sweep(dem, radius, base, turbine['total_height'], eye_height, levels),
+        'origin_x': origin_x,
+        'origin_y': origin_y,
+        'base': base,
+        'center_x': center_x,
+        'center_y': center_y,
+    }
+
+
+def encode_fraction(fraction):
+    """Float 0..1 (NaN) → uint8 0..FRACTION_SCALE (NODATA)"""
+    encoded = np.full(fraction.shape, NODATA, dtype=np.uint8)
+    valid = ~np.isnan(fraction)
+    encoded[valid] = np.rint(np.clip(fraction[valid], 0, 1) * FRACTION_SCALE).astype(np.uint8)
+    return encoded
+
+
+def line_fraction(store, x, y, target_x, target_y, base, total_height, eye_height=EYE_HEIGHT):
+    """
+    Referenz für --check: sichtbarer Anteil entlang einer geraden UTM-Linie
+    mit 1 Stützpunkt pro Meter, Logik wie /v1/line-of-sight
+    """
+    distance = float(np.hypot(target_x - x, target_y - y))
+    t = np.linspace(0, 1, max(2, int(distance) + 1))
+    terrain = store.elevation(x + (target_x - x) * t, y + (target_y - y) * t)
+    eye = terrain[0] + eye_height
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (terrain[1:-1] - eye) / (distance * t[1:-1])
+    slopes = slopes[~np.isnan(slopes)]
+    if not slopes.size:
+        return 1.0
+    blocked_upto = eye + slopes.max() * distance
+    if blocked_upto <= base:
+        return 1.0
+    top = base + total_height
+    return max(0.0, top - min(blocked_upto, top)) / total_height
+
+
+def check_against_lines(store, result, turbine, radius, eye_height, samples, seed=0):
+    """
+    Vergleicht Stichproben-Zellen mit Einzel-Sichtlinien
+
+    Returns:
+        (mittlere absolute Abweichung, Anteil gleicher Klassen sichtbar/teilweise/verdeckt)
+    """
+    fraction = result['fraction']
+    rows, cols = np.nonzero(~np.isnan(fraction))
+    rng = np.random.default_rng(seed)
+    pick = rng.choice(len(rows), size=min(samples, len(rows)), replace=False)
+
+    def classify(value):
+        return 0 if value < 0.10 else 1 if value < 0.70 else 2
+
+    errors, agree = [], 0
+    for i in pick:
+        x, y = result['origin_x'] + cols[i], result['origin_y'] + rows[i]
+        reference = line_fraction(store, x, y, result['center_x'], result['center_y'], result['base'],
+                                  turbine['total_height'], eye_height)
+        errors.append(abs(reference - fraction[rows[i], cols[i]]))
+        agree += classify(reference) == classify(fraction[rows[i], cols[i]])
+    return float(np.mean(errors)), agree / len(pick)
+
+
+def save_viewshed(output_dir, turbine, result, radius, eye_height):
+    """Schreibt viewshed_<id>.npz atomar, liefert den Pfad"""
+    output_file = Path(output_dir) / f"viewshed_{turbine['id']}.npz"
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    with open(tmp_file, 'wb') as f:
+        np.savez_compressed(
+            f,
+            fraction=encode_fraction(result['fraction']),
+            origin_x=result['origin_x'], origin_y=result['origin_y'], resolution=1.0,
+            turbine_id=turbine['id'], base_m=result['base'], total_height_m=turbine['total_height'],
+            eye_height_m=eye_height, radius_m=radius,
+        )
+    tmp_file.replace(output_file)
+    return output_file
+
+
+def select_turbines(turbines, selectors):
+    """Windräder nach id oder name (ohne Auswahl: alle)"""
+    if not selectors:
+        return turbines
+    selected = [t for t in turbines if t['id'] in selectors or t['name'] in selectors]
+    unknown = set(selectors) - {t['id'] for t in selected} - {t['name'] for t in selected}
+    if unknown:
+        raise ValueError(f"Unbekannte Windräder: {', '.join(sorted(unknown))}")
+    return selected
+
+
+def main():
+    import argparse
+
+    config = load_config()
+
+    parser = argparse.ArgumentParser(
+        description="Per-turbine viewshed (visible height fraction) with an R2 sweep over the DSM tiles",
+        epilog="Beispiel: python3 viewshed.py 1769758971217 -o ../viewsheds --check 200"
+    )
+    parser.add_argument("turbines", nargs="*", help="Turbine ids or names (default: all in windraeder.csv)")
+    parser.add_argument("-o", "--output", help="Output directory (default: paths.viewsheds)")
+    parser.add_argument("-d", "--tiles-dir", help="Tile directory (default: paths.tiles_output)")
+    parser.add_argument("--turbines-csv", help="Turbine CSV (default: paths.turbines)")
+    parser.add_argument("-r", "--radius", type=int, default=DEFAULT_RADIUS,
+                        help=f"Radius in meters (default: {DEFAULT_RADIUS})")
+    parser.add_argument("--levels", type=int, default=DEFAULT_LEVELS,
+                        help=f"Height levels on the turbine column (default: {DEFAULT_LEVELS})")
+    parser.add_argument("--eye-height", type=float, default=EYE_HEIGHT,
+                        help=f"Observer eye height in meters (default: {EYE_HEIGHT})")
+    parser.add_argument("--check", type=int, metavar="N",
+                        help="Compare N random cells with single line-of-sight profiles")
+
+    args = parser.parse_args()
+
+    tiles_dir = Path(args.tiles_dir) if args.tiles_dir else config_path(config, 'tiles_output', '../tiles_output')
+    try:
+        turbines = select_turbines(load_turbines(args.turbines_csv), args.turbines)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    output_dir = Path(args.output) if args.output else config_path(config, 'viewsheds', '../viewsheds')
+    output_dir.mkdir(parents=True, exist_ok=True)
+    store = TileStore(tiles_dir)
+
+    print("🔭 Viewshed (R2-Sweep)")
+    print("=" * 60)
+    print(f"   Windräder: {len(turbines)}")
+    print(f"   Radius:    {args.radius} m, {args.levels} Höhenstufen, Augenhöhe {args.eye_height} m")
+    print(f"   Tiles:     {tiles_dir}")
+    print()
+
+    failed = 0
+    for turbine in turbines:
+        start = time.perf_counter()
+        try:
+            result = turbine_viewshed(store, turbine, args.radius, args.eye_height, args.levels)
+        except ValueError as e:
+            print(f"   ⚠️  {turbine['name']}: {e}")
+            failed += 1
+            continue
+        elapsed = time.perf_counter() - start
+
+        fraction = result['fraction']
+        valid = ~np.isnan(fraction)
+        cells = int(valid.sum())
+        output_file = save_viewshed(output_dir, turbine, result, args.radius, args.eye_height)
+
+        print(f"   ✅ {turbine['name']} ({turbine['total_height']:g} m): {elapsed:.1f}s, "
+              f"{cells / elapsed / 1e6:.1f} Mio. Zellen/s → {output_file.name}")
+        if cells:
+            print(f"      Spitze sichtbar: {(fraction[valid] > 0).mean():.0%} der Fläche, "
+                  f"≥ 70 %: {(fraction[valid] >= 0.7).mean():.0%}, "
+                  f"ohne Daten: {1 - cells / (np.pi * args.radius ** 2):.0%}")
+        if args.check and cells:
+            mean_error, agreement = check_against_lines(store, result, turbine, args.radius,
+                                                        args.eye_height, args.check)
+            print(f"      Check ({args.check} Zellen): Abweichung Ø {mean_error:.1%}, "
+                  f"gleiche Klasse {agreement:.0%}")
+
+    print()
+    if failed == len(turbines):
+        print("❌ Kein Viewshed berechnet!")
+        sys.exit(1)
+    print("✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Vorberechnete Sichtbarkeits-Tiles pro Windrad (Pipeline-Stufe nach der Konvertierung)
+
+Rechnet für jedes Windrad aus windraeder.csv den Viewshed (viewshed.py:
+sichtbarer Höhenanteil für jede 1-m-Zelle im Umkreis) und legt ihn auf das
+bestehende tile_X_Y-Raster. Der Client beantwortet "wie viel vom Windrad
+sehe ich hier" dann mit einem (gecachten) Tile-Lesezugriff statt eines
+Round-Trips zur Elevation API.
+
+Ausgabe unter <tiles_output>/visibility/:
+- <turbine_id>/tile_X_Y.bin.gz  1000×1000 uint8, Zeile 0 = Süden (wie die Height Tiles),
+                                0..250 = 0..100 % sichtbar, 255 = keine Daten/außerhalb
+- index.json                    Windräder mit Parametern und ihren Tiles
+
+Inkrementell: Ein Windrad wird nur neu gerechnet, wenn sich seine
+Parameter (Position, Höhe, Radius, ...) oder die Height Tiles im Umkreis
+geändert haben. Verzeichnisse entfernter Windräder werden gelöscht.
+
+Usage:
+    python3 visibility_tiles.py                  # alle Windräder, Pfade aus config.json
+    python3 visibility_tiles.py -j 4 --force
+    python3 visibility_tiles.py 1769758971217 --radius 2000
+"""
+
+import sys
+import json
+import gzip
+import time
+import shutil
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: Fehlende Dependencies!")
+    print("Installation:")
+    print("  pip install numpy")
+    sys.exit(1)
+
+from pipeline_config import load_config, config_path
+from elevation import TileStore, TILE_SIZE, EYE_HEIGHT, wgs84_to_utm33, tiles_in_radius
+from turbines import load_turbines
+from viewshed import (turbine_viewshed, encode_fraction, select_turbines, DEFAULT_RADIUS, DEFAULT_LEVELS,
+                      FRACTION_SCALE, NODATA)
+
+VISIBILITY_VERSION = 1
+VISIBILITY_DIR = "visibility"
+INDEX_FILE = "index.json"
+GZIP_LEVEL = 9
+
+
+def source_signature(tiles_dir, tiles):
+    """Größe + mtime der Height Tiles im Umkreis (ändert sich bei Neukonvertierung)"""
+    signature = {}
+    for tile_x, tile_y in tiles:
+        for name in (f"tile_{tile_x}_{tile_y}.bin", f"tile_{tile_x}_{tile_y}.bin.gz", f"tile_{tile_x}_{tile_y}.v2"):
+            path = Path(tiles_dir) / name
+            if path.exists():
+                stat = path.stat()
+                signature[name] = [stat.st_size, stat.st_mtime_ns]
+                break
+    return signature
+
+
+def turbine_params(turbine, radius, levels, eye_height):
+    """Parameter, von denen die Tiles eines Windrads abhängen"""
+    return {
+        'version': VISIBILITY_VERSION,
+        'lat': turbine['lat'],
+        'lon': turbine['lon'],
+        'total_height': turbine['total_height'],
+        'radius': radius,
+        'levels': levels,
+        'eye_height': eye_height,
+    }
+
+
+def split_into_tiles(encoded, origin_x, origin_y):
+    """
+    Zerlegt das Viewshed-Raster auf das tile_X_Y-Raster
+
+    Yields:
+        (tile_x, tile_y, uint8-Grid 1000×1000) für Kacheln mit Daten
+    """
+    height, width = encoded.shape
+    for tile_y in range(origin_y // TILE_SIZE, (origin_y + height - 1) // TILE_SIZE + 1):
+        for tile_x in range(origin_x // TILE_SIZE, (origin_x + width - 1) // TILE_SIZE + 1):
+            grid = np.full((TILE_SIZE, TILE_SIZE), NODATA, dtype=np.uint8)
+            left = max(origin_x, tile_x * TILE_SIZE)
+            right = min(origin_x + width, (tile_x + 1) * TILE_SIZE)
+            bottom = max(origin_y, tile_y * TILE_SIZE)
+            top = min(origin_y + height, (tile_y + 1) * TILE_SIZE)
+            grid[bottom - tile_y * TILE_SIZE:top - tile_y * TILE_SIZE,
+                 left - tile_x * TILE_SIZE:right - tile_x * TILE_SIZE] = \
+                encoded[bottom - origin_y:top - origin_y, left - origin_x:right - origin_x]
+            if (grid != NODATA).any():
+                yield tile_x, tile_y, grid
+
+
+def build_turbine(tiles_dir, output_dir, turbine, radius, levels, eye_height):
+    """
+    Berechnet die Sichtbarkeits-Tiles eines Windrads (läuft im Worker-Prozess)
+
+    Schreibt in ein temporäres Verzeichnis und tauscht es erst am Ende aus,
+    damit Clients nie einen halb geschriebenen Satz Tiles sehen.
+
+    Returns:
+        Dict mit status ('ok'/'failed') und dem index.json-Eintrag bzw. error
+    """
+    start = time.perf_counter()
+    try:
+        store = TileStore(tiles_dir)
+        result = turbine_viewshed(store, turbine, radius, eye_height, levels)
+        encoded = encode_fraction(result['fraction'])
+
+        turbine_dir = Path(output_dir) / turbine['id']
+        tmp_dir = turbine_dir.with_name(turbine_dir.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        tiles, size = [], 0
+        for tile_x, tile_y, grid in split_into_tiles(encoded, result['origin_x'], result['origin_y']):
+            data = gzip.compress(grid.tobytes(), compresslevel=GZIP_LEVEL, mtime=0)
+            (tmp_dir / f"tile_{tile_x}_{tile_y}.bin.gz").write_bytes(data)
+            tiles.append(f"tile_{tile_x}_{tile_y}")
+            size += len(data)
+
+        shutil.rmtree(turbine_dir, ignore_errors=True)
+        tmp_dir.rename(turbine_dir)
+
+        fraction = result['fraction']
+        valid = ~np.isnan(fraction)
+        return {
+            'status': 'ok',
+            'id': turbine['id'],
+            'name': turbine['name'],
+            'seconds': time.perf_counter() - start,
+            'bytes': size,
+            'entry': {
+                'name': turbine['name'],
+                'total_height': turbine['total_height'],
+                'base': round(result['base'], 2),
+                'center': [result['center_x'], result['center_y']],
+                'tiles': sorted(tiles),
+                'visible_area': round(float((fraction[valid] > 0).mean()), 4) if valid.any() else None,
+                'params': turbine_params(turbine, radius, levels, eye_height),
+            },
+        }
+    except ValueError as e:
+        # Kein Gelände am Standort (außerhalb der konvertierten Tiles)
+        return {'status': 'skipped', 'id': turbine['id'], 'name': turbine['name'], 'error': str(e)}
+    except Exception as e:
+        return {'status': 'failed', 'id': turbine['id'], 'name': turbine['name'], 'error': str(e)}
+
+
+def load_index(output_dir):
+    """index.json der Sichtbarkeits-Tiles (leer, wenn nicht vorhanden)"""
+    index_file = Path(output_dir) / INDEX_FILE
+    if not index_file.exists():
+        return {'turbines': {}}
+    with open(index_file) as f:
+        return json.load(f)
+
+
+def save_index(output_dir, turbines):
+    """Schreibt index.json atomar"""
+    index = {
+        'version': VISIBILITY_VERSION,
+        'tile_size': TILE_SIZE,
+        'dtype': 'uint8',
+        'scale': FRACTION_SCALE,
+        'nodata': NODATA,
+        'turbines': dict(sorted(turbines.items())),
+    }
+    index_file = Path(output_dir) / INDEX_FILE
+    tmp_file = index_file.with_name(index_file.name + ".tmp")
+    tmp_file.write_text(json.dumps(index, indent=2, ensure_ascii=False))
+    tmp_file.replace(index_file)
+
+
+def update_visibility(tiles_dir, output_dir, turbines, radius, levels, eye_height, workers=1, force=False,
+                      all_turbines=None, on_result=None):
+    """
+    Rechnet geänderte Windräder neu und pflegt index.json (inkrementell)
+
+    Args:
+        turbines: zu prüfende Windräder (dicts aus turbines.load_turbines)
+        all_turbines: alle bekannten Windräder – Verzeichnisse anderer werden
+            gelöscht (None = nicht aufräumen, z.B. bei Auswahl einzelner)
+        on_result: Callback pro fertigem Windrad (Ergebnis aus build_turbine),
+            z.B. für den Upload, während die übrigen noch rechnen
+
+    Returns:
+        Liste der Ergebnisse (status 'ok', 'skipped', 'failed'; unveränderte
+        Windräder mit 'unchanged')
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    entries = load_index(output_dir).get('turbines', {})
+
+    # Entfernte Windräder aufräumen (nur bei vollem Lauf)
+    if all_turbines is not None:
+        known = {t['id'] for t in all_turbines}
+        for turbine_id in sorted(set(entries) - known):
+            shutil.rmtree(output_dir / turbine_id, ignore_errors=True)
+            del entries[turbine_id]
+            print(f"   🗑️  Entfernt: {turbine_id}")
+
+    # Planen: unveränderte Windräder überspringen
+    todo, signatures, results = [], {}, []
+    for turbine in turbines:
+        x, y = wgs84_to_utm33(turbine['lat'], turbine['lon'])
+        center_x, center_y = int(round(float(x))), int(round(float(y)))
+        signatures[turbine['id']] = source_signature(tiles_dir, tiles_in_radius(center_x, center_y, radius))
+        entry = entries.get(turbine['id'])
+        unchanged = (entry is not None
+                     and entry.get('params') == turbine_params(turbine, radius, levels, eye_height)
+                     and entry.get('sources') == signatures[turbine['id']]
+                     and (output_dir / turbine['id']).is_dir())
+        if unchanged and not force:
+            print(f"   ⏭️  {turbine['name']}: unverändert")
+            results.append({'status': 'unchanged', 'id': turbine['id'], 'name': turbine['name']})
+        else:
+            todo.append(turbine)
+
+    if not todo:
+        save_index(output_dir, entries)
+        return results
+
+    print(f"   📋 {len(todo)} Windräder zu berechnen ({min(workers, len(todo))} Worker)\n")
+
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as pool:
+        futures = [pool.submit(build_turbine, tiles_dir, output_dir, turbine, radius, levels, eye_height)
+                   for turbine in todo]
+        for future in as_completed(futures):
+            result = future.result()
+            if result['status'] == 'ok':
+                entry = result['entry']
+                entry['sources'] = signatures[result['id']]
+                entries[result['id']] = entry
+                save_index(output_dir, entries)
+                visible = f", Spitze sichtbar auf {entry['visible_area']:.0%}" if entry['visible_area'] is not None else ""
+                print(f"   ✅ {result['name']}: {len(entry['tiles'])} Tiles, "
+                      f"{result['bytes'] / 1024:.0f} KB in {result['seconds']:.1f}s{visible}", flush=True)
+            elif result['status'] == 'skipped':
+                print(f"   ⚠️  {result['name']}: {result['error']}", flush=True)
+            else:
+                print(f"   ❌ {result['name']}: {result['error']}", flush=True)
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    save_index(output_dir, entries)
+    return results
+
+
+def main():
+    import argparse
+
+    config = load_config()
+    visibility_config = config.get('visibility', {})
+
+    parser = argparse.ArgumentParser(
+        description="Precompute per-turbine visibility tiles (uint8 visible height fraction on the tile grid)",
+        epilog="Beispiel: python3 visibility_tiles.py -j 4"
+    )
+    parser.add_argument("turbines", nargs="*", help="Turbine ids or names (default: all in windraeder.csv)")
+    parser.add_argument("-d", "--tiles-dir", help="Height tile directory (default: paths.tiles_output)")
+    parser.add_argument("-o", "--output", help="Output directory (default: <tiles-dir>/visibility)")
+    parser.add_argument("--turbines-csv", help="Turbine CSV (default: paths.turbines)")
+    parser.add_argument("-r", "--radius", type=int, default=visibility_config.get('radius', DEFAULT_RADIUS),
+                        help="Radius in meters (default: visibility.radius)")
+    parser.add_argument("--levels", type=int, default=visibility_config.get('levels', DEFAULT_LEVELS),
+                        help="Height levels on the turbine column (default: visibility.levels)")
+    parser.add_argument("--eye-height", type=float, default=visibility_config.get('eye_height', EYE_HEIGHT),
+                        help="Observer eye height in meters (default: visibility.eye_height)")
+    parser.add_argument("-j", "--workers", type=int, default=visibility_config.get('parallel_workers', 1),
+                        help="Parallel worker processes (default: visibility.parallel_workers)")
+    parser.add_argument("--force", action="store_true", help="Recompute all turbines, even if unchanged")
+
+    args = parser.parse_args()
+
+    tiles_dir = Path(args.tiles_dir) if args.tiles_dir else config_path(config, 'tiles_output', '../tiles_output')
+    output_dir = Path(args.output) if args.output else tiles_dir / VISIBILITY_DIR
+
+    try:
+        all_turbines = load_turbines(args.turbines_csv)
+        turbines = select_turbines(all_turbines, args.turbines)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print("🗺️  Sichtbarkeits-Tiles pro Windrad")
+    print("=" * 60)
+    print(f"   Height Tiles: {tiles_dir}")
+    print(f"   Ausgabe:      {output_dir}")
+    print(f"   Radius:       {args.radius} m, {args.levels} Höhenstufen, Augenhöhe {args.eye_height} m")
+    print()
+
+    start = time.perf_counter()
+    results = update_visibility(tiles_dir, output_dir, turbines, args.radius, args.levels, args.eye_height,
+                                args.workers, args.force, None if args.turbines else all_turbines)
+    if all(result['status'] == 'unchanged' for result in results):
+        print("\n✅ Alle Sichtbarkeits-Tiles aktuell")
+        return
+
+    succeeded, skipped, failed = (sum(1 for r in results if r['status'] == status)
+                                  for status in ('ok', 'skipped', 'failed'))
+    elapsed = time.perf_counter() - start
+
+    print()
+    print("=" * 60)
+    print(f"📊 Berechnet: {succeeded}, ohne Höhendaten: {skipped}, fehlgeschlagen: {failed} ({elapsed:.1f}s)")
+    print(f"💾 {output_dir / INDEX_FILE}")
+    if failed and not succeeded:
+        sys.exit(1)
+    print("\n✨ Fertig!")
+
+
+if __name__ == "__main__":
+    main()